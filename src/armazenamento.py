@@ -0,0 +1,158 @@
+import json
+import os
+from datetime import datetime
+import numpy as np
+from gerador import DEZENAS_POR_JOGO
+from combinatoria import para_mascaras, de_mascaras
+
+# Assinatura no início do arquivo e versão do cabeçalho
+ASSINATURA = b'MEGASENA'
+VERSAO = 1
+
+# Os dados começam em um múltiplo deste alinhamento (amigável ao page cache e ao memmap)
+ALINHAMENTO = 64
+
+# Formatos suportados: 6 bytes por jogo (uint8) ou uma máscara de 60 bits por jogo (uint64)
+FORMATOS = {
+    'dezenas': (np.uint8, (DEZENAS_POR_JOGO,)),
+    'mascara': (np.dtype('<u8'), ()),
+}
+
+
+def _ler_cabecalho(arquivo):
+    assinatura = arquivo.read(len(ASSINATURA))
+    if assinatura != ASSINATURA:
+        raise ValueError("Arquivo não é um armazenamento de jogos da Mega-Sena.")
+    tamanho = int.from_bytes(arquivo.read(4), 'little')
+    cabecalho = json.loads(arquivo.read(tamanho).decode('utf-8'))
+    if cabecalho.get('versao') != VERSAO:
+        raise ValueError(f"Versão de armazenamento não suportada: {cabecalho.get('versao')}.")
+    return cabecalho
+
+
+def criar_armazenamento(caminho, quantidade, formato='dezenas', **metadados):
+    """
+    Cria (ou substitui) um arquivo com espaço para `quantidade` jogos e retorna
+    o cabeçalho gravado. Os jogos são preenchidos depois, via abrir_jogos(modo='r+'),
+    inclusive por vários processos, cada um na sua fatia. O arquivo nasce incompleto
+    ('completo': False) até que marcar_completo seja chamado, depois da última escrita.
+
+    Formato: assinatura, tamanho do cabeçalho (uint32), cabeçalho JSON
+    (quantidade, formato, gerador, semente...) e os dados a partir de um offset alinhado.
+    """
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato inválido: {formato}. Use um de {list(FORMATOS)}.")
+
+    cabecalho = {
+        'versao': VERSAO,
+        'formato': formato,
+        'quantidade': int(quantidade),
+        'criado_em': datetime.now().isoformat(timespec='seconds'),
+        **metadados,
+        'completo': False,
+    }
+    # O offset depende do tamanho do próprio cabeçalho: grava o JSON já com o offset final
+    bruto = b''
+    offset = 0
+    while True:
+        cabecalho['offset'] = offset
+        bruto = json.dumps(cabecalho, ensure_ascii=False).encode('utf-8')
+        necessario = -(-(len(ASSINATURA) + 4 + len(bruto)) // ALINHAMENTO) * ALINHAMENTO
+        if necessario == offset:
+            break
+        offset = necessario
+
+    dtype, forma = FORMATOS[formato]
+    tamanho_dados = int(quantidade) * np.dtype(dtype).itemsize * int(np.prod(forma, dtype=np.int64))
+
+    with open(caminho, 'wb') as arquivo:
+        arquivo.write(ASSINATURA)
+        arquivo.write(len(bruto).to_bytes(4, 'little'))
+        arquivo.write(bruto)
+        # Reserva o espaço dos dados sem escrevê-los (arquivo esparso quando o sistema permite)
+        arquivo.truncate(offset + tamanho_dados)
+
+    return cabecalho
+
+
+def abrir_jogos(caminho, modo='r'):
+    """
+    Mapeia os jogos do arquivo em memória sem lê-los (np.memmap) e retorna
+    (dados, cabecalho). Vários processos que abrem o mesmo arquivo compartilham
+    as mesmas páginas do page cache do sistema operacional.
+    """
+    with open(caminho, 'rb') as arquivo:
+        cabecalho = _ler_cabecalho(arquivo)
+
+    dtype, forma = FORMATOS[cabecalho['formato']]
+    dados = np.memmap(caminho, dtype=dtype, mode=modo, offset=cabecalho['offset'],
+                      shape=(cabecalho['quantidade'],) + forma)
+    return dados, cabecalho
+
+
+def marcar_completo(caminho):
+    """
+    Marca o armazenamento como completo, reescrevendo só o cabeçalho. Deve ser chamada
+    depois que todos os jogos foram gravados: um arquivo interrompido no meio
+    (processo morto, erro em um worker) continua incompleto e não é reaproveitado.
+    """
+    with open(caminho, 'r+b') as arquivo:
+        cabecalho = _ler_cabecalho(arquivo)
+        cabecalho['completo'] = True
+        bruto = json.dumps(cabecalho, ensure_ascii=False).encode('utf-8')
+        # 'true' é mais curto que 'false': o JSON sempre cabe antes do offset dos dados
+        if len(ASSINATURA) + 4 + len(bruto) > cabecalho['offset']:
+            raise ValueError("O cabeçalho atualizado não cabe antes dos dados.")
+        arquivo.seek(len(ASSINATURA))
+        arquivo.write(len(bruto).to_bytes(4, 'little'))
+        arquivo.write(bruto)
+    return cabecalho
+
+
+def ler_cabecalho(caminho):
+    """Lê apenas o cabeçalho de um arquivo de jogos."""
+    with open(caminho, 'rb') as arquivo:
+        return _ler_cabecalho(arquivo)
+
+
+def ler_dezenas(dados, cabecalho, inicio=0, fim=None):
+    """Retorna os jogos [inicio, fim) como dezenas (n, 6) uint8, seja qual for o formato."""
+    fatia = np.asarray(dados[inicio:fim])
+    if cabecalho['formato'] == 'mascara':
+        return de_mascaras(fatia)
+    return fatia
+
+
+def gravar_dezenas(dados, cabecalho, inicio, jogos):
+    """Grava jogos (n, 6) a partir da posição `inicio`, convertendo para o formato do arquivo."""
+    if cabecalho['formato'] == 'mascara':
+        jogos = para_mascaras(jogos)
+    dados[inicio:inicio + len(jogos)] = jogos
+
+
+def salvar_jogos(caminho, jogos, formato='dezenas', **metadados):
+    """Atalho para gravar de uma vez um array de jogos (n, 6) em um novo arquivo."""
+    cabecalho = criar_armazenamento(caminho, len(jogos), formato, **metadados)
+    dados, cabecalho = abrir_jogos(caminho, modo='r+')
+    gravar_dezenas(dados, cabecalho, 0, jogos)
+    dados.flush()
+    return marcar_completo(caminho)
+
+
+def armazenamento_valido(caminho, quantidade_minima):
+    """
+    True se o arquivo existe, é legível, foi marcado como completo (ver marcar_completo)
+    e tem pelo menos `quantidade_minima` jogos.
+    """
+    if not os.path.exists(caminho):
+        return False
+    try:
+        cabecalho = ler_cabecalho(caminho)
+        return bool(cabecalho.get('completo')) and cabecalho['quantidade'] >= quantidade_minima
+    except (ValueError, OSError):
+        return False
+
+
+def caminho_estatisticas(arquivo):
+    """Arquivo .npz com as tabelas agregadas de um armazenamento de jogos."""
+    return os.path.splitext(arquivo)[0] + '_estatisticas.npz'
@@ -0,0 +1,218 @@
+import argparse
+import csv
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from gerador import DEZENAS_POR_JOGO, TOTAL_DEZENAS, gerar_jogos_seguros
+from combinatoria import para_mascaras
+from historico import carregar_historico
+from armazenamento import abrir_jogos, ler_dezenas
+
+# Bilhetes enviados a cada worker por tarefa (a saída é impressa a cada lote concluído)
+TAMANHO_LOTE = 1 << 18
+# Bilhetes comparados de uma vez contra todos os sorteios: a matriz (256, ~3.000)
+# de AND + popcount cabe no cache L2 e é reaproveitada entre iterações
+TAMANHO_SUBLOTE = 256
+
+# Faixas premiadas: quadra, quina e sena
+ACERTOS_PREMIADOS = (4, 5, 6)
+NOMES_FAIXAS = ('Quadras', 'Quinas', 'Senas')
+
+# popcount nativo (NumPy >= 2.0) ou tabela de 16 bits como alternativa
+_BITS_16 = np.array([bin(i).count('1') for i in range(1 << 16)], dtype=np.uint8)
+
+
+def contar_bits(valores, out=None):
+    """Quantidade de bits 1 de cada uint64 (uint8)."""
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(valores, out=out)
+    partes = _BITS_16[np.ascontiguousarray(valores).view(np.uint16)].reshape(valores.shape + (4,))
+    return np.sum(partes, axis=-1, dtype=np.uint8, out=out)
+
+
+def preparar_sorteios(historico):
+    """
+    Sorteios em ordem de concurso, como máscaras de 60 bits, com os rateios
+    pagos (centavos) em uma matriz (sorteios, 3): quadra, quina e sena.
+    """
+    ordem = np.argsort(historico['concurso'], kind='stable')
+    return {
+        'concurso': np.asarray(historico['concurso'])[ordem],
+        'data': np.asarray(historico['data'])[ordem],
+        'mascaras': para_mascaras(np.asarray(historico['bolas'])[ordem]),
+        'rateios': np.column_stack([np.asarray(historico[f'rateio_{k}'])[ordem] for k in ACERTOS_PREMIADOS]),
+    }
+
+
+def avaliar_bilhetes(bilhetes, mascaras_sorteios):
+    """
+    Compara cada bilhete (máscara) com todos os sorteios: acertos = popcount(bilhete & sorteio).
+    Retorna (por_sorteio, premiados): por_sorteio (sorteios, 3) conta quadras, quinas e
+    senas em cada concurso; premiados é o número de bilhetes com pelo menos uma quadra.
+    """
+    num_sorteios = len(mascaras_sorteios)
+    por_sorteio = np.zeros(num_sorteios * len(ACERTOS_PREMIADOS), dtype=np.int64)
+    premiados = 0
+
+    # Buffers reaproveitados: nenhum array temporário é alocado dentro do laço
+    conjuncao = np.empty((TAMANHO_SUBLOTE, num_sorteios), dtype=np.uint64)
+    acertos = np.empty((TAMANHO_SUBLOTE, num_sorteios), dtype=np.uint8)
+    premiado = np.empty((TAMANHO_SUBLOTE, num_sorteios), dtype=bool)
+
+    for inicio in range(0, len(bilhetes), TAMANHO_SUBLOTE):
+        bloco = bilhetes[inicio:inicio + TAMANHO_SUBLOTE]
+        n = len(bloco)
+        np.bitwise_and(bloco[:, None], mascaras_sorteios[None, :], out=conjuncao[:n])
+        contar_bits(conjuncao[:n], out=acertos[:n])
+        np.greater_equal(acertos[:n], ACERTOS_PREMIADOS[0], out=premiado[:n])
+
+        # Prêmios são raros (~1 em 1.000 comparações): só as posições premiadas são lidas
+        posicoes = np.flatnonzero(premiado[:n])
+        if len(posicoes) == 0:
+            continue
+        faixas = acertos[:n].ravel()[posicoes].astype(np.int64) - ACERTOS_PREMIADOS[0]
+        sorteios = posicoes % num_sorteios
+        por_sorteio += np.bincount(sorteios * len(ACERTOS_PREMIADOS) + faixas, minlength=len(por_sorteio))
+        premiados += len(np.unique(posicoes // num_sorteios))
+
+    return por_sorteio.reshape(num_sorteios, len(ACERTOS_PREMIADOS)), premiados
+
+
+def ler_bilhetes_texto(caminho):
+    """
+    Lê bilhetes de um arquivo de texto, um por linha, com 6 dezenas separadas por
+    espaço, vírgula, ponto e vírgula ou hífen. Linhas vazias e iniciadas por # são ignoradas.
+    """
+    jogos = []
+    with open(caminho, encoding='utf-8') as arquivo:
+        for numero_linha, linha in enumerate(arquivo, start=1):
+            linha = linha.strip()
+            if not linha or linha.startswith('#'):
+                continue
+            dezenas = [int(d) for d in re.findall(r'\d+', linha)]
+            if len(set(dezenas)) != DEZENAS_POR_JOGO or len(dezenas) != DEZENAS_POR_JOGO \
+                    or not all(1 <= d <= TOTAL_DEZENAS for d in dezenas):
+                raise ValueError(f"Linha {numero_linha} de {caminho}: esperadas 6 dezenas distintas de 1 a 60, encontrado '{linha}'.")
+            jogos.append(dezenas)
+    return para_mascaras(np.array(jogos, dtype=np.uint8).reshape(-1, DEZENAS_POR_JOGO))
+
+
+def avaliar_lote(inicio, qtd_bilhetes, mascaras_sorteios, arquivo=None, bilhetes=None):
+    """
+    Função worker: avalia um lote de bilhetes contra todos os sorteios.
+    Os bilhetes vêm da fatia [inicio, inicio + qtd_bilhetes) do armazenamento `arquivo`,
+    do array de máscaras `bilhetes` já recortado, ou (sem nenhum dos dois) do gerador.
+    Só os acumuladores (tamanho proporcional ao número de sorteios) voltam ao processo principal.
+    """
+    if bilhetes is None:
+        if arquivo:
+            dados, cabecalho = abrir_jogos(arquivo)
+            if cabecalho['formato'] == 'mascara':
+                bilhetes = np.asarray(dados[inicio:inicio + qtd_bilhetes])
+            else:
+                bilhetes = para_mascaras(ler_dezenas(dados, cabecalho, inicio, inicio + qtd_bilhetes))
+        else:
+            bilhetes = para_mascaras(gerar_jogos_seguros(qtd_bilhetes))
+
+    por_sorteio, premiados = avaliar_bilhetes(np.ascontiguousarray(bilhetes, dtype=np.uint64), mascaras_sorteios)
+    return {'bilhetes': len(bilhetes), 'por_sorteio': por_sorteio, 'premiados': premiados}
+
+
+def executar_backtest(sorteios, quantidade, arquivo=None, bilhetes=None, num_processos=None, tamanho_lote=TAMANHO_LOTE):
+    """
+    Avalia `quantidade` bilhetes em paralelo, lote a lote. É um gerador: a cada lote
+    concluído (na ordem) produz o total acumulado até ali, com as chaves
+    'bilhetes', 'por_sorteio' (sorteios, 3), 'premiados' e 'premio' (centavos).
+    """
+    num_processos = num_processos or os.cpu_count() or 4
+    inicios = list(range(0, quantidade, tamanho_lote))
+    tamanhos = [min(tamanho_lote, quantidade - i) for i in inicios]
+    fatias = [bilhetes[i:i + t] for i, t in zip(inicios, tamanhos)] if bilhetes is not None else [None] * len(inicios)
+
+    acumulado = {
+        'bilhetes': 0,
+        'por_sorteio': np.zeros((len(sorteios['mascaras']), len(ACERTOS_PREMIADOS)), dtype=np.int64),
+        'premiados': 0,
+    }
+    with ProcessPoolExecutor(max_workers=num_processos) as executor:
+        resultados = executor.map(avaliar_lote, inicios, tamanhos, [sorteios['mascaras']] * len(inicios),
+                                  [arquivo] * len(inicios), fatias)
+        for resultado in resultados:
+            acumulado['bilhetes'] += resultado['bilhetes']
+            acumulado['por_sorteio'] += resultado['por_sorteio']
+            acumulado['premiados'] += resultado['premiados']
+            acumulado['premio'] = int(np.sum(acumulado['por_sorteio'] * sorteios['rateios']))
+            yield acumulado
+
+
+def formatar_reais(centavos):
+    """171465023 -> 'R$ 1.714.650,23'."""
+    reais, resto = divmod(int(centavos), 100)
+    return f"R$ {reais:,}".replace(',', '.') + f",{resto:02d}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtest de bilhetes contra todos os sorteios históricos da Mega-Sena.")
+    fonte = parser.add_mutually_exclusive_group(required=True)
+    fonte.add_argument('--arquivo', help="Armazenamento de jogos (ex.: ./data/jogos_simulados.bin)")
+    fonte.add_argument('--texto', help="Arquivo de texto com um bilhete (6 dezenas) por linha")
+    fonte.add_argument('--gerar', type=int, help="Gera esta quantidade de bilhetes aleatórios")
+    parser.add_argument('--quantidade', type=int, help="Usa apenas os primeiros N bilhetes do armazenamento")
+    parser.add_argument('--processos', type=int, default=None)
+    parser.add_argument('--saida', help="CSV com quadras, quinas, senas e prêmio por concurso")
+    args = parser.parse_args()
+
+    sorteios = preparar_sorteios(carregar_historico())
+    bilhetes = None
+    if args.arquivo:
+        quantidade = abrir_jogos(args.arquivo)[1]['quantidade']
+        quantidade = min(quantidade, args.quantidade or quantidade)
+    elif args.texto:
+        bilhetes = ler_bilhetes_texto(args.texto)
+        quantidade = len(bilhetes)
+    else:
+        quantidade = args.gerar
+
+    print(f"Avaliando {quantidade:,} bilhetes contra {len(sorteios['mascaras']):,} sorteios...")
+    inicio = time.time()
+    acumulado = None
+    for acumulado in executar_backtest(sorteios, quantidade, args.arquivo, bilhetes, args.processos):
+        faixas = acumulado['por_sorteio'].sum(axis=0)
+        print(f"{acumulado['bilhetes']:,}/{quantidade:,} bilhetes | "
+              + ' | '.join(f"{nome}: {total:,}" for nome, total in zip(NOMES_FAIXAS, faixas))
+              + f" | Prêmio: {formatar_reais(acumulado['premio'])}")
+    if acumulado is None:
+        print("Nenhum bilhete para avaliar.")
+        return
+
+    tempo = time.time() - inicio
+    comparacoes = quantidade * len(sorteios['mascaras'])
+    por_sorteio = acumulado['por_sorteio']
+    print("-" * 30)
+    print(f"Concluído em {tempo:.2f} segundos ({comparacoes / max(tempo, 1e-9) / 1e6:,.0f} milhões de comparações/s).")
+    print(f"Bilhetes com ao menos uma quadra: {acumulado['premiados']:,}")
+    for i, nome in enumerate(NOMES_FAIXAS):
+        valor = int(np.sum(por_sorteio[:, i] * sorteios['rateios'][:, i]))
+        print(f"{nome}: {por_sorteio[:, i].sum():,} ({formatar_reais(valor)})")
+    # Em concursos que acumularam não houve rateio da sena: o acerto não tem valor histórico
+    senas_sem_rateio = int(por_sorteio[sorteios['rateios'][:, 2] == 0, 2].sum())
+    if senas_sem_rateio:
+        print(f"Senas em concursos acumulados (sem rateio pago): {senas_sem_rateio:,}")
+    print(f"Prêmio total (rateios pagos): {formatar_reais(acumulado['premio'])}")
+    print("-" * 30)
+
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8', newline='') as arquivo:
+            escritor = csv.writer(arquivo, delimiter=';')
+            escritor.writerow(['Concurso', 'Data do Sorteio', *NOMES_FAIXAS, 'Prêmio (centavos)'])
+            premios = np.sum(por_sorteio * sorteios['rateios'], axis=1)
+            for linha in zip(sorteios['concurso'].tolist(), sorteios['data'].astype(str), por_sorteio.tolist(), premios.tolist()):
+                concurso, data, faixas, premio = linha
+                escritor.writerow([concurso, data, *faixas, premio])
+        print(f"Resultados por concurso gravados em {args.saida}.")
+
+
+if __name__ == "__main__":
+    main()
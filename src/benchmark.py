@@ -0,0 +1,294 @@
+import argparse
+import json
+import multiprocessing
+import os
+import pickle
+import platform
+import random
+import secrets
+import subprocess
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+import numpy as np
+import gerador
+from gerador import gerar_jogos_seguros, gerar_jogos, MODO_RAPIDO, DEZENAS_POR_JOGO, TOTAL_DEZENAS
+from combinatoria import para_mascaras
+from simulacao_e_historico import simular_lote_estatisticas
+from instrumentacao import pico_rss_processo_mb
+
+# Semente fixa: os benchmarks medem sempre o mesmo trabalho
+SEMENTE = 2024
+
+# Pasta padrão dos resultados (um JSON por execução)
+PASTA_RESULTADOS = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'benchmarks')
+
+# Tamanhos usados na escala por N (--rapido usa só os dois primeiros)
+TAMANHOS = (10_000, 100_000, 1_000_000, 10_000_000)
+
+# Estratégias lentas só rodam até este N (acima disso o resultado é marcado como pulado)
+LIMITES = {
+    'sample_seguro': 100_000,
+    'sample_rapido': 1_000_000,
+    'argsort': 10_000_000,
+}
+
+# O truque do argsort gera uma matriz (n, 60) de float64: em fatias de 1M (480MB), como no graficos_artigo original
+CHUNK_ARGSORT = 1_000_000
+
+
+def _sample_seguro(n):
+    # main.gerar_jogo_mega_sena: um SystemRandom.sample por jogo
+    rng = secrets.SystemRandom()
+    return np.array([rng.sample(range(1, TOTAL_DEZENAS + 1), DEZENAS_POR_JOGO) for _ in range(n)], dtype=np.uint8)
+
+
+def _sample_rapido(n):
+    rng = random.Random(SEMENTE)
+    return np.array([rng.sample(range(1, TOTAL_DEZENAS + 1), DEZENAS_POR_JOGO) for _ in range(n)], dtype=np.uint8)
+
+
+def _argsort(n):
+    # Versão original do graficos_artigo: ruído (n, 60) + argsort, primeiras 6 colunas
+    rng = np.random.default_rng(SEMENTE)
+    jogos = np.empty((n, DEZENAS_POR_JOGO), dtype=np.uint8)
+    for inicio in range(0, n, CHUNK_ARGSORT):
+        fim = min(inicio + CHUNK_ARGSORT, n)
+        jogos[inicio:fim] = np.argsort(rng.random((fim - inicio, TOTAL_DEZENAS)), axis=1)[:, :DEZENAS_POR_JOGO] + 1
+    return jogos
+
+
+def _floyd_seguro(n):
+    return gerar_jogos_seguros(n)
+
+
+def _floyd_rapido(n):
+    return gerar_jogos(n, MODO_RAPIDO, SEMENTE)
+
+
+def _mascaras(n):
+    return para_mascaras(gerar_jogos(n, MODO_RAPIDO, SEMENTE))
+
+
+ESTRATEGIAS = {
+    'sample_seguro': _sample_seguro,
+    'sample_rapido': _sample_rapido,
+    'argsort': _argsort,
+    'floyd_seguro': _floyd_seguro,
+    'floyd_rapido': _floyd_rapido,
+    'mascaras': _mascaras,
+}
+
+
+def _medir_estrategia(estrategia, n, repeticoes):
+    """Roda em um processo novo: mede o melhor tempo entre as repetições e o pico de memória."""
+    funcao = ESTRATEGIAS[estrategia]
+    rss_inicial = pico_rss_processo_mb()
+    tempos = []
+    for _ in range(repeticoes):
+        # O modo rápido guarda os últimos blocos gerados: cada repetição começa do zero
+        gerador._jogos_do_fluxo.cache_clear()
+        inicio = time.perf_counter()
+        funcao(n)
+        tempos.append(time.perf_counter() - inicio)
+    return {'segundos': min(tempos), 'tempos': tempos, 'pico_rss_mb': pico_rss_processo_mb(), 'rss_inicial_mb': rss_inicial}
+
+
+def _em_processo_novo(funcao, *args):
+    # 'spawn' garante um interpretador limpo: o pico de RSS é só da medição
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as executor:
+        return executor.submit(funcao, *args).result()
+
+
+def medir_estrategias(tamanhos, repeticoes, estrategias=ESTRATEGIAS):
+    """Throughput de cada estratégia de geração para cada N, com o pico de RSS."""
+    resultados = []
+    for estrategia in estrategias:
+        for n in tamanhos:
+            registro = {'grupo': 'estrategias', 'estrategia': estrategia, 'n': n}
+            if n > LIMITES.get(estrategia, n):
+                registro['pulado'] = f'acima do limite de {LIMITES[estrategia]:,} jogos'
+            else:
+                registro.update(_em_processo_novo(_medir_estrategia, estrategia, n, repeticoes))
+                registro['jogos_por_segundo'] = n / registro['segundos']
+            resultados.append(registro)
+            _imprimir(registro)
+    return resultados
+
+
+def _aquecer(_):
+    # Garante que cada worker já existe antes da medição (o pool cria processos sob demanda)
+    time.sleep(0.05)
+    return os.getpid()
+
+
+def _lote_workers(inicio, qtd):
+    gerador._jogos_do_fluxo.cache_clear()
+    comeco = time.perf_counter()
+    resultado = simular_lote_estatisticas(inicio, qtd, modo=MODO_RAPIDO, semente=SEMENTE)
+    return {'segundos': time.perf_counter() - comeco, 'bytes': len(pickle.dumps(resultado)), 'pico_rss_mb': pico_rss_processo_mb()}
+
+
+def medir_workers(n, lista_workers, repeticoes):
+    """
+    Escala com o número de workers, usando o mesmo worker do simulacao_e_historico
+    (modo rápido, sem armazenamento). 'segundos' vai da submissão dos lotes ao retorno
+    dos acumuladores; a criação do pool fica em 'segundos_inicializacao'.
+    """
+    resultados = []
+    for workers in lista_workers:
+        tamanho, resto = divmod(n, workers)
+        lotes = [tamanho] * workers
+        lotes[-1] += resto
+        inicios = [sum(lotes[:i]) for i in range(workers)]
+        tempos, inicializacoes, detalhes = [], [], None
+        for _ in range(repeticoes):
+            comeco = time.perf_counter()
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                list(executor.map(_aquecer, range(workers)))
+                pronto = time.perf_counter()
+                detalhes = list(executor.map(_lote_workers, inicios, lotes))
+                tempos.append(time.perf_counter() - pronto)
+            inicializacoes.append(pronto - comeco)
+        registro = {
+            'grupo': 'workers', 'n': n, 'workers': workers, 'segundos': min(tempos), 'tempos': tempos,
+            'jogos_por_segundo': n / min(tempos),
+            'segundos_inicializacao': min(inicializacoes),
+            'segundos_por_worker': [d['segundos'] for d in detalhes],
+            'bytes_retornados': sum(d['bytes'] for d in detalhes),
+            'pico_rss_mb': max((d['pico_rss_mb'] or 0) for d in detalhes),
+        }
+        resultados.append(registro)
+        _imprimir(registro)
+    return resultados
+
+
+def _devolver(formato, n):
+    gerador._jogos_do_fluxo.cache_clear()
+    jogos = gerar_jogos(n, MODO_RAPIDO, SEMENTE)
+    if formato == 'listas':
+        return jogos.tolist()
+    if formato == 'array':
+        return jogos
+    return {'contagens': np.bincount(jogos.ravel(), minlength=TOTAL_DEZENAS + 1),
+            'somas': np.bincount(jogos.sum(axis=1, dtype=np.int16))}
+
+
+def medir_ipc(n, repeticoes):
+    """
+    Custo de trazer os jogos de um worker para o processo principal:
+    listas Python + np.array (pipeline original), array NumPy ou só histogramas.
+    """
+    resultados = []
+    for formato in ('listas', 'array', 'histogramas'):
+        tempos = []
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            executor.submit(int).result()  # Aquece o pool: mede só a transferência
+            for _ in range(repeticoes):
+                comeco = time.perf_counter()
+                resultado = executor.submit(_devolver, formato, n).result()
+                if formato == 'listas':
+                    lista = []
+                    lista.extend(resultado)
+                    np.array(lista)
+                tempos.append(time.perf_counter() - comeco)
+        registro = {'grupo': 'ipc', 'formato': formato, 'n': n, 'segundos': min(tempos), 'tempos': tempos,
+                    'bytes': len(pickle.dumps(resultado)), 'jogos_por_segundo': n / min(tempos)}
+        resultados.append(registro)
+        _imprimir(registro)
+    return resultados
+
+
+def _imprimir(registro):
+    nome = registro.get('estrategia') or registro.get('formato') or f"{registro.get('workers')} workers"
+    if 'pulado' in registro:
+        print(f"[{registro['grupo']}] {nome:>14} N={registro['n']:>11,}: pulado ({registro['pulado']})")
+        return
+    rss = f", pico {registro['pico_rss_mb']:.0f} MB" if registro.get('pico_rss_mb') else ''
+    print(f"[{registro['grupo']}] {nome:>14} N={registro['n']:>11,}: {registro['segundos']:8.3f} s"
+          f" ({registro['jogos_por_segundo'] / 1e6:8.2f} M jogos/s{rss})")
+
+
+def _chave(registro):
+    return (registro['grupo'], registro.get('estrategia') or registro.get('formato') or registro.get('workers'), registro['n'])
+
+
+def comparar(resultados, arquivo_anterior):
+    """Imprime a variação de throughput em relação a um JSON de uma execução anterior."""
+    with open(arquivo_anterior, encoding='utf-8') as arquivo:
+        anteriores = {_chave(r): r for r in json.load(arquivo)['resultados'] if 'jogos_por_segundo' in r}
+    print(f"--- Comparação com {arquivo_anterior} ---")
+    for registro in resultados:
+        anterior = anteriores.get(_chave(registro))
+        if anterior is None or 'jogos_por_segundo' not in registro:
+            continue
+        razao = registro['jogos_por_segundo'] / anterior['jogos_por_segundo']
+        alerta = '  <-- regressão' if razao < 0.9 else ''
+        grupo, nome, n = _chave(registro)
+        print(f"[{grupo}] {nome!s:>14} N={n:>11,}: {razao:6.2f}x{alerta}")
+
+
+def _versao_git():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks de geração de jogos e de escala da simulação.")
+    parser.add_argument('--grupos', default='estrategias,escala,workers,ipc',
+                        help="Grupos a medir, separados por vírgula: estrategias, escala, workers, ipc")
+    parser.add_argument('--rapido', action='store_true', help="Tamanhos menores, para uma checagem rápida")
+    parser.add_argument('--repeticoes', type=int, default=3)
+    parser.add_argument('--workers', help="Quantidades de workers (ex.: 1,2,4,8). Padrão: potências de 2 até os núcleos")
+    parser.add_argument('--saida', help="Arquivo JSON de resultados (padrão: data/benchmarks/benchmark_<data>.json)")
+    parser.add_argument('--comparar', help="JSON de uma execução anterior para detectar regressões")
+    args = parser.parse_args()
+
+    grupos = args.grupos.split(',')
+    tamanhos = TAMANHOS[:2] if args.rapido else TAMANHOS
+    n_fixo = tamanhos[-1] if args.rapido else 1_000_000
+    nucleos = os.cpu_count() or 1
+    if args.workers:
+        lista_workers = [int(w) for w in args.workers.split(',')]
+    else:
+        lista_workers = sorted({2 ** i for i in range(nucleos.bit_length()) if 2 ** i <= nucleos} | {nucleos})
+
+    resultados = []
+    if 'estrategias' in grupos:
+        # Todas as estratégias no mesmo N: a comparação direta
+        resultados += medir_estrategias([n_fixo], args.repeticoes)
+    if 'escala' in grupos:
+        # Throughput contra TOTAL_JOGOS, só para os geradores em lote
+        resultados += medir_estrategias([n for n in tamanhos if n != n_fixo], args.repeticoes,
+                                        ('floyd_seguro', 'floyd_rapido', 'mascaras', 'argsort'))
+    if 'workers' in grupos:
+        resultados += medir_workers(tamanhos[-1], lista_workers, args.repeticoes)
+    if 'ipc' in grupos:
+        resultados += medir_ipc(n_fixo, args.repeticoes)
+
+    relatorio = {
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'versao': _versao_git(),
+        'maquina': {
+            'nucleos': nucleos,
+            'plataforma': platform.platform(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+        },
+        'resultados': resultados,
+    }
+    saida = args.saida or os.path.join(PASTA_RESULTADOS, f"benchmark_{datetime.now():%Y%m%d_%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(saida)), exist_ok=True)
+    with open(saida, 'w', encoding='utf-8') as arquivo:
+        json.dump(relatorio, arquivo, indent=2, ensure_ascii=False)
+    print(f"Resultados gravados em {saida}.")
+
+    if args.comparar:
+        comparar(resultados, args.comparar)
+
+
+if __name__ == "__main__":
+    main()
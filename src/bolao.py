@@ -0,0 +1,241 @@
+import argparse
+import os
+import time
+import numpy as np
+from gerador import gerar_jogos, nova_semente, MODO_SEGURO, MODO_RAPIDO
+from combinatoria import para_mascaras, desranquear, TOTAL_COMBINACOES
+from armazenamento import criar_armazenamento, abrir_jogos, gravar_dezenas, marcar_completo
+from backtest import contar_bits, TAMANHO_SUBLOTE
+
+# Candidatos sorteados por vez: filtros e deduplicação trabalham sobre o lote inteiro
+TAMANHO_LOTE = 1 << 16
+
+# Combinações enumeradas por vez no cálculo da taxa exata (ver taxa_exata)
+TAMANHO_CHUNK_EXATO = 1 << 20
+
+# Lotes seguidos sem nenhum jogo aceito antes de desistir (filtros restritivos demais ou espaço esgotado)
+LOTES_SEM_PROGRESSO = 64
+
+# Filtros, na ordem em que são aplicados (os mais baratos primeiro):
+# - 'soma': (mínimo, máximo) da soma das dezenas, inclusivos
+# - 'pares': quantidades de dezenas pares permitidas (ex.: {2, 3, 4})
+# - 'consecutivos': maior sequência de dezenas consecutivas permitida (ex.: 2 aceita 07-08, não 07-08-09)
+# - 'acertos_historico': máximo de dezenas em comum com qualquer sorteio do histórico
+FILTROS = ('soma', 'pares', 'consecutivos', 'acertos_historico')
+
+
+def maior_sequencia(jogos_ordenados):
+    """Maior sequência de dezenas consecutivas de cada jogo (jogos com as dezenas em ordem crescente)."""
+    consecutivas = np.diff(jogos_ordenados.astype(np.int16), axis=1) == 1
+    atual = np.zeros(len(jogos_ordenados), dtype=np.int8)
+    maior = np.zeros(len(jogos_ordenados), dtype=np.int8)
+    for coluna in consecutivas.T:
+        atual = (atual + 1) * coluna
+        np.maximum(maior, atual, out=maior)
+    return maior + 1
+
+
+def maximo_acertos(mascaras, mascaras_historico):
+    """Maior número de dezenas em comum de cada jogo com algum sorteio do histórico."""
+    maximo = np.zeros(len(mascaras), dtype=np.uint8)
+    for inicio in range(0, len(mascaras), TAMANHO_SUBLOTE):
+        bloco = mascaras[inicio:inicio + TAMANHO_SUBLOTE]
+        maximo[inicio:inicio + len(bloco)] = contar_bits(bloco[:, None] & mascaras_historico[None, :]).max(axis=1)
+    return maximo
+
+
+def aprovados(jogos_ordenados, mascaras, filtros, mascaras_historico=None):
+    """
+    Aplica os filtros ativos em ordem, vetorizados sobre o lote. Cada filtro só avalia
+    os jogos que passaram pelos anteriores. Retorna (índices aprovados, rejeitados por filtro).
+    """
+    indices = np.arange(len(jogos_ordenados))
+    rejeitados = {}
+    for nome in FILTROS:
+        limite = filtros.get(nome)
+        if limite is None or len(indices) == 0:
+            continue
+        jogos = jogos_ordenados[indices]
+        if nome == 'soma':
+            somas = jogos.sum(axis=1, dtype=np.int16)
+            passa = (somas >= limite[0]) & (somas <= limite[1])
+        elif nome == 'pares':
+            passa = np.isin(np.count_nonzero(jogos % 2 == 0, axis=1), list(limite))
+        elif nome == 'consecutivos':
+            passa = maior_sequencia(jogos) <= limite
+        else:
+            passa = maximo_acertos(mascaras[indices], mascaras_historico) <= limite
+        rejeitados[nome] = int(len(indices) - np.count_nonzero(passa))
+        indices = indices[passa]
+    return indices, rejeitados
+
+
+def gerar_bolao(quantidade, filtros=None, mascaras_historico=None, modo=MODO_SEGURO, semente=None,
+                tamanho_lote=TAMANHO_LOTE):
+    """
+    Gera `quantidade` jogos distintos dois a dois que atendem os filtros. É um gerador:
+    a cada lote produz (jogos, estatisticas), com os jogos novos (n, 6) uint8 em ordem
+    crescente e as contagens acumuladas: 'candidatos', 'aceitos', 'duplicados' e
+    'rejeitados' (por filtro).
+
+    Candidatos, filtros e deduplicação trabalham sobre o lote inteiro, sem laço por bilhete.
+    A deduplicação compara máscaras de 60 bits: np.unique dentro do lote e busca binária
+    no array ordenado das máscaras já aceitas. No modo rápido, a mesma semente produz
+    o mesmo bolão.
+    """
+    filtros = filtros or {}
+    if filtros.get('acertos_historico') is not None and mascaras_historico is None:
+        raise ValueError("O filtro 'acertos_historico' precisa das máscaras do histórico.")
+    if modo == MODO_RAPIDO and semente is None:
+        raise ValueError("O modo rápido precisa de uma semente (use nova_semente()).")
+
+    vistos = np.empty(0, dtype=np.uint64)
+    estatisticas = {'candidatos': 0, 'aceitos': 0, 'duplicados': 0, 'rejeitados': dict.fromkeys(FILTROS, 0)}
+    posicao = 0
+    sem_progresso = 0
+
+    while estatisticas['aceitos'] < quantidade:
+        jogos = np.sort(gerar_jogos(tamanho_lote, modo, semente, posicao), axis=1)
+        posicao += tamanho_lote
+        mascaras = para_mascaras(jogos)
+
+        indices, rejeitados = aprovados(jogos, mascaras, filtros, mascaras_historico)
+        for nome, total in rejeitados.items():
+            estatisticas['rejeitados'][nome] += total
+
+        # Primeira ocorrência de cada máscara no lote, na ordem de geração
+        _, primeiros = np.unique(mascaras[indices], return_index=True)
+        unicos = indices[np.sort(primeiros)]
+        candidatas = mascaras[unicos]
+        lugar = np.searchsorted(vistos, candidatas)
+        repetidas = np.zeros(len(candidatas), dtype=bool)
+        dentro = lugar < len(vistos)
+        repetidas[dentro] = vistos[lugar[dentro]] == candidatas[dentro]
+        novos = unicos[~repetidas][:quantidade - estatisticas['aceitos']]
+
+        estatisticas['candidatos'] += tamanho_lote
+        estatisticas['duplicados'] += len(indices) - len(unicos) + int(np.count_nonzero(repetidas))
+        estatisticas['aceitos'] += len(novos)
+
+        if len(novos) == 0:
+            sem_progresso += 1
+            if sem_progresso >= LOTES_SEM_PROGRESSO:
+                raise ValueError(f"Nenhum jogo novo em {LOTES_SEM_PROGRESSO} lotes seguidos: "
+                                 f"os filtros são restritivos demais para {quantidade:,} jogos distintos.")
+            continue
+        sem_progresso = 0
+
+        # Intercala as novas máscaras no array ordenado (O(n), sem reordenar tudo)
+        ordenadas = np.sort(mascaras[novos])
+        vistos = np.insert(vistos, np.searchsorted(vistos, ordenadas), ordenadas)
+        yield jogos[novos], estatisticas
+
+
+def taxa_exata(filtros, tamanho_chunk=TAMANHO_CHUNK_EXATO):
+    """
+    Fração exata das C(60, 6) combinações que passam pelos filtros de soma, pares e
+    consecutivos, enumerando todas em fatias (desranquear já devolve as dezenas em ordem).
+    O filtro contra o histórico é ignorado aqui: depende dos sorteios, não só do jogo.
+    """
+    estaticos = {nome: limite for nome, limite in filtros.items() if nome != 'acertos_historico'}
+    aprovadas = 0
+    for inicio in range(0, TOTAL_COMBINACOES, tamanho_chunk):
+        jogos = desranquear(np.arange(inicio, min(inicio + tamanho_chunk, TOTAL_COMBINACOES)))
+        aprovadas += len(aprovados(jogos, None, estaticos)[0])
+    return aprovadas / TOTAL_COMBINACOES
+
+
+def salvar_bolao(caminho, lotes, quantidade):
+    """
+    Grava os lotes de gerar_bolao à medida que chegam: no armazenamento binário de jogos
+    se o caminho termina em .bin (lido por backtest --arquivo), ou em texto, um jogo por linha.
+    A gravação vai para um arquivo temporário que só substitui `caminho` quando todos os
+    jogos foram gerados: se gerar_bolao falhar no meio, nenhum arquivo pela metade fica no lugar.
+    Retorna as estatísticas finais.
+    """
+    estatisticas = None
+    temporario = caminho + '.tmp'
+    try:
+        if caminho.endswith('.bin'):
+            criar_armazenamento(temporario, quantidade, 'dezenas', gerador='bolao')
+            dados, cabecalho = abrir_jogos(temporario, modo='r+')
+            gravados = 0
+            for jogos, estatisticas in lotes:
+                gravar_dezenas(dados, cabecalho, gravados, jogos)
+                gravados += len(jogos)
+            dados.flush()
+            del dados
+            marcar_completo(temporario)
+        else:
+            with open(temporario, 'w', encoding='utf-8') as arquivo:
+                for jogos, estatisticas in lotes:
+                    np.savetxt(arquivo, jogos, fmt='%02d', delimiter=' ')
+    except BaseException:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+    os.replace(temporario, caminho)
+    return estatisticas
+
+
+def _inteiros(texto):
+    return [int(v) for v in texto.split(',') if v.strip()]
+
+
+def main():
+    from historico import carregar_historico
+
+    parser = argparse.ArgumentParser(description="Gera um bolão de jogos distintos da Mega-Sena, com filtros.")
+    parser.add_argument('quantidade', type=int, help="Quantidade de jogos distintos")
+    parser.add_argument('--saida', default='bolao.txt', help="Arquivo de saída: texto (um jogo por linha) ou .bin")
+    parser.add_argument('--soma', help="Faixa da soma, inclusiva (ex.: 150,220)")
+    parser.add_argument('--pares', help="Quantidades de dezenas pares permitidas (ex.: 2,3,4)")
+    parser.add_argument('--consecutivos', type=int, help="Maior sequência de dezenas consecutivas permitida")
+    parser.add_argument('--acertos-historico', type=int, help="Máximo de dezenas em comum com qualquer sorteio já realizado")
+    parser.add_argument('--rapido', action='store_true', help="PCG64 semeado (reprodutível) em vez do CSPRNG do sistema")
+    parser.add_argument('--semente', type=int, default=None)
+    parser.add_argument('--taxa-exata', action='store_true', help="Calcula a taxa exata dos filtros sobre as C(60, 6) combinações")
+    args = parser.parse_args()
+
+    filtros = {}
+    if args.soma:
+        minimo, maximo = _inteiros(args.soma)
+        filtros['soma'] = (minimo, maximo)
+    if args.pares:
+        filtros['pares'] = set(_inteiros(args.pares))
+    if args.consecutivos is not None:
+        filtros['consecutivos'] = args.consecutivos
+    mascaras_historico = None
+    if args.acertos_historico is not None:
+        filtros['acertos_historico'] = args.acertos_historico
+        mascaras_historico = para_mascaras(np.asarray(carregar_historico()['bolas']))
+
+    modo, semente = MODO_SEGURO, None
+    if args.rapido:
+        modo, semente = MODO_RAPIDO, args.semente if args.semente is not None else nova_semente()
+        print(f"Semente: {semente}")
+
+    inicio = time.time()
+    lotes = gerar_bolao(args.quantidade, filtros, mascaras_historico, modo, semente)
+    try:
+        estatisticas = salvar_bolao(args.saida, lotes, args.quantidade)
+    except ValueError as e:
+        # Filtros restritivos demais: nada é gravado em --saida
+        raise SystemExit(str(e)) from None
+    tempo = time.time() - inicio
+
+    print(f"{args.quantidade:,} jogos gravados em {args.saida} em {tempo:.2f} segundos.")
+    if estatisticas:
+        candidatos = estatisticas['candidatos']
+        print(f"Candidatos: {candidatos:,} | Aceitos: {estatisticas['aceitos']:,} | Duplicados: {estatisticas['duplicados']:,}")
+        for nome, total in estatisticas['rejeitados'].items():
+            if nome in filtros:
+                print(f"Rejeitados por '{nome}': {total:,} ({total / candidatos:.4%})")
+        aprovados_filtros = candidatos - sum(estatisticas['rejeitados'].values())
+        print(f"Taxa de aprovação dos filtros: {aprovados_filtros / candidatos:.4%} ({aprovados_filtros:,}/{candidatos:,})")
+    if args.taxa_exata and filtros:
+        print(f"Taxa exata (soma, pares e consecutivos sobre as C(60, 6) combinações): {taxa_exata(filtros):.6%}")
+
+
+if __name__ == "__main__":
+    main()
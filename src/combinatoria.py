@@ -0,0 +1,120 @@
+from math import comb
+import numpy as np
+from gerador import DEZENAS_POR_JOGO, TOTAL_DEZENAS, SOMA_MAXIMA
+
+# Total de combinações da Mega-Sena: C(60, 6) = 50.063.860
+TOTAL_COMBINACOES = comb(TOTAL_DEZENAS, DEZENAS_POR_JOGO)
+
+DEZENAS = np.arange(1, TOTAL_DEZENAS + 1)
+
+# Tabela de binomiais C(n, k) para n = 0..60 e k = 0..6 (base do sistema combinatório)
+BINOMIAIS = np.array([[comb(n, k) for k in range(DEZENAS_POR_JOGO + 1)]
+                      for n in range(TOTAL_DEZENAS + 1)], dtype=np.int64)
+
+
+def distribuicao_exata(atributo):
+    """
+    Conta, sobre todas as C(60, 6) combinações, quantos jogos têm cada valor
+    total de um atributo aditivo das dezenas.
+
+    `atributo` é um vetor de 60 inteiros não negativos (o valor de cada dezena 1-60).
+    Retorna um array em que o índice é o total do atributo no jogo e o valor é a
+    quantidade exata de jogos. Programação dinâmica sobre
+    (dezenas já consideradas, dezenas escolhidas, total), sem amostragem.
+    """
+    atributo = np.asarray(atributo, dtype=np.int64)
+    maximo = int(np.sort(atributo)[-DEZENAS_POR_JOGO:].sum())
+
+    # formas[k, s] = jogos parciais com k dezenas e total s
+    formas = np.zeros((DEZENAS_POR_JOGO + 1, maximo + 1), dtype=np.int64)
+    formas[0, 0] = 1
+
+    for valor in atributo:
+        # Percorre k de trás para frente para usar cada dezena no máximo uma vez
+        for k in range(DEZENAS_POR_JOGO, 0, -1):
+            if valor == 0:
+                formas[k] += formas[k - 1]
+            else:
+                formas[k, valor:] += formas[k - 1, :-valor]
+
+    return formas[DEZENAS_POR_JOGO]
+
+
+def distribuicao_somas():
+    """Quantidade exata de jogos para cada soma (índice 0 a 345)."""
+    return distribuicao_exata(DEZENAS)
+
+
+def distribuicao_pares():
+    """Quantidade exata de jogos com 0 a 6 dezenas pares."""
+    return distribuicao_exata(DEZENAS % 2 == 0)
+
+
+def distribuicao_baixas():
+    """Quantidade exata de jogos com 0 a 6 dezenas baixas (1-30)."""
+    return distribuicao_exata(DEZENAS <= TOTAL_DEZENAS // 2)
+
+
+def contagem_por_dezena():
+    """Em quantos jogos cada dezena aparece: C(59, 5) para todas as 60."""
+    return np.full(TOTAL_DEZENAS, comb(TOTAL_DEZENAS - 1, DEZENAS_POR_JOGO - 1), dtype=np.int64)
+
+
+def probabilidades_somas():
+    """Probabilidade exata de cada soma, com comprimento SOMA_MAXIMA + 1."""
+    return distribuicao_somas() / TOTAL_COMBINACOES
+
+
+def momentos_somas():
+    """Média e desvio padrão exatos da soma das 6 dezenas."""
+    p = probabilidades_somas()
+    somas = np.arange(SOMA_MAXIMA + 1)
+    media = float(np.sum(p * somas))
+    desvio = float(np.sqrt(np.sum(p * (somas - media) ** 2)))
+    return media, desvio
+
+
+def ranquear(jogos):
+    """
+    Converte jogos (n, 6) com dezenas 1-60, em qualquer ordem, no índice da
+    combinação no sistema combinatório: um inteiro em [0, C(60, 6)) por jogo (uint32).
+    """
+    jogos = np.sort(np.asarray(jogos, dtype=np.int64).reshape(-1, DEZENAS_POR_JOGO), axis=1) - 1
+
+    indices = np.zeros(len(jogos), dtype=np.int64)
+    for i in range(DEZENAS_POR_JOGO):
+        # A i-ésima menor dezena c contribui com C(c, i + 1)
+        indices += BINOMIAIS[jogos[:, i], i + 1]
+
+    return indices.astype(np.uint32)
+
+
+def desranquear(indices):
+    """Inverso de ranquear: índices -> jogos (n, 6) uint8 ordenados, dezenas 1-60."""
+    resto = np.asarray(indices, dtype=np.int64).ravel().copy()
+    jogos = np.empty((len(resto), DEZENAS_POR_JOGO), dtype=np.uint8)
+
+    for i in range(DEZENAS_POR_JOGO, 0, -1):
+        # Maior c tal que C(c, i) <= resto (a coluna da tabela é crescente em c)
+        coluna = BINOMIAIS[:, i]
+        c = np.searchsorted(coluna, resto, side='right') - 1
+        resto -= coluna[c]
+        jogos[:, i - 1] = c + 1
+
+    return jogos
+
+
+def para_mascaras(jogos):
+    """Converte jogos (n, 6) com dezenas 1-60 em máscaras de 60 bits (uint64, bit d-1 = dezena d)."""
+    jogos = np.asarray(jogos).reshape(-1, DEZENAS_POR_JOGO).astype(np.uint64)
+    bits = np.left_shift(np.uint64(1), jogos - np.uint64(1))
+    return np.bitwise_or.reduce(bits, axis=1)
+
+
+def de_mascaras(mascaras):
+    """Inverso de para_mascaras: máscaras -> jogos (n, 6) uint8 ordenados, dezenas 1-60."""
+    mascaras = np.ascontiguousarray(mascaras, dtype='<u8').ravel()
+    bits = np.unpackbits(mascaras.view(np.uint8).reshape(-1, 8), axis=1, bitorder='little')
+    # nonzero percorre linha a linha: as 6 posições de cada jogo saem juntas e em ordem
+    _, posicoes = np.nonzero(bits)
+    return (posicoes.reshape(-1, DEZENAS_POR_JOGO) + 1).astype(np.uint8)
@@ -0,0 +1,233 @@
+import argparse
+from itertools import combinations
+import numpy as np
+from gerador import TOTAL_DEZENAS
+from historico import carregar_historico
+
+# Colunas da matriz processadas por vez (limita a memória com trincas: 34.220 colunas)
+COLUNAS_POR_CHUNK = 4096
+
+
+def matriz_ocorrencias(bolas):
+    """Matriz (sorteios, 60) booleana: [i, d-1] é True se a dezena d saiu no sorteio i."""
+    bolas = np.asarray(bolas, dtype=np.int64)
+    ocorrencias = np.zeros((len(bolas), TOTAL_DEZENAS), dtype=bool)
+    ocorrencias[np.arange(len(bolas))[:, None], bolas - 1] = True
+    return ocorrencias
+
+
+def todas_combinacoes(tamanho):
+    """Todas as combinações de `tamanho` dezenas (1, 2 ou 3): array (K, tamanho) com dezenas 1-60."""
+    return np.array(list(combinations(range(1, TOTAL_DEZENAS + 1), tamanho)), dtype=np.int64).reshape(-1, tamanho)
+
+
+def _codificar_colunas(matriz):
+    """
+    Run-length encoding de cada coluna de uma matriz booleana (sorteios, K), vetorizado.
+    Retorna (coluna, valor, inicio, comprimento) de cada sequência, em ordem de coluna e linha.
+    """
+    linhas, colunas = matriz.shape
+    transposta = np.ascontiguousarray(matriz.T)
+
+    # Uma sequência começa na primeira linha de cada coluna ou quando o valor muda
+    comeca = np.ones((colunas, linhas), dtype=bool)
+    comeca[:, 1:] = transposta[:, 1:] != transposta[:, :-1]
+    posicoes = np.flatnonzero(comeca)
+
+    coluna = posicoes // linhas
+    inicio = posicoes % linhas
+    comprimento = np.diff(np.append(posicoes, colunas * linhas))
+    valor = transposta.ravel()[posicoes]
+    return coluna, valor, inicio, comprimento
+
+
+def preparar_consultas(historico, tamanho=1, combinacoes=None):
+    """
+    Monta o motor de consultas: as sequências (RLE) de presença/ausência de cada
+    dezena, par ou trinca ao longo do histórico, em ordem de concurso.
+
+    `combinacoes` restringe a análise a uma lista de combinações (K, tamanho);
+    por padrão usa todas. O resultado é reaproveitado por todas as consultas abaixo.
+    """
+    ordem = np.argsort(historico['concurso'], kind='stable')
+    concursos = np.asarray(historico['concurso'])[ordem].astype(np.int64)
+    datas = np.asarray(historico['data'])[ordem]
+    ocorrencias = matriz_ocorrencias(np.asarray(historico['bolas'])[ordem])
+
+    if combinacoes is None:
+        combinacoes = todas_combinacoes(tamanho)
+    combinacoes = np.asarray(combinacoes, dtype=np.int64).reshape(len(combinacoes), -1)
+
+    partes = []
+    for inicio_chunk in range(0, len(combinacoes), COLUNAS_POR_CHUNK):
+        bloco = combinacoes[inicio_chunk:inicio_chunk + COLUNAS_POR_CHUNK] - 1
+        # A combinação "saiu" quando todas as suas dezenas saíram no mesmo sorteio
+        presente = np.logical_and.reduce(ocorrencias[:, bloco], axis=2)
+        coluna, valor, inicio, comprimento = _codificar_colunas(presente)
+        partes.append((coluna + inicio_chunk, valor, inicio, comprimento))
+
+    coluna, valor, inicio, comprimento = (np.concatenate(p) for p in zip(*partes))
+    return {
+        'combinacoes': combinacoes,
+        'concursos': concursos,
+        'datas': datas,
+        'coluna': coluna,
+        'valor': valor,
+        'inicio': inicio,
+        'comprimento': comprimento,
+    }
+
+
+def hiatos(motor, minimo=0, unidade='concursos', incluir_atual=False):
+    """
+    Todos os hiatos maiores que `minimo`, para todas as combinações do motor.
+
+    Um hiato é o intervalo entre duas aparições seguidas da combinação (inclusive em
+    concursos consecutivos, quando não há ausência entre elas). É medido como em
+    indice_dezenas: 'concursos' é a diferença entre os números do concurso da última
+    aparição e do reaparecimento (aparições seguidas = 1, ou seja, ausências + 1) e
+    'dias' a diferença entre as datas. O hiato atual (incluído só com incluir_atual=True)
+    vai até o último sorteio. `unidade` ('concursos' ou 'dias') define a qual medida
+    o `minimo` se aplica.
+    """
+    total = len(motor['concursos'])
+    valor, coluna = motor['valor'], motor['coluna']
+    inicio, comprimento = motor['inicio'], motor['comprimento']
+    fim = inicio + comprimento
+
+    # Sequências de ausências: o hiato vai da aparição anterior (inicio - 1) até o reaparecimento
+    # (fim). Ausências antes da primeira aparição não têm data inicial: ficam de fora.
+    selecao = ~valor & (inicio > 0)
+    if not incluir_atual:
+        selecao &= fim < total
+    de_ausentes, coluna_ausentes = inicio[selecao] - 1, coluna[selecao]
+    atual_ausentes = fim[selecao] >= total
+    ate_ausentes = np.minimum(fim[selecao], total - 1)
+
+    # Sequências de presenças de comprimento L: L - 1 hiatos de um concurso para o seguinte
+    presentes = valor & (comprimento > 1)
+    repeticoes = comprimento[presentes] - 1
+    deslocamento = np.arange(repeticoes.sum()) - np.repeat(np.cumsum(repeticoes) - repeticoes, repeticoes)
+    de_presentes = np.repeat(inicio[presentes], repeticoes) + deslocamento
+
+    de = np.concatenate((de_ausentes, de_presentes))
+    ate = np.concatenate((ate_ausentes, de_presentes + 1))
+    coluna = np.concatenate((coluna_ausentes, np.repeat(coluna[presentes], repeticoes)))
+    atual = np.concatenate((atual_ausentes, np.zeros(len(de_presentes), dtype=bool)))
+    # Em ordem de combinação e de concurso, como as sequências do motor
+    ordem = np.lexsort((de, coluna))
+    de, ate, coluna, atual = de[ordem], ate[ordem], coluna[ordem], atual[ordem]
+
+    dias = (motor['datas'][ate] - motor['datas'][de]).astype(np.int64)
+    concursos = motor['concursos'][ate] - motor['concursos'][de]
+
+    medida = dias if unidade == 'dias' else concursos
+    filtro = medida > minimo
+    return {
+        'coluna': coluna[filtro],
+        'combinacao': motor['combinacoes'][coluna[filtro]],
+        'ultima_aparicao': motor['concursos'][de[filtro]],
+        'reaparecimento': np.where(atual[filtro], -1, motor['concursos'][ate[filtro]]),
+        'concursos': concursos[filtro],
+        'dias': dias[filtro],
+        'atual': atual[filtro],
+    }
+
+
+def percentis_hiatos(motor, percentis=(50, 90, 99), unidade='concursos'):
+    """
+    Percentis dos hiatos fechados de cada combinação (medidos como em hiatos), calculados
+    de uma vez para todos os grupos. Retorna (combinacoes (K, tamanho), valores (K, len(percentis))),
+    com NaN para combinações com menos de dois aparecimentos.
+    """
+    resultado = hiatos(motor, unidade=unidade)
+    medida = resultado['dias'] if unidade == 'dias' else resultado['concursos']
+    colunas = resultado['coluna']
+
+    # Ordena por (coluna, medida): cada grupo fica contíguo e ordenado
+    ordem = np.lexsort((medida, colunas))
+    medida, colunas = medida[ordem].astype(float), colunas[ordem]
+    total_combinacoes = len(motor['combinacoes'])
+    tamanhos = np.bincount(colunas, minlength=total_combinacoes)
+    inicios = np.concatenate(([0], np.cumsum(tamanhos)[:-1]))
+
+    valores = np.full((total_combinacoes, len(percentis)), np.nan)
+    com_dados = tamanhos > 0
+    for j, p in enumerate(percentis):
+        # Interpolação linear, como np.percentile, aplicada a todos os grupos ao mesmo tempo
+        posicao = inicios[com_dados] + (tamanhos[com_dados] - 1) * p / 100
+        baixo = np.floor(posicao).astype(np.int64)
+        alto = np.ceil(posicao).astype(np.int64)
+        peso = posicao - baixo
+        valores[com_dados, j] = medida[baixo] * (1 - peso) + medida[alto] * peso
+
+    return motor['combinacoes'], valores
+
+
+def top_sequencias(motor, n=10):
+    """As n maiores sequências de concursos seguidos com a combinação saindo (empates pela ordem do histórico)."""
+    presentes = np.flatnonzero(motor['valor'])
+    ordem = presentes[np.argsort(-motor['comprimento'][presentes], kind='stable')][:n]
+    inicio, comprimento = motor['inicio'][ordem], motor['comprimento'][ordem]
+    return {
+        'combinacao': motor['combinacoes'][motor['coluna'][ordem]],
+        'de': motor['concursos'][inicio],
+        'ate': motor['concursos'][inicio + comprimento - 1],
+        'sorteios': comprimento,
+    }
+
+
+def _rotulo(combinacao):
+    return '-'.join(f'{d:02d}' for d in combinacao)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Consultas de hiatos e sequências no histórico da Mega-Sena.")
+    parser.add_argument('--tamanho', type=int, default=1, choices=(1, 2, 3), help="1 = dezenas, 2 = pares, 3 = trincas")
+    parser.add_argument('--dezenas', help="Analisa apenas esta combinação (ex.: --dezenas 10,53)")
+    sub = parser.add_subparsers(dest='consulta', required=True)
+
+    p_hiatos = sub.add_parser('hiatos', help="Intervalos sem sair maiores que um mínimo")
+    p_hiatos.add_argument('--minimo', type=int, default=0)
+    p_hiatos.add_argument('--dias', action='store_true', help="Mede o mínimo em dias em vez de concursos")
+    p_hiatos.add_argument('--atual', action='store_true', help="Inclui o hiato em aberto (atraso atual)")
+    p_hiatos.add_argument('--limite', type=int, default=20, help="Quantas linhas mostrar (maiores primeiro)")
+
+    p_percentis = sub.add_parser('percentis', help="Percentis dos hiatos por combinação")
+    p_percentis.add_argument('--percentis', type=float, nargs='+', default=[50, 90, 99])
+    p_percentis.add_argument('--dias', action='store_true')
+
+    p_seq = sub.add_parser('sequencias', help="Maiores sequências de concursos seguidos")
+    p_seq.add_argument('--top', type=int, default=10)
+
+    args = parser.parse_args()
+    dezenas = sorted(int(d) for d in args.dezenas.split(',')) if args.dezenas else None
+    combinacoes = [dezenas] if dezenas else None
+    tamanho = len(dezenas) if dezenas else args.tamanho
+    motor = preparar_consultas(carregar_historico(), tamanho, combinacoes)
+
+    if args.consulta == 'hiatos':
+        unidade = 'dias' if args.dias else 'concursos'
+        resultado = hiatos(motor, args.minimo, unidade, args.atual)
+        medida = resultado['dias'] if args.dias else resultado['concursos']
+        ordem = np.argsort(-medida, kind='stable')
+        print(f"{len(medida):,} hiatos com mais de {args.minimo} {unidade}:")
+        for i in ordem[:args.limite]:
+            ate = 'atual' if resultado['atual'][i] else resultado['reaparecimento'][i]
+            print(f"{_rotulo(resultado['combinacao'][i]):>10}  concursos {resultado['ultima_aparicao'][i]} -> {ate}"
+                  f"  ({resultado['concursos'][i]} concursos, {resultado['dias'][i]} dias)")
+
+    elif args.consulta == 'percentis':
+        combinacoes, valores = percentis_hiatos(motor, args.percentis, 'dias' if args.dias else 'concursos')
+        print(f"{'combinação':>10}  " + '  '.join(f"p{p:g}".rjust(8) for p in args.percentis))
+        for combinacao, linha in zip(combinacoes, valores):
+            print(f"{_rotulo(combinacao):>10}  " + '  '.join(f"{v:8.1f}" for v in linha))
+
+    else:
+        resultado = top_sequencias(motor, args.top)
+        for combinacao, de, ate, sorteios in zip(resultado['combinacao'], resultado['de'], resultado['ate'], resultado['sorteios']):
+            print(f"{_rotulo(combinacao):>10}  concursos {de} a {ate} ({sorteios} seguidos)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+import argparse
+from itertools import combinations
+from math import comb
+import numpy as np
+from gerador import DEZENAS_POR_JOGO, TOTAL_DEZENAS
+from combinatoria import BINOMIAIS
+
+# Total de trincas possíveis: C(60, 3) = 34.220
+TOTAL_TRINCAS = comb(TOTAL_DEZENAS, 3)
+
+# Jogos processados por vez (vale também para arrays mapeados do disco)
+TAMANHO_CHUNK = 1 << 20
+
+# Posições (i, j) e (i, j, k) dentro de um jogo ordenado de 6 dezenas
+_PARES_POSICOES = np.array(list(combinations(range(DEZENAS_POR_JOGO), 2)))
+_TRINCAS_POSICOES = np.array(list(combinations(range(DEZENAS_POR_JOGO), 3)))
+
+
+def contar_pares(jogos, tamanho_chunk=TAMANHO_CHUNK):
+    """
+    Matriz 60x60 simétrica de coocorrência: [a-1, b-1] = jogos em que as dezenas
+    a e b saíram juntas. A diagonal fica zerada.
+    """
+    contagem = np.zeros(TOTAL_DEZENAS * TOTAL_DEZENAS, dtype=np.int64)
+
+    for inicio in range(0, len(jogos), tamanho_chunk):
+        # Índices em int16 (máximo 59 * 60 + 59): metade da memória de int32 no gather
+        bloco = np.asarray(jogos[inicio:inicio + tamanho_chunk]).astype(np.int16) - 1
+        indices = bloco[:, _PARES_POSICOES[:, 0]] * TOTAL_DEZENAS + bloco[:, _PARES_POSICOES[:, 1]]
+        contagem += np.bincount(indices.ravel(), minlength=TOTAL_DEZENAS * TOTAL_DEZENAS)
+
+    # Sem ordenar o jogo, cada par cai em [a, b] ou em [b, a]: somar a transposta
+    # conta o par uma vez em cada metade e já deixa a matriz simétrica
+    pares = contagem.reshape(TOTAL_DEZENAS, TOTAL_DEZENAS)
+    return pares + pares.T
+
+
+def contar_trincas(jogos, tamanho_chunk=TAMANHO_CHUNK):
+    """
+    Contagem de cada uma das 34.220 trincas, indexadas pelo sistema combinatório
+    (ver trincas_de_indices). Cada jogo contribui com suas 20 trincas.
+    """
+    contagem = np.zeros(TOTAL_TRINCAS, dtype=np.int64)
+
+    for inicio in range(0, len(jogos), tamanho_chunk):
+        bloco = np.sort(np.asarray(jogos[inicio:inicio + tamanho_chunk]), axis=1).astype(np.int64) - 1
+        a = bloco[:, _TRINCAS_POSICOES[:, 0]]
+        b = bloco[:, _TRINCAS_POSICOES[:, 1]]
+        c = bloco[:, _TRINCAS_POSICOES[:, 2]]
+        indices = BINOMIAIS[a, 1] + BINOMIAIS[b, 2] + BINOMIAIS[c, 3]
+        contagem += np.bincount(indices.ravel(), minlength=TOTAL_TRINCAS)
+
+    return contagem
+
+
+def trincas_de_indices(indices):
+    """Converte índices de trinca (0 a 34.219) nas dezenas (n, 3), de 1 a 60."""
+    resto = np.asarray(indices, dtype=np.int64).ravel().copy()
+    trincas = np.empty((len(resto), 3), dtype=np.int64)
+    for i in range(3, 0, -1):
+        coluna = BINOMIAIS[:, i]
+        c = np.searchsorted(coluna, resto, side='right') - 1
+        resto -= coluna[c]
+        trincas[:, i - 1] = c + 1
+    return trincas
+
+
+def maiores_trincas(contagem, n=10):
+    """As n trincas mais frequentes: (trincas (n, 3), contagens)."""
+    indices = np.argsort(-contagem, kind='stable')[:n]
+    return trincas_de_indices(indices), contagem[indices]
+
+
+def tabela_pares_acumulada(bolas):
+    """
+    Tabela acumulada de pares do histórico (na ordem recebida): a linha i é a matriz
+    60x60 dos i primeiros sorteios e a linha 0 é zero. A coocorrência de qualquer
+    janela [i, j) sai de tabela[j] - tabela[i], em O(60²), sem revarrer os sorteios.
+    """
+    bolas = np.asarray(bolas, dtype=np.int64)
+    ocorrencias = np.zeros((len(bolas), TOTAL_DEZENAS), dtype=np.uint16)
+    ocorrencias[np.arange(len(bolas))[:, None], bolas - 1] = 1
+
+    # Produto externo de cada sorteio consigo mesmo: 1 onde as duas dezenas saíram
+    por_sorteio = ocorrencias[:, :, None] * ocorrencias[:, None, :]
+    por_sorteio[:, np.arange(TOTAL_DEZENAS), np.arange(TOTAL_DEZENAS)] = 0
+
+    tabela = np.zeros((len(bolas) + 1, TOTAL_DEZENAS, TOTAL_DEZENAS), dtype=np.uint16)
+    np.cumsum(por_sorteio, axis=0, out=tabela[1:])
+    return tabela
+
+
+def pares_na_janela(tabela, inicio, fim):
+    """Coocorrência dos sorteios [inicio, fim) a partir de uma tabela acumulada."""
+    return tabela[fim].astype(np.int64) - tabela[inicio]
+
+
+def maiores_pares(pares, n=10):
+    """Os n pares mais frequentes de uma matriz de coocorrência: (pares (n, 2), contagens)."""
+    linhas, colunas = np.triu_indices(TOTAL_DEZENAS, k=1)
+    valores = pares[linhas, colunas]
+    ordem = np.argsort(-valores, kind='stable')[:n]
+    return np.column_stack((linhas[ordem] + 1, colunas[ordem] + 1)), valores[ordem]
+
+
+def main():
+    from historico import carregar_historico
+    from armazenamento import abrir_jogos, ler_dezenas
+
+    parser = argparse.ArgumentParser(description="Pares e trincas mais frequentes da Mega-Sena.")
+    parser.add_argument('--inicio', help="Data inicial da janela do histórico (AAAA-MM-DD)")
+    parser.add_argument('--fim', help="Data final da janela do histórico (AAAA-MM-DD)")
+    parser.add_argument('--simulados', help="Armazenamento de jogos simulados (ex.: ./data/jogos_simulados.bin)")
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args()
+
+    historico = carregar_historico()
+    ordem = np.argsort(historico['data'], kind='stable')
+    datas = historico['data'][ordem]
+    i_inicio = np.searchsorted(datas, np.datetime64(args.inicio, 'D'), side='left') if args.inicio else 0
+    i_fim = np.searchsorted(datas, np.datetime64(args.fim, 'D'), side='right') if args.fim else len(datas)
+    bolas = np.asarray(historico['bolas'])[ordem][i_inicio:i_fim]
+
+    conjuntos = [(f"Histórico ({len(bolas):,} sorteios)", bolas)]
+    if args.simulados:
+        dados, cabecalho = abrir_jogos(args.simulados)
+        conjuntos.append((f"Simulação ({cabecalho['quantidade']:,} jogos)", ler_dezenas(dados, cabecalho, 0, cabecalho['quantidade'])))
+
+    for titulo, jogos in conjuntos:
+        print(f"--- {titulo} ---")
+        pares, contagens = maiores_pares(contar_pares(jogos), args.top)
+        print("Pares: " + ', '.join(f"{a:02d}-{b:02d} ({c})" for (a, b), c in zip(pares, contagens)))
+        trincas, contagens = maiores_trincas(contar_trincas(jogos), args.top)
+        print("Trincas: " + ', '.join(f"{a:02d}-{b:02d}-{c:02d} ({n})" for (a, b, c), n in zip(trincas, contagens)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+import matplotlib
+# Sem display: o backend Agg precisa ser escolhido antes de qualquer import do pyplot
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import graficos_artigo
+import simulacao_e_historico
+from graficos_artigo import montar_figura, simular_contagens_prefixos
+from simulacao_e_historico import montar_painel, preparar_estatisticas, preparar_historico
+from gerador import nova_semente, MODO_RAPIDO
+
+# Pasta padrão das figuras exportadas
+PASTA_FIGURAS = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'figuras')
+
+FORMATOS = ('png', 'svg')
+DPI = 150
+
+# Cenários padrão: a figura do artigo e uma variante do painel por janela de datas.
+# 'artigo': {'ns': [...]}; 'painel': {'graficos', 'inicio', 'fim' (DD/MM/AAAA, opcionais), 'simulacoes' (opcional)}
+CENARIOS_PADRAO = [
+    {'tipo': 'artigo', 'nome': 'artigo_lgn_tlc', 'ns': [10_000, 1_000_000]},
+    {'tipo': 'painel', 'nome': 'painel_completo', 'graficos': 'both'},
+    {'tipo': 'painel', 'nome': 'somas_desde_2015', 'graficos': 'soma', 'inicio': '01/01/2015'},
+    {'tipo': 'painel', 'nome': 'pares_completo', 'graficos': 'pares'},
+]
+
+# Dados compartilhados pelos workers: enviados uma vez por processo, no initializer
+_DADOS = {}
+
+
+def _inicializar_worker(dados):
+    _DADOS.update(dados)
+
+
+def nome_cenario(cenario, indice):
+    """Nome do arquivo (sem extensão) de um cenário."""
+    return cenario.get('nome') or f"{indice:02d}_{cenario['tipo']}"
+
+
+def _ler_data(texto, padrao):
+    return datetime.strptime(texto, '%d/%m/%Y') if texto else padrao
+
+
+def renderizar_cenario(cenario, caminho_base, formatos=FORMATOS, dpi=DPI):
+    """
+    Worker: monta a figura de um cenário a partir dos dados compartilhados e grava um
+    arquivo por formato. Retorna (arquivos, segundos).
+    """
+    inicio = time.time()
+    if cenario['tipo'] == 'artigo':
+        resultados = _DADOS['artigo']
+        fig = montar_figura(cenario['ns'], [resultados[n] for n in cenario['ns']])
+    elif cenario['tipo'] == 'painel':
+        historico = _DADOS['historico']
+        fig, update_plot = montar_painel(_DADOS['estatisticas'], historico,
+                                         cenario.get('graficos', 'both'), interativo=False)
+        num_simulacoes = cenario.get('simulacoes', _DADOS['estatisticas']['limites_blocos'][-1])
+        update_plot(_ler_data(cenario.get('inicio'), historico['data_min']),
+                    _ler_data(cenario.get('fim'), historico['data_max']),
+                    num_simulacoes)
+    else:
+        raise ValueError(f"Tipo de cenário desconhecido: {cenario['tipo']!r}")
+
+    arquivos = []
+    for formato in formatos:
+        arquivo = f"{caminho_base}.{formato}"
+        fig.savefig(arquivo, dpi=dpi, bbox_inches='tight')
+        arquivos.append(arquivo)
+    plt.close(fig)
+    return arquivos, time.time() - inicio
+
+
+def preparar_dados(cenarios, semente=None):
+    """
+    Resultados compartilhados por todos os cenários, calculados uma única vez:
+    'artigo' (contagens por N, em uma única passada até o maior N), 'estatisticas'
+    (tabelas da simulação, reaproveitadas do armazenamento) e 'historico' (cache colunar).
+    Só o que algum cenário usa é preparado.
+    """
+    dados = {}
+    ns = sorted({n for c in cenarios if c['tipo'] == 'artigo' for n in c['ns']})
+    if ns:
+        modo = graficos_artigo.MODO_RNG
+        if modo == MODO_RAPIDO and semente is None:
+            semente = nova_semente()
+        if semente is not None:
+            print(f"Semente: {semente} (use --semente {semente} para reproduzir as figuras).")
+        dados['artigo'] = dict(zip(ns, simular_contagens_prefixos(ns, modo, semente)))
+
+    paineis = [c for c in cenarios if c['tipo'] == 'painel']
+    if paineis:
+        total = max(c.get('simulacoes', simulacao_e_historico.TOTAL_JOGOS) for c in paineis)
+        dados['estatisticas'] = preparar_estatisticas(total)
+        dados['historico'] = preparar_historico()
+    return dados
+
+
+def exportar(cenarios, pasta=PASTA_FIGURAS, formatos=FORMATOS, processos=None, semente=None, dpi=DPI):
+    """
+    Renderiza todos os cenários em paralelo (um processo por figura, até `processos`)
+    e retorna a lista de arquivos gravados, na ordem dos cenários.
+    """
+    os.makedirs(pasta, exist_ok=True)
+    dados = preparar_dados(cenarios, semente)
+    processos = min(processos or os.cpu_count() or 4, len(cenarios)) or 1
+
+    inicio = time.time()
+    arquivos = []
+    with ProcessPoolExecutor(max_workers=processos, initializer=_inicializar_worker, initargs=(dados,)) as executor:
+        futuros = [
+            executor.submit(renderizar_cenario, cenario, os.path.join(pasta, nome_cenario(cenario, i)), formatos, dpi)
+            for i, cenario in enumerate(cenarios)
+        ]
+        for i, futuro in enumerate(futuros):
+            gravados, segundos = futuro.result()
+            print(f"{nome_cenario(cenarios[i], i)}: {', '.join(gravados)} ({segundos:.2f}s)")
+            arquivos.extend(gravados)
+
+    print(f"{len(cenarios)} figuras renderizadas em {time.time() - inicio:.2f} segundos com {processos} processos.")
+    return arquivos
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exporta as figuras do artigo e do painel sem abrir janelas (backend Agg).")
+    parser.add_argument('--cenarios', help="Arquivo JSON com a lista de cenários (padrão: CENARIOS_PADRAO)")
+    parser.add_argument('--pasta', default=PASTA_FIGURAS, help="Pasta de saída das figuras")
+    parser.add_argument('--formatos', default=','.join(FORMATOS), help="Formatos separados por vírgula (png, svg, pdf...)")
+    parser.add_argument('--processos', type=int, default=None, help="Processos de renderização (padrão: núcleos)")
+    parser.add_argument('--semente', type=int, default=None, help="Semente das simulações do artigo (modo rápido)")
+    parser.add_argument('--dpi', type=int, default=DPI)
+    args = parser.parse_args()
+
+    cenarios = CENARIOS_PADRAO
+    if args.cenarios:
+        with open(args.cenarios, encoding='utf-8') as f:
+            cenarios = json.load(f)
+
+    formatos = [f.strip() for f in args.formatos.split(',') if f.strip()]
+    exportar(cenarios, args.pasta, formatos, args.processos, args.semente, args.dpi)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+import argparse
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+import numpy as np
+from gerador import DEZENAS_POR_JOGO, TOTAL_DEZENAS
+from backtest import contar_bits, ler_bilhetes_texto
+from combinatoria import de_mascaras
+
+# Maior quantidade de dezenas escolhidas: C(25, 6) = 177.100 bilhetes candidatos
+MAXIMO_DEZENAS = 25
+
+# Candidatos avaliados a cada passo do guloso (amostra aleatória dos C(n, 6) bilhetes)
+AMOSTRA_GULOSA = 512
+# Candidatos comparados de uma vez contra os subconjuntos descobertos
+SUBLOTE_GULOSO = 64
+
+# Trocas tentadas pela busca local antes de desistir de cobrir tudo com o tamanho atual
+ITERACOES_BUSCA = 20_000
+# Temperatura da busca local: uma troca que descobre d subconjuntos é aceita com probabilidade exp(-d / T)
+TEMPERATURA = 0.4
+
+# Subconjuntos verificados de uma vez pelo verificador exato
+TAMANHO_CHUNK_VERIFICACAO = 1 << 14
+
+
+def subconjuntos(n, tamanho):
+    """Todos os subconjuntos de `tamanho` elementos de {0, ..., n-1}, como máscaras de n bits (uint64)."""
+    if tamanho > n:
+        return np.empty(0, dtype=np.uint64)
+    indices = np.array(list(combinations(range(n), tamanho)), dtype=np.uint64).reshape(-1, tamanho)
+    return np.bitwise_or.reduce(np.left_shift(np.uint64(1), indices), axis=1)
+
+
+def _bits(mascara):
+    return [b for b in range(mascara.bit_length()) if mascara >> b & 1]
+
+
+def _validar(n, sorteadas, garantia):
+    if not DEZENAS_POR_JOGO <= n <= MAXIMO_DEZENAS:
+        raise ValueError(f"Escolha de {DEZENAS_POR_JOGO} a {MAXIMO_DEZENAS} dezenas (recebido {n}).")
+    if not 1 <= garantia <= sorteadas <= min(DEZENAS_POR_JOGO, n):
+        raise ValueError(f"É preciso 1 <= garantia <= sorteadas <= {DEZENAS_POR_JOGO} "
+                         f"(recebido garantia={garantia}, sorteadas={sorteadas}).")
+
+
+def _busca_local(bilhetes, cobertura, alvos, garantia, iteracoes, rng):
+    """
+    Troca dezenas dos bilhetes para cobrir os subconjuntos descobertos, mantendo a
+    cobertura incremental (quantos bilhetes cobrem cada subconjunto). Cada troca puxa um
+    bilhete em direção a um subconjunto descoberto: sai uma dezena de fora dele, entra
+    uma de dentro. O custo de avaliar uma troca é O(C(n, k)), vetorizado.
+    Como trocas que pioram podem ser aceitas, guarda o melhor estado visto: ao terminar,
+    `bilhetes` e `cobertura` voltam a ele (no lugar) e o retorno é quantos subconjuntos
+    seguem descobertos nesse estado.
+    """
+    descobertos = int(np.count_nonzero(cobertura == 0))
+    melhor, melhores_bilhetes, melhor_cobertura = descobertos, list(bilhetes), cobertura.copy()
+    for _ in range(iteracoes):
+        if descobertos == 0:
+            break
+        alvo = int(alvos[rng.choice(np.flatnonzero(cobertura == 0))])
+        i = int(rng.integers(len(bilhetes)))
+        antigo = bilhetes[i]
+        sai = rng.choice(_bits(antigo & ~alvo))
+        entra = rng.choice(_bits(alvo & ~antigo))
+        novo = antigo & ~(1 << int(sai)) | (1 << int(entra))
+
+        cobria = contar_bits(alvos & np.uint64(antigo)) >= garantia
+        cobre = contar_bits(alvos & np.uint64(novo)) >= garantia
+        perdidos = int(np.count_nonzero(cobria & ~cobre & (cobertura == 1)))
+        ganhos = int(np.count_nonzero(cobre & ~cobria & (cobertura == 0)))
+        delta = perdidos - ganhos
+        if delta <= 0 or rng.random() < math.exp(-delta / TEMPERATURA):
+            cobertura += cobre.astype(np.int32) - cobria
+            bilhetes[i] = novo
+            descobertos += delta
+            if descobertos < melhor:
+                melhor, melhores_bilhetes, melhor_cobertura = descobertos, list(bilhetes), cobertura.copy()
+    if descobertos > melhor:
+        bilhetes[:] = melhores_bilhetes
+        cobertura[:] = melhor_cobertura
+    return melhor
+
+
+def otimizar_fechamento(n, sorteadas, garantia, orcamento, semente=None, iteracoes=ITERACOES_BUSCA):
+    """
+    Função worker: uma tentativa de fechamento sobre as dezenas 0..n-1.
+
+    Guloso aleatorizado (a cada passo, o melhor de uma amostra de candidatos) até cobrir
+    todos os C(n, sorteadas) subconjuntos ou atingir o orçamento; depois, enquanto a
+    cobertura é completa, remove o bilhete menos necessário e repara com busca local.
+    Retorna (bilhetes, descobertos): as máscaras da menor solução completa encontrada,
+    ou, se o orçamento não bastou, a de menos subconjuntos descobertos.
+    """
+    _validar(n, sorteadas, garantia)
+    if orcamento < 1:
+        raise ValueError("O orçamento precisa de pelo menos 1 bilhete.")
+    rng = np.random.default_rng(semente)
+    alvos = subconjuntos(n, sorteadas)
+    candidatos = subconjuntos(n, DEZENAS_POR_JOGO)
+    cobertura = np.zeros(len(alvos), dtype=np.int32)
+    bilhetes = []
+
+    while len(bilhetes) < orcamento and np.any(cobertura == 0):
+        descobertos = alvos[cobertura == 0]
+        amostra = candidatos[rng.choice(len(candidatos), min(AMOSTRA_GULOSA, len(candidatos)), replace=False)]
+        ganhos = np.empty(len(amostra), dtype=np.int64)
+        for inicio in range(0, len(amostra), SUBLOTE_GULOSO):
+            bloco = amostra[inicio:inicio + SUBLOTE_GULOSO]
+            ganhos[inicio:inicio + len(bloco)] = np.count_nonzero(
+                contar_bits(bloco[:, None] & descobertos[None, :]) >= garantia, axis=1)
+        escolhido = int(amostra[np.argmax(ganhos)])
+        bilhetes.append(escolhido)
+        cobertura += contar_bits(alvos & np.uint64(escolhido)) >= garantia
+
+    descobertos = _busca_local(bilhetes, cobertura, alvos, garantia, iteracoes, rng)
+    melhor = (list(bilhetes), descobertos)
+
+    while descobertos == 0 and len(bilhetes) > 1:
+        # Remove o bilhete que deixa menos subconjuntos descobertos (os que só ele cobre)
+        exclusivos = [np.count_nonzero((contar_bits(alvos & np.uint64(b)) >= garantia) & (cobertura == 1)) for b in bilhetes]
+        removido = bilhetes.pop(int(np.argmin(exclusivos)))
+        cobertura -= contar_bits(alvos & np.uint64(removido)) >= garantia
+        descobertos = _busca_local(bilhetes, cobertura, alvos, garantia, iteracoes, rng)
+        if descobertos == 0:
+            melhor = (list(bilhetes), 0)
+
+    return melhor
+
+
+def buscar_fechamento(dezenas, sorteadas, garantia, orcamento, reinicios=None, num_processos=None,
+                      semente=None, iteracoes=ITERACOES_BUSCA):
+    """
+    Fechamento para as `dezenas` escolhidas: bilhetes que garantem pelo menos `garantia`
+    acertos sempre que `sorteadas` das dezenas escolhidas forem sorteadas, com no máximo
+    `orcamento` bilhetes. As tentativas (reinícios com sementes independentes) rodam em
+    paralelo e a melhor vence: cobertura completa com menos bilhetes ou, sem cobertura
+    completa, menos subconjuntos descobertos.
+    Retorna (bilhetes (m, 6) com as dezenas, descobertos).
+    """
+    dezenas = np.array(sorted(set(int(d) for d in dezenas)), dtype=np.uint8)
+    if not all(1 <= d <= TOTAL_DEZENAS for d in dezenas.tolist()):
+        raise ValueError("As dezenas devem estar entre 1 e 60.")
+    _validar(len(dezenas), sorteadas, garantia)
+
+    num_processos = num_processos or os.cpu_count() or 4
+    reinicios = reinicios or num_processos
+    sementes = np.random.SeedSequence(semente).spawn(reinicios)
+    n = len(dezenas)
+    with ProcessPoolExecutor(max_workers=num_processos) as executor:
+        resultados = list(executor.map(otimizar_fechamento, [n] * reinicios, [sorteadas] * reinicios,
+                                       [garantia] * reinicios, [orcamento] * reinicios, sementes,
+                                       [iteracoes] * reinicios))
+
+    bilhetes, descobertos = min(resultados, key=lambda r: (r[1], len(r[0])))
+    return para_dezenas(bilhetes, dezenas), descobertos
+
+
+def para_dezenas(mascaras_locais, dezenas):
+    """Máscaras sobre as posições 0..n-1 das dezenas escolhidas -> bilhetes (m, 6) com as dezenas."""
+    posicoes = [_bits(m) for m in mascaras_locais]
+    return dezenas[np.array(posicoes, dtype=np.intp).reshape(-1, DEZENAS_POR_JOGO)]
+
+
+def verificar_fechamento(bilhetes, dezenas, sorteadas, garantia):
+    """
+    Verificador exato: confere, para cada um dos C(n, sorteadas) subconjuntos das dezenas
+    escolhidas, se algum bilhete acerta pelo menos `garantia` dezenas dele. Tudo em
+    máscaras de n bits e popcount, em fatias. Retorna um dicionário com 'subconjuntos',
+    'descobertos' e 'exemplo' (o primeiro subconjunto descoberto, ou None).
+    """
+    dezenas = np.array(sorted(set(int(d) for d in dezenas)), dtype=np.uint8)
+    _validar(len(dezenas), sorteadas, garantia)
+    posicao = np.full(TOTAL_DEZENAS + 1, -1, dtype=np.int64)
+    posicao[dezenas] = np.arange(len(dezenas))
+
+    bilhetes = np.asarray(bilhetes, dtype=np.int64).reshape(-1, DEZENAS_POR_JOGO)
+    locais = posicao[bilhetes]
+    # Dezenas do bilhete fora das escolhidas não ajudam a garantia: ficam fora da máscara
+    mascaras = np.bitwise_or.reduce(np.where(locais >= 0, np.left_shift(np.uint64(1), np.maximum(locais, 0).astype(np.uint64)),
+                                             np.uint64(0)), axis=1)
+
+    alvos = subconjuntos(len(dezenas), sorteadas)
+    descobertos = 0
+    exemplo = None
+    for inicio in range(0, len(alvos), TAMANHO_CHUNK_VERIFICACAO):
+        bloco = alvos[inicio:inicio + TAMANHO_CHUNK_VERIFICACAO]
+        if len(mascaras):
+            cobertos = (contar_bits(bloco[:, None] & mascaras[None, :]) >= garantia).any(axis=1)
+        else:
+            cobertos = np.zeros(len(bloco), dtype=bool)
+        faltando = np.flatnonzero(~cobertos)
+        if exemplo is None and len(faltando):
+            exemplo = dezenas[_bits(int(bloco[faltando[0]]))].tolist()
+        descobertos += len(faltando)
+    return {'subconjuntos': len(alvos), 'descobertos': descobertos, 'exemplo': exemplo}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fechamento (covering design) de bolões da Mega-Sena.")
+    parser.add_argument('--dezenas', required=True, help="Dezenas escolhidas, separadas por vírgula (até 25)")
+    parser.add_argument('--sorteadas', type=int, default=DEZENAS_POR_JOGO,
+                        help="Quantas das dezenas escolhidas precisam sair para valer a garantia")
+    parser.add_argument('--garantia', type=int, default=4, help="Acertos garantidos (4 = quadra, 5 = quina)")
+    parser.add_argument('--orcamento', type=int, default=100, help="Máximo de bilhetes")
+    parser.add_argument('--reinicios', type=int, default=None, help="Tentativas independentes (padrão: núcleos)")
+    parser.add_argument('--processos', type=int, default=None)
+    parser.add_argument('--iteracoes', type=int, default=ITERACOES_BUSCA)
+    parser.add_argument('--semente', type=int, default=None)
+    parser.add_argument('--saida', help="Grava os bilhetes em texto, um por linha")
+    parser.add_argument('--verificar', help="Apenas verifica os bilhetes de um arquivo de texto contra a garantia")
+    args = parser.parse_args()
+
+    dezenas = [int(d) for d in args.dezenas.split(',') if d.strip()]
+    inicio = time.time()
+    if args.verificar:
+        bilhetes = de_mascaras(ler_bilhetes_texto(args.verificar))
+    else:
+        bilhetes, _ = buscar_fechamento(dezenas, args.sorteadas, args.garantia, args.orcamento,
+                                        args.reinicios, args.processos, args.semente, args.iteracoes)
+        print(f"Busca concluída em {time.time() - inicio:.2f} segundos: {len(bilhetes)} bilhetes.")
+        for bilhete in bilhetes.tolist():
+            print(' '.join(f"{d:02d}" for d in bilhete))
+        if args.saida:
+            np.savetxt(args.saida, bilhetes, fmt='%02d', delimiter=' ')
+            print(f"Bilhetes gravados em {args.saida}.")
+
+    verificacao = verificar_fechamento(bilhetes, dezenas, args.sorteadas, args.garantia)
+    print(f"Verificação: {verificacao['subconjuntos'] - verificacao['descobertos']:,}/{verificacao['subconjuntos']:,} "
+          f"subconjuntos de {args.sorteadas} dezenas cobertos com {args.garantia}+ acertos.")
+    if verificacao['descobertos']:
+        print(f"Garantia NÃO atendida: {verificacao['descobertos']:,} descobertos (ex.: {verificacao['exemplo']}).")
+    else:
+        print("Garantia atendida.")
+
+
+if __name__ == "__main__":
+    main()
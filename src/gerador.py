@@ -0,0 +1,150 @@
+import secrets
+from functools import lru_cache
+import numpy as np
+
+# Quantidade de dezenas por jogo e tamanho do volante
+DEZENAS_POR_JOGO = 6
+TOTAL_DEZENAS = 60
+
+# Maior soma possível de um jogo (55 + 56 + ... + 60)
+SOMA_MAXIMA = sum(range(TOTAL_DEZENAS - DEZENAS_POR_JOGO + 1, TOTAL_DEZENAS + 1))
+
+# Tamanho de cada fatia gerada de uma vez (mantém os temporários no cache da CPU)
+TAMANHO_CHUNK = 1 << 18
+
+# Backends de aleatoriedade:
+# - 'seguro': entropia do sistema operacional (secrets), não reprodutível
+# - 'rapido': PCG64 semeado, reprodutível e independente da divisão em workers
+MODO_SEGURO = 'seguro'
+MODO_RAPIDO = 'rapido'
+
+# No modo rápido, a sequência de jogos é dividida em blocos lógicos deste tamanho.
+# O bloco b usa o fluxo PCG64 do filho b da SeedSequence da semente: o jogo de
+# posição p depende só de (semente, p), não de quantos workers ou chunks há.
+JOGOS_POR_FLUXO = 1 << 16
+
+
+def _uniforme(qtd, limite, obter_bytes):
+    """
+    Sorteia `qtd` inteiros uniformes em [0, limite) a partir de uma fonte de
+    bytes aleatórios (limite <= 256). `obter_bytes(n)` deve retornar n bytes.
+    """
+    # Método de Lemire: multiplica cada byte pelo limite e usa o byte alto.
+    # Os produtos cujo byte baixo cai abaixo de (256 % limite) introduziriam viés,
+    # então são rejeitados e sorteados de novo (no máximo ~14% para limite=55).
+    brutos = np.frombuffer(obter_bytes(qtd), dtype=np.uint8)
+    produto = brutos.astype(np.uint16) * np.uint16(limite)
+    saida = (produto >> 8).astype(np.uint8)
+
+    rejeitados = np.flatnonzero((produto & 0xFF) < (256 % limite))
+    if rejeitados.size:
+        saida[rejeitados] = _uniforme(rejeitados.size, limite, obter_bytes)
+
+    return saida
+
+
+def _floyd(qtd, obter_bytes):
+    """
+    Algoritmo de Floyd vetorizado: sorteia `qtd` jogos de 6 dezenas distintas
+    com um sorteio por coluna, sem ordenar 60 valores por jogo.
+    Retorna as colunas do lote, em um array (6, qtd) com dezenas de 0 a 59.
+    """
+    colunas = np.empty((DEZENAS_POR_JOGO, qtd), dtype=np.uint8)
+
+    for k, j in enumerate(range(TOTAL_DEZENAS - DEZENAS_POR_JOGO, TOTAL_DEZENAS)):
+        # Sorteia t em [0, j]; se t já saiu neste jogo, usa j (que ainda não saiu)
+        t = _uniforme(qtd, j + 1, obter_bytes)
+        repetido = np.zeros(qtd, dtype=bool)
+        for i in range(k):
+            repetido |= colunas[i] == t
+        colunas[k] = np.where(repetido, j, t)
+
+    return colunas
+
+
+def _gerar_jogos(qtd, obter_bytes, tamanho_chunk):
+    jogos = np.empty((qtd, DEZENAS_POR_JOGO), dtype=np.uint8)
+
+    for inicio in range(0, qtd, tamanho_chunk):
+        fim = min(inicio + tamanho_chunk, qtd)
+        # Transpõe as colunas do lote para linhas (um jogo por linha)
+        jogos[inicio:fim] = _floyd(fim - inicio, obter_bytes).T
+
+    # Ajusta de 0-59 para 1-60
+    jogos += 1
+    return jogos
+
+
+def gerar_jogos_seguros(qtd, tamanho_chunk=TAMANHO_CHUNK):
+    """
+    Gera `qtd` jogos em um array (qtd, 6) uint8 com dezenas de 1 a 60.
+
+    Os bytes vêm em blocos do CSPRNG do sistema (secrets.token_bytes), mantendo
+    a garantia criptográfica do SystemRandom sem o custo de um objeto Python por jogo.
+    As dezenas de cada jogo são distintas, mas não saem ordenadas.
+    """
+    return _gerar_jogos(qtd, secrets.token_bytes, tamanho_chunk)
+
+
+def gerar_jogos_rapidos(qtd, rng=None, tamanho_chunk=TAMANHO_CHUNK):
+    """
+    Mesmo formato de gerar_jogos_seguros, mas com bytes de um gerador NumPy
+    (PCG64 por padrão). Não é criptográfico: serve para simulações estatísticas.
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+    return _gerar_jogos(qtd, rng.bytes, tamanho_chunk)
+
+
+def nova_semente():
+    """Semente nova (128 bits de entropia do sistema), para registrar e repetir uma execução."""
+    return np.random.SeedSequence().entropy
+
+
+@lru_cache(maxsize=2)
+def _jogos_do_fluxo(semente, indice_fluxo):
+    # spawn_key=(b,) é exatamente o fluxo de SeedSequence(semente).spawn(...)[b]
+    sequencia = np.random.SeedSequence(semente, spawn_key=(indice_fluxo,))
+    rng = np.random.Generator(np.random.PCG64(sequencia))
+    jogos = _gerar_jogos(JOGOS_POR_FLUXO, rng.bytes, JOGOS_POR_FLUXO)
+    # Fica em cache (workers pedem fatias vizinhas do mesmo bloco): somente leitura
+    jogos.flags.writeable = False
+    return jogos
+
+
+def gerar_jogos_reprodutiveis(qtd, semente, inicio=0):
+    """
+    Retorna os jogos [inicio, inicio + qtd) da sequência definida por `semente`,
+    em um array (qtd, 6) uint8. Qualquer divisão da sequência em fatias (por
+    worker, por bloco ou de uma vez) produz exatamente os mesmos jogos.
+    """
+    fim = inicio + qtd
+    partes = []
+    for bloco in range(inicio // JOGOS_POR_FLUXO, -(-fim // JOGOS_POR_FLUXO)):
+        base = bloco * JOGOS_POR_FLUXO
+        partes.append(_jogos_do_fluxo(semente, bloco)[max(inicio - base, 0):min(fim - base, JOGOS_POR_FLUXO)])
+    if not partes:
+        return np.empty((0, DEZENAS_POR_JOGO), dtype=np.uint8)
+    return np.concatenate(partes)
+
+
+def gerar_jogos(qtd, modo=MODO_SEGURO, semente=None, inicio=0):
+    """
+    Gera `qtd` jogos com o backend escolhido. No modo rápido, `semente` é obrigatória
+    (ver nova_semente) e `inicio` é a posição do primeiro jogo na sequência;
+    no modo seguro ambos são ignorados.
+    """
+    if modo == MODO_SEGURO:
+        return gerar_jogos_seguros(qtd)
+    if modo == MODO_RAPIDO:
+        if semente is None:
+            raise ValueError("O modo rápido precisa de uma semente (use nova_semente()).")
+        return gerar_jogos_reprodutiveis(qtd, semente, inicio)
+    raise ValueError(f"Modo de geração inválido: {modo}. Use '{MODO_SEGURO}' ou '{MODO_RAPIDO}'.")
+
+
+def descrever_gerador(modo, semente=None):
+    """Metadados do gerador para o cabeçalho do armazenamento: (gerador, semente)."""
+    if modo == MODO_RAPIDO:
+        return f'PCG64/SeedSequence (blocos de {JOGOS_POR_FLUXO})', semente
+    return 'secrets.token_bytes', None
@@ -2,44 +2,74 @@ import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 import time
+from gerador import gerar_jogos, nova_semente, SOMA_MAXIMA, MODO_RAPIDO
+from combinatoria import probabilidades_somas, momentos_somas
+from densidade import densidade_histograma
 
-def main():
+# Quantidade de jogos gerados por vez: limita a memória independentemente de N
+TAMANHO_CHUNK = 1_000_000
+
+# Gerador: MODO_RAPIDO (PCG64 semeado, figuras reprodutíveis) ou MODO_SEGURO (entropia do sistema).
+# Com SEMENTE = None uma semente nova é sorteada a cada execução e exibida no terminal.
+MODO_RNG = MODO_RAPIDO
+SEMENTE = None
+
+def simular_contagens_prefixos(ns, modo=MODO_RAPIDO, semente=None, tamanho_chunk=TAMANHO_CHUNK):
+    """
+    Simula jogos em fatias de tamanho fixo e acumula apenas as contagens: a frequência
+    de cada dezena (1-60) e o histograma das somas (índice = soma).
+
+    Atende várias quantidades de jogos de uma vez: uma única passada até max(ns),
+    guardando uma cópia das contagens ao passar por cada N. Cada cenário é o prefixo
+    da mesma sequência de jogos, sem simular de novo. No modo rápido o resultado depende
+    só de (N, semente), não do tamanho das fatias.
+    Retorna uma lista de (contagem, contagem_somas) na ordem de `ns`.
+    """
+    if modo == MODO_RAPIDO and semente is None:
+        semente = nova_semente()
+
+    contagem = np.zeros(61, dtype=np.int64)
+    contagem_somas = np.zeros(SOMA_MAXIMA + 1, dtype=np.int64)
+    resultados = {}
+    inicio = 0
+    start_time = time.time()
+
+    for alvo in sorted(set(ns)):
+        while inicio < alvo:
+            qtd = min(tamanho_chunk, alvo - inicio)
+            jogos = gerar_jogos(qtd, modo, semente, inicio)
+            # bincount é extremamente rápido para contar inteiros não negativos
+            contagem += np.bincount(jogos.ravel(), minlength=61)
+            contagem_somas += np.bincount(jogos.sum(axis=1, dtype=np.int16), minlength=SOMA_MAXIMA + 1)
+            inicio += qtd
+        resultados[alvo] = (contagem[1:].copy(), contagem_somas.copy())
+        print(f"Processado N={alvo:,} em {time.time() - start_time:.4f} segundos (acumulado).".replace(",", "."))
+
+    return [resultados[n] for n in ns]
+
+def simular_contagens(n, modo=MODO_RAPIDO, semente=None, tamanho_chunk=TAMANHO_CHUNK):
+    """Contagens de um único cenário de n jogos (ver simular_contagens_prefixos)."""
+    return simular_contagens_prefixos([n], modo, semente, tamanho_chunk)[0]
+
+def montar_figura(n_simulacoes, resultados):
+    """
+    Figura do artigo: uma linha por N, com a frequência das dezenas (Lei dos Grandes
+    Números) e a distribuição da soma (Teorema do Limite Central).
+    `resultados` traz (contagem, contagem_somas) de cada N, como em simular_contagens_prefixos.
+    """
     # Configuração Estética
     sns.set_style("whitegrid")
-    plt.rcParams['figure.figsize'] = (16, 20)
-    
-    # Cenários de Simulação (Quantidade de Jogos)
-    n_simulacoes = [10000, 1000000]
     
-    # Criação da Figura e Subplots (4 linhas x 2 colunas)
-    fig, axes = plt.subplots(len(n_simulacoes), 2)
+    # Criação da Figura e Subplots (uma linha por cenário x 2 colunas)
+    fig, axes = plt.subplots(len(n_simulacoes), 2, figsize=(16, 10 * len(n_simulacoes)), squeeze=False)
     
-    print("Iniciando simulação... Isso pode levar alguns segundos para N=1.000.000.")
+    # Distribuição exata da soma (sobre as 50.063.860 combinações), sem custo de simulação
+    prob_somas = probabilidades_somas()
+    media_teorica, _ = momentos_somas()
+    eixo_somas = np.nonzero(prob_somas)[0]  # Somas possíveis: 21 a 345
+    eixo_x_dezenas = np.arange(1, 61)
 
-    for i, n in enumerate(n_simulacoes):
-        start_time = time.time()
-        
-        # --- GERAÇÃO DE DADOS OTIMIZADA (VETORIZAÇÃO NUMPY) ---
-        # Para simular "amostragem sem reposição" de forma performática para milhões de linhas:
-        # 1. Geramos ruído aleatório para uma matriz (N, 60).
-        # 2. Usamos argsort para pegar os índices dos 6 menores valores de cada linha.
-        # Isso garante unicidade por linha (jogo) sem loops Python lentos.
-        
-        # Nota: Para N=1.000.000, isso consome cerca de ~480MB de RAM.
-        # Se a memória for limitada, ideal seria processar em chunks, 
-        # mas aqui priorizamos a elegância vetorial do Numpy.
-        ruido = np.random.rand(n, 60)
-        jogos = np.argsort(ruido, axis=1)[:, :6] + 1  # +1 para ajustar de 0-59 para 1-60
-        
-        # Cálculos para as Colunas
-        somas = np.sum(jogos, axis=1)
-        todas_dezenas = jogos.flatten()
-        
-        # Contagem de frequência para cada número (1 a 60)
-        # bincount é extremamente rápido para contar inteiros não negativos
-        contagem = np.bincount(todas_dezenas, minlength=62)[1:61]
-        eixo_x_dezenas = np.arange(1, 61)
-        
+    for i, (n, (contagem, contagem_somas)) in enumerate(zip(n_simulacoes, resultados)):
         # --- PLOTAGEM COLUNA 1: FREQUÊNCIA (Lei dos Grandes Números) ---
         ax_freq = axes[i, 0]
         sns.barplot(x=eixo_x_dezenas, y=contagem, ax=ax_freq, color='#3498db', edgecolor='none')
@@ -57,11 +87,22 @@ def main():
 
         # --- PLOTAGEM COLUNA 2: SOMA (Teorema do Limite Central) ---
         ax_soma = axes[i, 1]
-        sns.histplot(somas, kde=True, ax=ax_soma, color='#e67e22', bins=30, line_kws={'linewidth': 2})
+        # O histograma das somas já vem agregado: cada soma possível entra com seu peso
+        somas_validas = np.nonzero(contagem_somas)[0]
+        sns.histplot(x=somas_validas, weights=contagem_somas[somas_validas], ax=ax_soma,
+                     color='#e67e22', bins=30)
+        largura_bin = (somas_validas.max() - somas_validas.min()) / 30
+
+        # Densidade suavizada sobre o próprio histograma (FFT): custo fixo, qualquer que seja N
+        densidade = densidade_histograma(contagem_somas)
+        ax_soma.plot(eixo_somas, n * densidade[eixo_somas] * largura_bin, color='#e67e22', linewidth=2,
+                     label='Densidade (KDE por histograma)')
         
+        # Curva exata esperada para N jogos, na mesma escala das barras (largura de cada bin)
+        ax_soma.plot(eixo_somas, n * prob_somas[eixo_somas] * largura_bin, color='black', linestyle=':', linewidth=1.5, label='Distribuição Exata')
+
         # Linha da Média Teórica
-        media_teorica = 183
-        ax_soma.axvline(media_teorica, color='red', linestyle='--', linewidth=2, label=f'Média Teórica ({media_teorica})')
+        ax_soma.axvline(media_teorica, color='red', linestyle='--', linewidth=2, label=f'Média Teórica ({media_teorica:g})')
         
         # Formatação Visual Soma
         ax_soma.set_title(f"Distribuição da Soma das Dezenas (N = {titulo_n})", fontsize=12, fontweight='bold')
@@ -69,11 +110,32 @@ def main():
         ax_soma.set_xlabel("Soma das 6 Dezenas")
         ax_soma.legend(loc='upper right')
 
-        print(f"Processado N={titulo_n} em {time.time() - start_time:.4f} segundos.")
-
     # Ajustes Finais de Layout
-    plt.suptitle("Simulação Mega Sena: Lei dos Grandes Números e Teorema do Limite Central", fontsize=20, y=1.005)
-    plt.tight_layout()
+    fig.suptitle("Simulação Mega Sena: Lei dos Grandes Números e Teorema do Limite Central", fontsize=20, y=1.005)
+    fig.tight_layout()
+    return fig
+
+def main():
+    # Cenários de Simulação (Quantidade de Jogos)
+    n_simulacoes = [10000, 1000000]
+    # n_simulacoes = [10000, 1000000, 50_063_860]  # Memória constante: também roda para N=50M
+
+    semente = SEMENTE
+    if MODO_RNG == MODO_RAPIDO and semente is None:
+        semente = nova_semente()
+    if semente is not None:
+        print(f"Semente: {semente} (use SEMENTE = {semente} para reproduzir as figuras).")
+
+    print("Iniciando simulação... Isso pode levar alguns segundos para N=1.000.000.")
+
+    # --- GERAÇÃO DE DADOS EM FATIAS (MEMÓRIA CONSTANTE) ---
+    # Em vez de uma matriz de ruído (N, 60) + argsort (~480MB para N=1.000.000),
+    # cada fatia sorteia as 6 dezenas diretamente, sem reposição (algoritmo de Floyd),
+    # e só as contagens agregadas são mantidas. A memória não cresce com N.
+    # Todos os cenários saem de uma única passada: os menores são prefixos do maior.
+    resultados = simular_contagens_prefixos(n_simulacoes, MODO_RNG, semente)
+
+    montar_figura(n_simulacoes, resultados)
     
     # Exibir
     plt.show()
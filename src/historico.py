@@ -0,0 +1,228 @@
+import csv
+import json
+import os
+import re
+import shutil
+import unicodedata
+from datetime import datetime
+import numpy as np
+from gerador import DEZENAS_POR_JOGO, TOTAL_DEZENAS, SOMA_MAXIMA
+
+# CSV padrão do projeto (relativo a este arquivo, funciona de qualquer diretório)
+ARQUIVO_HISTORICO = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'megasena_full_history.csv')
+
+# Versão do formato do cache: mudar invalida caches antigos
+VERSAO_CACHE = 1
+
+# Coluna do CSV (já normalizada em snake_case, sem acentos) -> (nome interno, tipo)
+# Valores monetários viram centavos em int64 para evitar erros de ponto flutuante.
+COLUNAS = {
+    'concurso': ('concurso', np.int32),
+    'data_do_sorteio': ('data', 'datetime64[D]'),
+    'data_sorteio': ('data', 'datetime64[D]'),
+    'ganhadores_6_acertos': ('ganhadores_6', np.int32),
+    'cidade_uf': ('cidade_uf', str),
+    'rateio_6_acertos': ('rateio_6', 'centavos'),
+    'ganhadores_5_acertos': ('ganhadores_5', np.int32),
+    'rateio_5_acertos': ('rateio_5', 'centavos'),
+    'ganhadores_4_acertos': ('ganhadores_4', np.int32),
+    'rateio_4_acertos': ('rateio_4', 'centavos'),
+    'acumulado_6_acertos': ('acumulado_6', 'centavos'),
+    'arrecadacao_total': ('arrecadacao_total', 'centavos'),
+    'estimativa_premio': ('estimativa_premio', 'centavos'),
+    'acumulado_sorteio_especial_mega_da_virada': ('acumulado_virada', 'centavos'),
+}
+COLUNAS_BOLAS = [f'bola{i}' for i in range(1, DEZENAS_POR_JOGO + 1)]
+
+# Nomes originais do CSV da Caixa, usados ao montar um DataFrame pandas
+NOMES_ORIGINAIS = {
+    'concurso': 'Concurso',
+    'data': 'Data do Sorteio',
+    'ganhadores_6': 'Ganhadores 6 acertos',
+    'cidade_uf': 'Cidade / UF',
+    'rateio_6': 'Rateio 6 acertos',
+    'ganhadores_5': 'Ganhadores 5 acertos',
+    'rateio_5': 'Rateio 5 acertos',
+    'ganhadores_4': 'Ganhadores 4 acertos',
+    'rateio_4': 'Rateio 4 acertos',
+    'acumulado_6': 'Acumulado 6 acertos',
+    'arrecadacao_total': 'Arrecadação Total',
+    'estimativa_premio': 'Estimativa prêmio',
+    'acumulado_virada': 'Acumulado Sorteio Especial Mega da Virada',
+}
+
+
+def _normalizar_nome(nome):
+    """'Arrecadação Total' -> 'arrecadacao_total'; 'Cidade / UF' -> 'cidade_uf'."""
+    sem_acento = unicodedata.normalize('NFKD', nome).encode('ascii', 'ignore').decode('ascii')
+    return re.sub(r'[^a-z0-9]+', '_', sem_acento.lower()).strip('_')
+
+
+def _centavos(texto):
+    """'R$1.714.650,23' -> 171465023. Vazio vira 0."""
+    texto = texto.replace('R$', '').replace(' ', '').strip()
+    if not texto:
+        return 0
+    if ',' in texto:
+        inteiro, decimal = texto.replace('.', '').split(',')
+    else:
+        inteiro, decimal = texto, ''
+    return int(inteiro or 0) * 100 + int((decimal + '00')[:2])
+
+
+def _data(texto):
+    for formato in ('%d/%m/%Y', '%Y-%m-%d'):
+        try:
+            return np.datetime64(datetime.strptime(texto.strip(), formato).date(), 'D')
+        except ValueError:
+            continue
+    return None
+
+
+def _inteiro(texto):
+    texto = texto.strip()
+    return int(float(texto)) if texto else 0
+
+
+def _ler_csv(caminho):
+    """Lê o CSV (separador ';' ou ',', cabeçalho original ou snake_case) em colunas tipadas."""
+    with open(caminho, encoding='utf-8', newline='') as arquivo:
+        primeira_linha = arquivo.readline()
+        arquivo.seek(0)
+        separador = ';' if primeira_linha.count(';') >= primeira_linha.count(',') else ','
+        leitor = csv.reader(arquivo, delimiter=separador)
+        cabecalho = [_normalizar_nome(nome) for nome in next(leitor)]
+        linhas = list(leitor)
+
+    indices = {nome: i for i, nome in enumerate(cabecalho)}
+    if 'concurso' not in indices or not any(nome in indices for nome in ('data_do_sorteio', 'data_sorteio')):
+        raise ValueError(f"Colunas de concurso/data não encontradas em {caminho}. Verifique o CSV.")
+    faltando = [nome for nome in COLUNAS_BOLAS if nome not in indices]
+    if faltando:
+        raise ValueError(f"Colunas de bolas não encontradas: {faltando}.")
+
+    # Datas inválidas descartam a linha inteira (equivalente ao dropna dos scripts antigos)
+    coluna_data = indices.get('data_do_sorteio', indices.get('data_sorteio'))
+    datas = [_data(linha[coluna_data]) if len(linha) > coluna_data else None for linha in linhas]
+    validas = [i for i, data in enumerate(datas) if data is not None]
+    linhas = [linhas[i] for i in validas]
+
+    colunas = {
+        'data': np.array([datas[i] for i in validas], dtype='datetime64[D]'),
+        'bolas': np.array([[_inteiro(linha[indices[nome]]) for nome in COLUNAS_BOLAS] for linha in linhas],
+                          dtype=np.int8).reshape(-1, DEZENAS_POR_JOGO),
+    }
+    for nome_csv, (nome, tipo) in COLUNAS.items():
+        if nome in colunas or nome_csv not in indices:
+            continue
+        valores = [linha[indices[nome_csv]] if len(linha) > indices[nome_csv] else '' for linha in linhas]
+        if tipo == 'centavos':
+            colunas[nome] = np.array([_centavos(v) for v in valores], dtype=np.int64)
+        elif tipo is str:
+            colunas[nome] = np.array(valores, dtype=str)
+        else:
+            colunas[nome] = np.array([_inteiro(v) for v in valores], dtype=tipo)
+
+    return colunas
+
+
+def caminho_cache(caminho_csv):
+    """Diretório do cache colunar, ao lado do CSV: data/.megasena_full_history.cache/"""
+    pasta, nome = os.path.split(os.path.abspath(caminho_csv))
+    return os.path.join(pasta, f'.{os.path.splitext(nome)[0]}.cache')
+
+
+def _assinatura_csv(caminho_csv):
+    estado = os.stat(caminho_csv)
+    return {'versao': VERSAO_CACHE, 'mtime_ns': estado.st_mtime_ns, 'tamanho': estado.st_size}
+
+
+def _cache_valido(pasta, assinatura):
+    try:
+        with open(os.path.join(pasta, 'meta.json'), encoding='utf-8') as arquivo:
+            meta = json.load(arquivo)
+    except (OSError, ValueError):
+        return None
+    if any(meta.get(chave) != valor for chave, valor in assinatura.items()):
+        return None
+    return meta
+
+
+def _gravar_cache(pasta, colunas, assinatura):
+    # Grava em um diretório temporário e troca de uma vez: leitores nunca veem um cache pela metade
+    temporaria = f'{pasta}.tmp{os.getpid()}'
+    shutil.rmtree(temporaria, ignore_errors=True)
+    os.makedirs(temporaria)
+    for nome, valores in colunas.items():
+        np.save(os.path.join(temporaria, f'{nome}.npy'), valores)
+    with open(os.path.join(temporaria, 'meta.json'), 'w', encoding='utf-8') as arquivo:
+        json.dump({**assinatura, 'colunas': sorted(colunas), 'linhas': len(colunas['data'])}, arquivo)
+
+    shutil.rmtree(pasta, ignore_errors=True)
+    os.replace(temporaria, pasta)
+
+
+def carregar_historico(caminho=ARQUIVO_HISTORICO, usar_cache=True):
+    """
+    Carrega o histórico de sorteios como um dicionário de arrays NumPy:
+    - 'concurso' (int32), 'data' (datetime64[D]), 'bolas' (n, 6) int8
+    - 'ganhadores_6/5/4' (int32), 'rateio_6/5/4', 'acumulado_6', 'arrecadacao_total',
+      'estimativa_premio', 'acumulado_virada' (int64, em centavos), 'cidade_uf' (str)
+
+    Na primeira leitura o CSV é convertido para um cache colunar (.npy) ao lado dele;
+    as leituras seguintes mapeiam o cache em memória (sem pandas e sem parsing de texto).
+    O cache é refeito automaticamente quando o CSV muda (mtime ou tamanho).
+    """
+    if not usar_cache:
+        return _ler_csv(caminho)
+
+    pasta = caminho_cache(caminho)
+    assinatura = _assinatura_csv(caminho)
+    meta = _cache_valido(pasta, assinatura)
+
+    if meta is None:
+        colunas = _ler_csv(caminho)
+        try:
+            _gravar_cache(pasta, colunas, assinatura)
+        except OSError as e:
+            print(f"Aviso: Não foi possível gravar o cache do histórico ({e}).")
+        return colunas
+
+    return {nome: np.load(os.path.join(pasta, f'{nome}.npy'), mmap_mode='r') for nome in meta['colunas']}
+
+
+def para_dataframe(historico):
+    """Monta um DataFrame pandas com os nomes de coluna originais do CSV (Bola1..Bola6 etc.)."""
+    import pandas as pd
+
+    dados = {}
+    for nome, valores in historico.items():
+        if nome == 'bolas':
+            for i in range(DEZENAS_POR_JOGO):
+                dados[f'Bola{i + 1}'] = np.asarray(valores[:, i], dtype=np.int64)
+        else:
+            dados[NOMES_ORIGINAIS.get(nome, nome)] = np.asarray(valores)
+    df = pd.DataFrame(dados)
+    df['Data do Sorteio'] = df['Data do Sorteio'].astype('datetime64[ns]')
+    return df
+
+
+def tabelas_acumuladas(bolas):
+    """
+    Tabelas acumuladas de um conjunto de sorteios (na ordem recebida):
+    a linha i soma os i primeiros sorteios e a linha 0 é zero.
+    Retorna (contagens (n+1, 60) por dezena, somas (n+1, SOMA_MAXIMA+1) por soma).
+    Uma janela [i, j) sai de uma subtração de linhas: tabela[j] - tabela[i].
+    """
+    bolas = np.asarray(bolas, dtype=np.int64)
+    num_sorteios = len(bolas)
+    linhas = np.arange(num_sorteios)
+
+    ocorrencias = np.zeros((num_sorteios, TOTAL_DEZENAS + 1), dtype=np.int32)
+    ocorrencias[linhas[:, None], bolas] = 1
+    ocorrencias_somas = np.zeros((num_sorteios, SOMA_MAXIMA + 1), dtype=np.int32)
+    ocorrencias_somas[linhas, bolas.sum(axis=1)] = 1
+
+    contagens = np.vstack((np.zeros((1, TOTAL_DEZENAS), dtype=np.int32), np.cumsum(ocorrencias[:, 1:], axis=0)))
+    somas = np.vstack((np.zeros((1, SOMA_MAXIMA + 1), dtype=np.int32), np.cumsum(ocorrencias_somas, axis=0)))
+    return contagens, somas
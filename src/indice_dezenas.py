@@ -0,0 +1,274 @@
+import json
+import os
+import numpy as np
+from gerador import TOTAL_DEZENAS
+from historico import ARQUIVO_HISTORICO, carregar_historico
+
+# Índice persistido ao lado do CSV
+ARQUIVO_INDICE = os.path.join(os.path.dirname(ARQUIVO_HISTORICO), '.indice_dezenas.json')
+
+VERSAO_INDICE = 1
+
+# Datas ficam como dias desde 1970-01-01 (int): cabem no JSON e a diferença já é em dias
+EPOCA = np.datetime64('1970-01-01', 'D')
+
+
+def _dia(data):
+    return int((np.datetime64(data, 'D') - EPOCA).astype(np.int64))
+
+
+def dia_para_data(dia):
+    """Converte o inteiro de dias usado no índice de volta para datetime64[D]."""
+    return EPOCA + np.timedelta64(int(dia), 'D')
+
+
+def indice_vazio():
+    """
+    Estado por dezena (listas de 60 posições, índice = dezena - 1):
+    - ultimo_concurso / ultimo_dia: última aparição (None se nunca saiu)
+    - inicio_sequencia: concurso em que começou a sequência consecutiva mais recente
+    - maior_hiato_dias (+ _de/_ate em dias) e maior_hiato_concursos (+ _de/_ate em concursos):
+      maior intervalo entre duas aparições; em empate vale o primeiro. Em concursos, o
+      intervalo é a diferença entre os números dos concursos (aparições seguidas = 1),
+      a mesma medida de consultas_hiatos.hiatos
+    - maior_sequencia e sequencias_recorde: recorde de concursos seguidos e todas as
+      faixas [inicio, fim] que o atingiram
+    - histograma_hiatos: quantas vezes cada intervalo (em concursos) ocorreu
+    """
+    vazio = [None] * TOTAL_DEZENAS
+    return {
+        'versao': VERSAO_INDICE,
+        'concurso_atual': None,
+        'dia_atual': None,
+        'ultimo_sorteio': None,
+        'ultimo_concurso': list(vazio),
+        'ultimo_dia': list(vazio),
+        'inicio_sequencia': list(vazio),
+        'maior_hiato_dias': [0] * TOTAL_DEZENAS,
+        'maior_hiato_dias_de': list(vazio),
+        'maior_hiato_dias_ate': list(vazio),
+        'maior_hiato_concursos': [0] * TOTAL_DEZENAS,
+        'maior_hiato_concursos_de': list(vazio),
+        'maior_hiato_concursos_ate': list(vazio),
+        'maior_sequencia': [0] * TOTAL_DEZENAS,
+        'sequencias_recorde': [[] for _ in range(TOTAL_DEZENAS)],
+        'histograma_hiatos': [[] for _ in range(TOTAL_DEZENAS)],
+    }
+
+
+def adicionar_sorteio(indice, concurso, data, bolas):
+    """
+    Atualiza o índice com um novo sorteio em O(6): só as 6 dezenas sorteadas mudam.
+    Os sorteios devem chegar em ordem crescente de concurso.
+    """
+    concurso = int(concurso)
+    if indice['concurso_atual'] is not None and concurso <= indice['concurso_atual']:
+        raise ValueError(f"Concurso {concurso} já está no índice (atual: {indice['concurso_atual']}).")
+    dia = _dia(data)
+
+    for dezena in bolas:
+        d = int(dezena) - 1
+        anterior = indice['ultimo_concurso'][d]
+
+        if anterior is None:
+            indice['inicio_sequencia'][d] = concurso
+        else:
+            hiato = concurso - anterior
+            histograma = indice['histograma_hiatos'][d]
+            if hiato >= len(histograma):
+                histograma.extend([0] * (hiato + 1 - len(histograma)))
+            histograma[hiato] += 1
+
+            hiato_dias = dia - indice['ultimo_dia'][d]
+            if hiato_dias > indice['maior_hiato_dias'][d]:
+                indice['maior_hiato_dias'][d] = hiato_dias
+                indice['maior_hiato_dias_de'][d] = indice['ultimo_dia'][d]
+                indice['maior_hiato_dias_ate'][d] = dia
+            if hiato > indice['maior_hiato_concursos'][d]:
+                indice['maior_hiato_concursos'][d] = hiato
+                indice['maior_hiato_concursos_de'][d] = anterior
+                indice['maior_hiato_concursos_ate'][d] = concurso
+
+            # Concurso seguido mantém a sequência; qualquer salto começa uma nova
+            if hiato != 1:
+                indice['inicio_sequencia'][d] = concurso
+
+        indice['ultimo_concurso'][d] = concurso
+        indice['ultimo_dia'][d] = dia
+
+        inicio = indice['inicio_sequencia'][d]
+        tamanho = concurso - inicio + 1
+        if tamanho > indice['maior_sequencia'][d]:
+            indice['maior_sequencia'][d] = tamanho
+            indice['sequencias_recorde'][d] = [[inicio, concurso]]
+        elif tamanho == indice['maior_sequencia'][d]:
+            indice['sequencias_recorde'][d].append([inicio, concurso])
+
+    indice['concurso_atual'] = concurso
+    indice['dia_atual'] = dia
+    indice['ultimo_sorteio'] = [concurso] + sorted(int(b) for b in bolas)
+    return indice
+
+
+def construir_indice(historico):
+    """
+    Reconstrói o índice do zero, de forma vetorizada sobre todas as aparições
+    (formato longo ordenado por dezena e concurso), sem percorrer sorteio a sorteio.
+    """
+    indice = indice_vazio()
+    if len(historico['concurso']) == 0:
+        return indice
+
+    ordem_sorteios = np.argsort(historico['concurso'], kind='stable')
+    concursos_sorteio = np.asarray(historico['concurso'])[ordem_sorteios].astype(np.int64)
+    dias_sorteio = (np.asarray(historico['data'])[ordem_sorteios] - EPOCA).astype(np.int64)
+    bolas_sorteio = np.asarray(historico['bolas'])[ordem_sorteios].astype(np.int64)
+
+    # Formato longo: uma linha por (dezena, concurso), ordenado por dezena e depois concurso
+    dezenas = bolas_sorteio.ravel() - 1
+    concursos = np.repeat(concursos_sorteio, bolas_sorteio.shape[1])
+    dias = np.repeat(dias_sorteio, bolas_sorteio.shape[1])
+    ordem = np.lexsort((concursos, dezenas))
+    dezenas, concursos, dias = dezenas[ordem], concursos[ordem], dias[ordem]
+
+    # Intervalos entre aparições consecutivas da mesma dezena
+    mesma_dezena = np.concatenate(([False], dezenas[1:] == dezenas[:-1]))
+    hiatos = np.where(mesma_dezena, np.diff(concursos, prepend=0), 0)
+    hiatos_dias = np.where(mesma_dezena, np.diff(dias, prepend=0), 0)
+
+    # Sequências: começa uma nova sempre que a dezena muda ou o concurso não é o seguinte
+    nova_sequencia = ~mesma_dezena | (hiatos != 1)
+    id_sequencia = np.cumsum(nova_sequencia) - 1
+    inicios_sequencia = concursos[nova_sequencia]
+    tamanhos_sequencia = np.bincount(id_sequencia)
+    dezena_sequencia = dezenas[nova_sequencia]
+    fins_sequencia = inicios_sequencia + tamanhos_sequencia - 1
+
+    limites = np.searchsorted(dezenas, np.arange(TOTAL_DEZENAS + 1))
+    limites_seq = np.searchsorted(dezena_sequencia, np.arange(TOTAL_DEZENAS + 1))
+
+    for d in range(TOTAL_DEZENAS):
+        a, b = limites[d], limites[d + 1]
+        if a == b:
+            continue
+        indice['ultimo_concurso'][d] = int(concursos[b - 1])
+        indice['ultimo_dia'][d] = int(dias[b - 1])
+
+        if b - a > 1:
+            # argmax devolve a primeira ocorrência do máximo (empate: vale o primeiro)
+            i = a + 1 + int(np.argmax(hiatos_dias[a + 1:b]))
+            indice['maior_hiato_dias'][d] = int(hiatos_dias[i])
+            indice['maior_hiato_dias_de'][d] = int(dias[i - 1])
+            indice['maior_hiato_dias_ate'][d] = int(dias[i])
+            i = a + 1 + int(np.argmax(hiatos[a + 1:b]))
+            indice['maior_hiato_concursos'][d] = int(hiatos[i])
+            indice['maior_hiato_concursos_de'][d] = int(concursos[i - 1])
+            indice['maior_hiato_concursos_ate'][d] = int(concursos[i])
+            indice['histograma_hiatos'][d] = np.bincount(hiatos[a + 1:b]).tolist()
+
+        sa, sb = limites_seq[d], limites_seq[d + 1]
+        maior = int(tamanhos_sequencia[sa:sb].max())
+        recordes = np.flatnonzero(tamanhos_sequencia[sa:sb] == maior) + sa
+        indice['maior_sequencia'][d] = maior
+        indice['sequencias_recorde'][d] = [[int(inicios_sequencia[i]), int(fins_sequencia[i])] for i in recordes]
+        indice['inicio_sequencia'][d] = int(inicios_sequencia[sb - 1])
+
+    indice['concurso_atual'] = int(concursos_sorteio[-1])
+    indice['dia_atual'] = int(dias_sorteio[-1])
+    indice['ultimo_sorteio'] = [int(concursos_sorteio[-1])] + sorted(bolas_sorteio[-1].tolist())
+    return indice
+
+
+def salvar_indice(indice, caminho=ARQUIVO_INDICE):
+    temporario = f'{caminho}.tmp{os.getpid()}'
+    with open(temporario, 'w', encoding='utf-8') as arquivo:
+        json.dump(indice, arquivo)
+    os.replace(temporario, caminho)
+
+
+def carregar_indice(caminho=ARQUIVO_INDICE):
+    """Lê o índice salvo, ou None se não existir ou for de outra versão."""
+    try:
+        with open(caminho, encoding='utf-8') as arquivo:
+            indice = json.load(arquivo)
+    except (OSError, ValueError):
+        return None
+    return indice if indice.get('versao') == VERSAO_INDICE else None
+
+
+def atualizar_indice(historico=None, caminho=ARQUIVO_INDICE):
+    """
+    Devolve o índice em dia com o histórico: carrega o salvo e aplica apenas os
+    sorteios novos (O(6) cada). Reconstrói do zero se não houver índice salvo ou se
+    o último sorteio indexado não bater com o histórico (CSV corrigido, por exemplo).
+    """
+    if historico is None:
+        historico = carregar_historico()
+    concursos = np.asarray(historico['concurso'])
+    indice = carregar_indice(caminho)
+
+    if indice is not None and indice['concurso_atual'] is not None:
+        posicao = np.flatnonzero(concursos == indice['concurso_atual'])
+        ultimo = indice['ultimo_sorteio']
+        if posicao.size != 1 or sorted(np.asarray(historico['bolas'][posicao[0]]).tolist()) != ultimo[1:]:
+            indice = None
+
+    if indice is None:
+        indice = construir_indice(historico)
+    else:
+        novos = np.flatnonzero(concursos > indice['concurso_atual'])
+        novos = novos[np.argsort(concursos[novos], kind='stable')]
+        if novos.size == 0:
+            return indice
+        for i in novos:
+            adicionar_sorteio(indice, concursos[i], historico['data'][i], historico['bolas'][i])
+
+    try:
+        salvar_indice(indice, caminho)
+    except OSError as e:
+        print(f"Aviso: Não foi possível salvar o índice de dezenas ({e}).")
+    return indice
+
+
+# --- Consultas (leitura direta do estado, sem varrer o histórico) ---
+
+def maior_hiato(indice):
+    """Maior intervalo em dias entre duas aparições: (dezena, dia_de, dia_ate, dias)."""
+    d = int(np.argmax(indice['maior_hiato_dias']))
+    return d + 1, indice['maior_hiato_dias_de'][d], indice['maior_hiato_dias_ate'][d], indice['maior_hiato_dias'][d]
+
+
+def maiores_sequencias(indice):
+    """Recorde de concursos seguidos e todas as faixas que o atingiram: (recorde, [(dezena, inicio, fim)])."""
+    recorde = max(indice['maior_sequencia'])
+    faixas = [(d + 1, inicio, fim)
+              for d in range(TOTAL_DEZENAS) if indice['maior_sequencia'][d] == recorde
+              for inicio, fim in indice['sequencias_recorde'][d]]
+    return recorde, faixas
+
+
+def sequencia_atual(indice, dezena):
+    """Quantos concursos seguidos a dezena vem saindo até o último sorteio indexado."""
+    d = dezena - 1
+    if indice['ultimo_concurso'][d] != indice['concurso_atual']:
+        return 0
+    return indice['concurso_atual'] - indice['inicio_sequencia'][d] + 1
+
+
+def nunca_sorteadas(indice):
+    """Dezenas que ainda não saíram em nenhum sorteio indexado (histórico parcial ou vazio)."""
+    return [d + 1 for d, dia in enumerate(indice['ultimo_dia']) if dia is None]
+
+
+def mais_atrasada(indice):
+    """
+    Dezena há mais tempo sem sair, entre as que já saíram alguma vez:
+    (dezena, dia da última aparição, dias sem sair), ou None se nenhuma saiu.
+    As que nunca saíram não têm última aparição; ver nunca_sorteadas.
+    """
+    vistas = [d for d, dia in enumerate(indice['ultimo_dia']) if dia is not None]
+    if not vistas:
+        return None
+    # min devolve a primeira dezena em caso de empate, como o argmin
+    d = min(vistas, key=lambda v: indice['ultimo_dia'][v])
+    return d + 1, indice['ultimo_dia'][d], indice['dia_atual'] - indice['ultimo_dia'][d]
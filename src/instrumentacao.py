@@ -0,0 +1,226 @@
+import contextlib
+import cProfile
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+
+# Variáveis de ambiente que ligam a instrumentação (herdadas pelos workers):
+# MEGASENA_PERFIL=arquivo.json (ou 1 para o nome padrão), MEGASENA_PERFIL_CPROFILE=1, MEGASENA_PERFIL_TRACEMALLOC=1
+VARIAVEL = 'MEGASENA_PERFIL'
+VARIAVEL_CPROFILE = 'MEGASENA_PERFIL_CPROFILE'
+VARIAVEL_TRACEMALLOC = 'MEGASENA_PERFIL_TRACEMALLOC'
+
+PASTA_PADRAO = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'perfis')
+
+# Contexto nulo compartilhado: com a instrumentação desligada, fase() não aloca nada
+_NULO = contextlib.nullcontext()
+
+_estado = {
+    'ativo': False,
+    'arquivo': None,
+    'perfilador': None,
+    'tracemalloc': False,
+    'pilha': [],
+}
+_eventos = []
+
+
+def _rss_atual_mb():
+    """Memória residente atual em MB (Linux, via /proc); None em outros sistemas."""
+    try:
+        with open('/proc/self/statm') as arquivo:
+            return int(arquivo.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def pico_rss_processo_mb():
+    """
+    Pico de memória residente do processo desde o início, em MB (None fora de sistemas Unix).
+    É cumulativo: não diz quanto uma fase usou, só o máximo do processo até aquele ponto.
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reporta em KB; macOS, em bytes
+    return pico / (1024 * 1024) if sys.platform == 'darwin' else pico / 1024
+
+
+def _agora_us():
+    # perf_counter usa um relógio monotônico do sistema: comparável entre processos
+    return time.perf_counter_ns() // 1000
+
+
+def ativo():
+    return _estado['ativo']
+
+
+def ativar(arquivo=None, cprofile=False, memoria_python=False):
+    """
+    Liga a instrumentação neste processo. Os workers criados depois herdam a
+    configuração pelas variáveis de ambiente e devolvem seus eventos (ver coletar_eventos).
+    `cprofile` perfila o processo principal; `memoria_python` liga o tracemalloc
+    (pico do heap Python por fase e maiores alocações no relatório).
+    """
+    if arquivo is None:
+        arquivo = os.path.join(PASTA_PADRAO, f"perfil_{datetime.now():%Y%m%d_%H%M%S}.json")
+    _estado.update(ativo=True, arquivo=arquivo)
+    os.environ[VARIAVEL] = arquivo
+
+    if cprofile and _estado['perfilador'] is None:
+        _estado['perfilador'] = cProfile.Profile()
+        _estado['perfilador'].enable()
+    if memoria_python and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        _estado['tracemalloc'] = True
+
+
+def ativar_pelo_ambiente():
+    """Liga a instrumentação se MEGASENA_PERFIL estiver definida. Retorna True se ligou."""
+    valor = os.environ.get(VARIAVEL)
+    if not valor or valor == '0':
+        return False
+    # Nos workers só os eventos são coletados: cProfile e tracemalloc ficam no processo principal
+    principal = multiprocessing.parent_process() is None
+    ativar(None if valor == '1' else valor,
+           cprofile=principal and os.environ.get(VARIAVEL_CPROFILE) == '1',
+           memoria_python=principal and os.environ.get(VARIAVEL_TRACEMALLOC) == '1')
+    return True
+
+
+def _depois_do_fork():
+    # Um worker criado por fork herdaria o perfilador e o tracemalloc do processo principal
+    if _estado['perfilador'] is not None:
+        _estado['perfilador'].disable()
+        _estado['perfilador'] = None
+    if _estado['tracemalloc']:
+        tracemalloc.stop()
+        _estado['tracemalloc'] = False
+    _estado['pilha'] = []
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_depois_do_fork)
+
+
+@contextlib.contextmanager
+def _fase_ativa(nome, argumentos):
+    pilha = _estado['pilha']
+    quadro = {'pico_filhas': 0}
+    if _estado['tracemalloc']:
+        # O pico do tracemalloc é global: antes de zerá-lo, repassa o valor à fase externa
+        pico = tracemalloc.get_traced_memory()[1]
+        if pilha:
+            pilha[-1]['pico_filhas'] = max(pilha[-1]['pico_filhas'], pico)
+        tracemalloc.reset_peak()
+    pilha.append(quadro)
+    rss_inicial = _rss_atual_mb()
+    inicio = _agora_us()
+    try:
+        yield
+    finally:
+        fim = _agora_us()
+        pilha.pop()
+        args = dict(argumentos)
+        args.update(rss_inicial_mb=rss_inicial, rss_final_mb=_rss_atual_mb(), pico_rss_processo_mb=pico_rss_processo_mb())
+        if _estado['tracemalloc']:
+            pico = max(tracemalloc.get_traced_memory()[1], quadro['pico_filhas'])
+            args['pico_python_mb'] = pico / (1024 * 1024)
+            if pilha:
+                pilha[-1]['pico_filhas'] = max(pilha[-1]['pico_filhas'], pico)
+        _eventos.append({'name': nome, 'ph': 'X', 'ts': inicio, 'dur': fim - inicio,
+                         'pid': os.getpid(), 'tid': threading.get_ident(), 'args': args})
+
+
+def fase(nome, **argumentos):
+    """
+    Marca uma fase do pipeline: `with fase('historico'): ...`.
+    Desligada, devolve um contexto nulo (custo de uma chamada de função).
+    """
+    if not _estado['ativo']:
+        return _NULO
+    return _fase_ativa(nome, argumentos)
+
+
+def coletar_eventos():
+    """Eventos deste processo desde a última coleta (para um worker devolver ao principal)."""
+    pid = os.getpid()
+    proprios = [e for e in _eventos if e['pid'] == pid]
+    _eventos.clear()
+    return proprios
+
+
+def registrar_eventos(eventos):
+    """Junta ao relatório os eventos devolvidos por um worker."""
+    if _estado['ativo'] and eventos:
+        _eventos.extend(eventos)
+
+
+def resumo():
+    """
+    Tempo total por nome de fase, somando todos os processos, e o pico de RSS do processo
+    até o fim da fase (cumulativo, ver pico_rss_processo_mb). Com tracemalloc ligado,
+    inclui o pico do heap Python medido dentro da própria fase.
+    """
+    fases = {}
+    for evento in _eventos:
+        atual = fases.setdefault(evento['name'], {'chamadas': 0, 'segundos': 0.0, 'pico_rss_processo_mb': 0.0})
+        atual['chamadas'] += 1
+        atual['segundos'] += evento['dur'] / 1e6
+        atual['pico_rss_processo_mb'] = max(atual['pico_rss_processo_mb'], evento['args'].get('pico_rss_processo_mb') or 0.0)
+        if 'pico_python_mb' in evento['args']:
+            atual['pico_python_mb'] = max(atual.get('pico_python_mb', 0.0), evento['args']['pico_python_mb'])
+    return fases
+
+
+def salvar(arquivo=None):
+    """
+    Grava os eventos em formato Chrome trace (abre em chrome://tracing ou ui.perfetto.dev),
+    com o resumo por fase nos metadados. Com cProfile ligado, grava também <arquivo>.prof.
+    Retorna o caminho gravado, ou None se a instrumentação estiver desligada.
+    """
+    if not _estado['ativo']:
+        return None
+    arquivo = arquivo or _estado['arquivo']
+    os.makedirs(os.path.dirname(os.path.abspath(arquivo)), exist_ok=True)
+
+    metadados = {'resumo': resumo(), 'pid_principal': os.getpid(), 'argv': sys.argv}
+    nomes = [{'name': 'process_name', 'ph': 'M', 'pid': pid, 'args': {'name': 'principal' if pid == os.getpid() else f'worker {pid}'}}
+             for pid in sorted({e['pid'] for e in _eventos})]
+
+    if _estado['tracemalloc']:
+        estatisticas = tracemalloc.take_snapshot().statistics('lineno')[:15]
+        metadados['maiores_alocacoes'] = [{'linha': str(e.traceback), 'mb': e.size / (1024 * 1024), 'blocos': e.count}
+                                          for e in estatisticas]
+    if _estado['perfilador'] is not None:
+        _estado['perfilador'].dump_stats(os.path.splitext(arquivo)[0] + '.prof')
+
+    with open(arquivo, 'w', encoding='utf-8') as saida:
+        json.dump({'traceEvents': nomes + _eventos, 'displayTimeUnit': 'ms', 'metadata': metadados}, saida)
+    return arquivo
+
+
+def imprimir_resumo():
+    fases = resumo()
+    if not fases:
+        return
+    # "pico do processo até aqui" é o ru_maxrss ao fim da fase; "pico Python da fase", o do tracemalloc
+    python = any('pico_python_mb' in dados for dados in fases.values())
+    print(f"{'fase':<28}{'chamadas':>9}{'segundos':>11}{'pico do processo até aqui (MB)':>32}"
+          + (f"{'pico Python da fase (MB)':>26}" if python else ''))
+    for nome, dados in sorted(fases.items(), key=lambda item: -item[1]['segundos']):
+        linha = f"{nome:<28}{dados['chamadas']:>9}{dados['segundos']:>11.3f}{dados['pico_rss_processo_mb']:>32.0f}"
+        if python:
+            linha += f"{dados['pico_python_mb']:>26.1f}" if 'pico_python_mb' in dados else f"{'-':>26}"
+        print(linha)
+
+
+# Workers (spawn ou fork) e scripts executados com MEGASENA_PERFIL ligam a coleta ao importar o módulo
+ativar_pelo_ambiente()
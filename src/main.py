@@ -1,6 +1,16 @@
 import secrets
+from gerador import gerar_jogos, nova_semente, MODO_SEGURO, MODO_RAPIDO
+
+# Gerador: MODO_SEGURO (entropia do sistema, padrão) ou MODO_RAPIDO (PCG64 semeado).
+# No modo rápido, a mesma SEMENTE sempre produz os mesmos jogos, na mesma ordem.
+MODO_RNG = MODO_SEGURO
+SEMENTE = None
+
+def gerar_jogo_mega_sena(indice=0, semente=None):
+    if MODO_RNG == MODO_RAPIDO:
+        # O jogo de posição `indice` da sequência da semente
+        return sorted(gerar_jogos(1, MODO_RAPIDO, semente, indice)[0].tolist())
 
-def gerar_jogo_mega_sena():
     # Usa o gerador criptograficamente seguro do sistema
     rng = secrets.SystemRandom()
     
@@ -11,9 +21,16 @@ def gerar_jogo_mega_sena():
     # Ordena apenas para facilitar a marcação no volante
     return sorted(numeros)
 
+semente = SEMENTE
+if MODO_RNG == MODO_RAPIDO and semente is None:
+    semente = nova_semente()
+    print(f"Semente: {semente}")
+
 # Exemplo de uso: Gerar 1 jogo
-print(f"Seu jogo: {gerar_jogo_mega_sena()}")
+print(f"Seu jogo: {gerar_jogo_mega_sena(0, semente)}")
 
 # Exemplo: Gerar 5 jogos (Bolão)
+# Para bolões grandes, com jogos distintos e filtros, use bolao.py: python src/bolao.py 100000 --saida bolao.txt
+# Para garantir uma quadra se 6 das suas dezenas saírem, use fechamento.py: python src/fechamento.py --dezenas 1,2,...,15
 # for i in range(5):
-#     print(f"Jogo {i+1}: {gerar_jogo_mega_sena()}")
\ No newline at end of file
+#     print(f"Jogo {i+1}: {gerar_jogo_mega_sena(i, semente)}")
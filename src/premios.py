@@ -0,0 +1,237 @@
+import argparse
+import math
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from math import comb
+import numpy as np
+from gerador import DEZENAS_POR_JOGO, TOTAL_DEZENAS
+from combinatoria import TOTAL_COMBINACOES, para_mascaras
+from backtest import formatar_reais
+
+# Probabilidade de um bilhete simples fazer exatamente quina e quadra
+P_QUINA = comb(DEZENAS_POR_JOGO, 5) * comb(TOTAL_DEZENAS - DEZENAS_POR_JOGO, 1) / TOTAL_COMBINACOES
+P_QUADRA = comb(DEZENAS_POR_JOGO, 4) * comb(TOTAL_DEZENAS - DEZENAS_POR_JOGO, 2) / TOTAL_COMBINACOES
+
+# Dezenas que podem ser datas (dia do mês): recebem o peso extra de aniversário
+DIA_MAXIMO = 31
+
+# Fração das apostas feitas em padrões (progressões aritméticas, como 01-02-03-04-05-06).
+# Padrões quase nunca são sorteados, então o histórico não identifica esta fração: é uma suposição.
+FRACAO_PADROES = 0.002
+
+# Pesos extras de aniversário testados na calibração (0 = escolha uniforme)
+GRADE_ANIVERSARIO = np.linspace(0.0, 1.5, 61)
+
+# Concursos na mediana móvel do preço efetivo por aposta (ver estimar_apostas)
+JANELA_PRECO = 51
+
+# Replicações do Monte Carlo de ganhadores por tarefa do pool
+REPLICACOES_POR_TAREFA = 2_000
+
+# Bilhetes avaliados quando nenhum é informado: um padrão muito popular, um com datas e um com dezenas altas
+BILHETES_EXEMPLO = [[1, 2, 3, 4, 5, 6], [3, 7, 12, 19, 25, 30], [33, 38, 41, 47, 52, 58]]
+
+# Categorias do número de ganhadores da sena por concurso: 0, 1, 2 e 3 ou mais
+CATEGORIAS_GANHADORES = ('0', '1', '2', '3+')
+
+
+def padroes():
+    """Máscaras das progressões aritméticas de 6 dezenas dentro de 1-60 (razão 1 a 11)."""
+    jogos = [[inicio + razao * i for i in range(DEZENAS_POR_JOGO)]
+             for razao in range(1, (TOTAL_DEZENAS - 1) // (DEZENAS_POR_JOGO - 1) + 1)
+             for inicio in range(1, TOTAL_DEZENAS - razao * (DEZENAS_POR_JOGO - 1) + 1)]
+    return np.sort(para_mascaras(np.array(jogos)))
+
+
+def pesos_dezenas(aniversario):
+    """Peso de escolha de cada dezena 1-60: 1 + aniversario para as dezenas até 31, 1 para as demais."""
+    return np.where(np.arange(1, TOTAL_DEZENAS + 1) <= DIA_MAXIMO, 1.0 + aniversario, 1.0)
+
+
+def simetrica_elementar(pesos, k=DEZENAS_POR_JOGO):
+    """Polinômio simétrico elementar e_k(pesos): a soma de Π pesos sobre todos os subconjuntos de k dezenas."""
+    e = np.zeros(k + 1)
+    e[0] = 1.0
+    for peso in pesos:
+        e[1:] = e[1:] + peso * e[:-1]
+    return e[k]
+
+
+def probabilidade_bilhetes(jogos, aniversario, fracao_padroes=FRACAO_PADROES):
+    """
+    Probabilidade de um apostador qualquer marcar cada jogo (n, 6) no modelo de popularidade:
+    uma fração `fracao_padroes` escolhe uma progressão ao acaso; os demais escolhem com
+    probabilidade proporcional ao produto dos pesos das dezenas (Π w / e₆(w)), o que com
+    aniversario = 0 é a escolha uniforme 1 / C(60, 6).
+    """
+    jogos = np.asarray(jogos, dtype=np.int64).reshape(-1, DEZENAS_POR_JOGO)
+    pesos = pesos_dezenas(aniversario)
+    livre = np.prod(pesos[jogos - 1], axis=1) / simetrica_elementar(pesos)
+    lista_padroes = padroes()
+    mascaras = para_mascaras(jogos)
+    lugar = np.minimum(np.searchsorted(lista_padroes, mascaras), len(lista_padroes) - 1)
+    eh_padrao = lista_padroes[lugar] == mascaras
+    return (1 - fracao_padroes) * livre + fracao_padroes * eh_padrao / len(lista_padroes)
+
+
+def estimar_apostas(sorteios):
+    """
+    Apostas simples equivalentes em cada concurso. As quadras são muitas (milhares por
+    concurso), então ganhadores_4 / P(quadra) estima as apostas de forma quase independente
+    da popularidade; a razão arrecadação / essa estimativa dá o preço efetivo por aposta,
+    que é suavizado por uma mediana móvel (acompanha os reajustes sem os ruídos de cada
+    sorteio). Onde não há arrecadação registrada, vale a estimativa pelas quadras.
+    """
+    pelas_quadras = sorteios['ganhadores_4'] / P_QUADRA
+    validos = (sorteios['arrecadacao_total'] > 0) & (sorteios['ganhadores_4'] > 0)
+    preco = np.where(validos, sorteios['arrecadacao_total'] / np.maximum(pelas_quadras, 1), np.nan)
+
+    metade = JANELA_PRECO // 2
+    janelas = np.lib.stride_tricks.sliding_window_view(np.pad(preco, metade, constant_values=np.nan), JANELA_PRECO)
+    com_dados = np.any(~np.isnan(janelas), axis=1)
+    preco_suavizado = np.full(len(preco), np.nan)
+    preco_suavizado[com_dados] = np.nanmedian(janelas[com_dados], axis=1)
+
+    usar_preco = (sorteios['arrecadacao_total'] > 0) & com_dados
+    apostas = np.where(usar_preco, sorteios['arrecadacao_total'] / np.where(usar_preco, preco_suavizado, 1), pelas_quadras)
+    return apostas, preco_suavizado
+
+
+def preparar_premios(historico):
+    """
+    Concursos em ordem, com as colunas de prêmios do histórico:
+    'bolas', 'ganhadores_6/5/4', 'rateio_5/4' (centavos), 'premio_sena' (centavos: o valor
+    dividido entre os ganhadores ou, se acumulou, o acumulado que ficou), 'apostas' e
+    'preco' (centavos por aposta, ver estimar_apostas).
+    """
+    ordem = np.argsort(historico['concurso'], kind='stable')
+    sorteios = {nome: np.asarray(historico[nome])[ordem] for nome in
+                ('concurso', 'data', 'bolas', 'ganhadores_6', 'ganhadores_5', 'ganhadores_4',
+                 'rateio_6', 'rateio_5', 'rateio_4', 'acumulado_6', 'arrecadacao_total')}
+    sorteios['bolas'] = sorteios['bolas'].astype(np.int64)
+    sorteios['premio_sena'] = np.where(sorteios['ganhadores_6'] > 0,
+                                       sorteios['rateio_6'] * sorteios['ganhadores_6'], sorteios['acumulado_6'])
+    sorteios['apostas'], sorteios['preco'] = estimar_apostas(sorteios)
+    return sorteios
+
+
+def log_verossimilhanca(ganhadores, taxas):
+    """Log-verossimilhança de Poisson dos ganhadores observados dadas as taxas esperadas."""
+    taxas = np.maximum(taxas, 1e-300)
+    return np.sum(ganhadores * np.log(taxas) - taxas - np.array([math.lgamma(g + 1) for g in ganhadores.tolist()]))
+
+
+def calibrar(sorteios, fracao_padroes=FRACAO_PADROES, grade=GRADE_ANIVERSARIO):
+    """
+    Ajusta o modelo aos ganhadores da sena de cada concurso: ganhadores_c ~ Poisson(λ_c),
+    λ_c = escala · apostas_c · P(sorteio_c). Para cada peso de aniversário da grade, a escala
+    de máxima verossimilhança tem forma fechada (Σ ganhadores / Σ apostas · P), o que absorve
+    bolões e erros na estimativa das apostas. Retorna o melhor ajuste: 'aniversario',
+    'escala', 'fracao_padroes', 'log_verossimilhanca' e 'taxas' (λ por concurso).
+    """
+    ganhadores = sorteios['ganhadores_6'].astype(np.int64)
+    melhor = None
+    for aniversario in grade:
+        esperado = sorteios['apostas'] * probabilidade_bilhetes(sorteios['bolas'], aniversario, fracao_padroes)
+        escala = ganhadores.sum() / esperado.sum()
+        taxas = escala * esperado
+        ajuste = log_verossimilhanca(ganhadores, taxas)
+        if melhor is None or ajuste > melhor['log_verossimilhanca']:
+            melhor = {'aniversario': float(aniversario), 'escala': float(escala), 'fracao_padroes': fracao_padroes,
+                      'log_verossimilhanca': float(ajuste), 'taxas': taxas}
+    return melhor
+
+
+def simular_ganhadores(taxas, replicacoes, semente=None):
+    """
+    Função worker: sorteia `replicacoes` histórias de ganhadores da sena, uma matriz
+    (replicações, concursos) de Poisson de uma vez. Cada apostador acerta a sena de forma
+    independente com probabilidade minúscula: Binomial(apostas, p) é Poisson(apostas · p),
+    então a população de milhões de apostadores entra só pelas taxas. Retorna as contagens
+    (concursos, 4) de replicações com 0, 1, 2 e 3+ ganhadores.
+    """
+    rng = np.random.default_rng(semente)
+    ganhadores = np.minimum(rng.poisson(taxas, size=(replicacoes, len(taxas))), len(CATEGORIAS_GANHADORES) - 1)
+    contagens = np.zeros((len(taxas), len(CATEGORIAS_GANHADORES)), dtype=np.int64)
+    for categoria in range(len(CATEGORIAS_GANHADORES)):
+        contagens[:, categoria] = np.count_nonzero(ganhadores == categoria, axis=0)
+    return contagens
+
+
+def monte_carlo_ganhadores(taxas, replicacoes=20_000, semente=None, num_processos=None):
+    """
+    Distribuição simulada do número de ganhadores por concurso, com as replicações
+    divididas em tarefas de REPLICACOES_POR_TAREFA pelo pool de processos.
+    Retorna a fração (concursos, 4) de replicações em cada categoria.
+    """
+    num_processos = num_processos or os.cpu_count() or 4
+    tamanhos = [min(REPLICACOES_POR_TAREFA, replicacoes - i) for i in range(0, replicacoes, REPLICACOES_POR_TAREFA)]
+    sementes = np.random.SeedSequence(semente).spawn(len(tamanhos))
+    contagens = np.zeros((len(taxas), len(CATEGORIAS_GANHADORES)), dtype=np.int64)
+    with ProcessPoolExecutor(max_workers=num_processos) as executor:
+        for parcial in executor.map(simular_ganhadores, [taxas] * len(tamanhos), tamanhos, sementes):
+            contagens += parcial
+    return contagens / replicacoes
+
+
+def valor_esperado(bilhete, sorteios, ajuste):
+    """
+    Valor esperado (centavos) de um bilhete simples em cada concurso, nas três faixas.
+    Na sena, se o bilhete acertar, os outros ganhadores são Poisson(λ) com
+    λ = escala · apostas · P(bilhete): a fração recebida é E[1 / (1 + X)] = (1 - e^-λ) / λ.
+    Quina e quadra usam o rateio pago no concurso. Retorna um dicionário com 'sena',
+    'quina', 'quadra', 'total' e 'concorrentes' (λ por concurso).
+    """
+    p_bilhete = probabilidade_bilhetes(bilhete, ajuste['aniversario'], ajuste['fracao_padroes'])[0]
+    concorrentes = ajuste['escala'] * sorteios['apostas'] * p_bilhete
+    fracao = np.where(concorrentes > 1e-12, -np.expm1(-concorrentes) / np.maximum(concorrentes, 1e-12), 1.0)
+    sena = sorteios['premio_sena'] * fracao / TOTAL_COMBINACOES
+    quina = sorteios['rateio_5'] * P_QUINA
+    quadra = sorteios['rateio_4'] * P_QUADRA
+    return {'sena': sena, 'quina': quina, 'quadra': quadra, 'total': sena + quina + quadra, 'concorrentes': concorrentes}
+
+
+def main():
+    from historico import carregar_historico
+
+    parser = argparse.ArgumentParser(description="Divisão de prêmios da Mega-Sena: popularidade dos bilhetes e valor esperado.")
+    parser.add_argument('--bilhete', action='append', default=[],
+                        help="Bilhete a avaliar (6 dezenas, ex.: 01,02,03,04,05,06); pode repetir")
+    parser.add_argument('--fracao-padroes', type=float, default=FRACAO_PADROES)
+    parser.add_argument('--replicacoes', type=int, default=20_000)
+    parser.add_argument('--semente', type=int, default=None)
+    parser.add_argument('--processos', type=int, default=None)
+    args = parser.parse_args()
+
+    inicio = time.time()
+    sorteios = preparar_premios(carregar_historico())
+    ajuste = calibrar(sorteios, args.fracao_padroes)
+    print(f"Calibração: peso de aniversário {ajuste['aniversario']:.3f} (dezenas 1-{DIA_MAXIMO}), "
+          f"escala {ajuste['escala']:.3f}, log-verossimilhança {ajuste['log_verossimilhanca']:.1f}")
+
+    simulado = monte_carlo_ganhadores(ajuste['taxas'], args.replicacoes, args.semente, args.processos)
+    observado = np.minimum(sorteios['ganhadores_6'], len(CATEGORIAS_GANHADORES) - 1)
+    print(f"{'Ganhadores':<12}{'Observado':>12}{'Simulado':>12}")
+    for categoria, nome in enumerate(CATEGORIAS_GANHADORES):
+        print(f"{nome:<12}{np.count_nonzero(observado == categoria):>12,}{simulado[:, categoria].sum():>12,.1f}")
+
+    bilhetes = [[int(d) for d in re.findall(r'\d+', texto)] for texto in args.bilhete] or BILHETES_EXEMPLO
+    preco_medio = np.nanmean(sorteios['preco'][-JANELA_PRECO:])
+    for bilhete in bilhetes:
+        if len(set(bilhete)) != DEZENAS_POR_JOGO or not all(1 <= d <= TOTAL_DEZENAS for d in bilhete):
+            raise SystemExit(f"Bilhete inválido: {bilhete} (6 dezenas distintas de 1 a 60).")
+        valor = valor_esperado(bilhete, sorteios, ajuste)
+        recentes = slice(-JANELA_PRECO, None)
+        print("-" * 30)
+        print(f"Bilhete {' '.join(f'{d:02d}' for d in sorted(bilhete))}: "
+              f"{valor['concorrentes'][recentes].mean():.2f} concorrentes esperados na sena por concurso (últimos {JANELA_PRECO})")
+        print(f"Valor esperado médio por concurso: {formatar_reais(valor['total'][recentes].mean())} "
+              f"(sena {formatar_reais(valor['sena'][recentes].mean())}, quina {formatar_reais(valor['quina'][recentes].mean())}, "
+              f"quadra {formatar_reais(valor['quadra'][recentes].mean())}) por aposta de ~{formatar_reais(preco_medio)}")
+    print(f"Concluído em {time.time() - inicio:.2f} segundos.")
+
+
+if __name__ == "__main__":
+    main()
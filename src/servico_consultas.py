@@ -0,0 +1,337 @@
+import argparse
+import asyncio
+import json
+import os
+import re
+import time
+from urllib.parse import urlsplit, parse_qs
+import numpy as np
+from gerador import DEZENAS_POR_JOGO, TOTAL_DEZENAS
+from combinatoria import para_mascaras
+from historico import ARQUIVO_HISTORICO, carregar_historico, tabelas_acumuladas
+from armazenamento import abrir_jogos, caminho_estatisticas
+from backtest import contar_bits
+
+HOST = '127.0.0.1'
+PORTA = 8765
+
+# Intervalo (segundos) entre verificações de mudança no CSV
+INTERVALO_RECARGA = 2.0
+
+# Limites de uma requisição: a linha inicial e os cabeçalhos cabem em poucos KB
+TAMANHO_MAXIMO_CABECALHO = 16 * 1024
+
+MENSAGENS_HTTP = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 500: 'Internal Server Error'}
+
+
+class ErroConsulta(ValueError):
+    """Parâmetro inválido em uma consulta (vira uma resposta 400)."""
+
+
+def _assinatura(caminho):
+    estado = os.stat(caminho)
+    return (estado.st_mtime_ns, estado.st_size)
+
+
+def carregar_simulacao(arquivo):
+    """
+    Tabelas acumuladas por bloco da simulação gravadas ao lado do armazenamento
+    (ver simulacao_e_historico.salvar_estatisticas), ou None se não houver tabelas
+    compatíveis com o arquivo.
+    """
+    caminho = caminho_estatisticas(arquivo)
+    if not os.path.exists(caminho):
+        return None
+    _, cabecalho = abrir_jogos(arquivo)
+    with np.load(caminho) as salvo:
+        if str(salvo['criado_em']) != cabecalho['criado_em']:
+            return None
+        return {k: salvo[k] for k in ('limites_blocos', 'contagens_acumuladas', 'somas_acumuladas')}
+
+
+def construir_indices(caminho_csv=ARQUIVO_HISTORICO, arquivo_simulacao=None):
+    """
+    Índices em memória que respondem cada consulta com buscas binárias e subtrações
+    de linhas, sem revarrer os sorteios:
+    - 'datas', 'concursos', 'mascaras': sorteios em ordem cronológica
+    - 'contagens_acumuladas', 'somas_acumuladas': tabelas acumuladas (ver historico.tabelas_acumuladas)
+    - 'ultima_posicao': posição do último sorteio de cada dezena (-1 se nunca saiu)
+    - 'simulacao': tabelas da simulação, se `arquivo_simulacao` tiver estatísticas gravadas
+    """
+    assinatura = _assinatura(caminho_csv)
+    historico = carregar_historico(caminho_csv)
+    ordem = np.argsort(historico['data'], kind='stable')
+    bolas = np.asarray(historico['bolas'])[ordem].astype(np.int64)
+    contagens, somas = tabelas_acumuladas(bolas)
+
+    ultima_posicao = np.full(TOTAL_DEZENAS + 1, -1, dtype=np.int64)
+    np.maximum.at(ultima_posicao, bolas.ravel(), np.repeat(np.arange(len(bolas)), DEZENAS_POR_JOGO))
+
+    return {
+        'assinatura': assinatura,
+        'carregado_em': time.time(),
+        'datas': np.asarray(historico['data'])[ordem],
+        'concursos': np.asarray(historico['concurso'])[ordem],
+        'mascaras': para_mascaras(bolas),
+        'contagens_acumuladas': contagens,
+        'somas_acumuladas': somas,
+        'ultima_posicao': ultima_posicao[1:],
+        'simulacao': carregar_simulacao(arquivo_simulacao) if arquivo_simulacao else None,
+    }
+
+
+def _parametro(parametros, nome, padrao=None):
+    valores = parametros.get(nome)
+    return valores[-1] if valores else padrao
+
+
+def _dezena(parametros):
+    texto = _parametro(parametros, 'dezena')
+    if texto is None:
+        return None
+    if not texto.isdigit() or not 1 <= int(texto) <= TOTAL_DEZENAS:
+        raise ErroConsulta(f"Dezena inválida: '{texto}' (use 1 a 60).")
+    return int(texto)
+
+
+def _janela(indices, parametros):
+    """Posições [i_inicio, i_fim) dos sorteios entre 'inicio' e 'fim' (AAAA-MM-DD, inclusivos)."""
+    datas = indices['datas']
+    try:
+        inicio = _parametro(parametros, 'inicio')
+        fim = _parametro(parametros, 'fim')
+        i_inicio = np.searchsorted(datas, np.datetime64(inicio, 'D'), side='left') if inicio else 0
+        i_fim = np.searchsorted(datas, np.datetime64(fim, 'D'), side='right') if fim else len(datas)
+    except ValueError:
+        raise ErroConsulta("Data inválida (use AAAA-MM-DD).") from None
+    return int(i_inicio), int(max(i_fim, i_inicio))
+
+
+def _intervalo(indices, i_inicio, i_fim):
+    datas = indices['datas']
+    return {
+        'sorteios': i_fim - i_inicio,
+        'de': str(datas[i_inicio]) if i_fim > i_inicio else None,
+        'ate': str(datas[i_fim - 1]) if i_fim > i_inicio else None,
+    }
+
+
+def consultar_frequencia(indices, parametros):
+    """Ocorrências de uma dezena (ou das 60) entre duas datas."""
+    i_inicio, i_fim = _janela(indices, parametros)
+    tabela = indices['contagens_acumuladas']
+    contagens = tabela[i_fim] - tabela[i_inicio]
+    dezena = _dezena(parametros)
+    resposta = _intervalo(indices, i_inicio, i_fim)
+    if dezena is None:
+        resposta['ocorrencias'] = contagens.tolist()
+    else:
+        resposta['dezena'] = dezena
+        resposta['ocorrencias'] = int(contagens[dezena - 1])
+        resposta['frequencia'] = resposta['ocorrencias'] / resposta['sorteios'] if resposta['sorteios'] else 0.0
+    return resposta
+
+
+def consultar_atraso(indices, parametros):
+    """Concursos desde a última aparição de uma dezena (ou das 60)."""
+    ultimo = len(indices['datas']) - 1
+    posicoes = indices['ultima_posicao']
+    dezena = _dezena(parametros)
+    dezenas = [dezena] if dezena else range(1, TOTAL_DEZENAS + 1)
+
+    atrasos = []
+    for d in dezenas:
+        posicao = int(posicoes[d - 1])
+        nunca = posicao < 0
+        atrasos.append({
+            'dezena': d,
+            'atraso': ultimo + 1 if nunca else ultimo - posicao,
+            'ultimo_concurso': None if nunca else int(indices['concursos'][posicao]),
+            'ultima_data': None if nunca else str(indices['datas'][posicao]),
+        })
+    return atrasos[0] if dezena else {'atrasos': atrasos}
+
+
+def consultar_somas(indices, parametros):
+    """Histograma das somas dos sorteios entre duas datas (apenas as somas que ocorreram)."""
+    i_inicio, i_fim = _janela(indices, parametros)
+    tabela = indices['somas_acumuladas']
+    histograma = tabela[i_fim] - tabela[i_inicio]
+    somas = np.flatnonzero(histograma)
+    resposta = _intervalo(indices, i_inicio, i_fim)
+    resposta['histograma'] = dict(zip(map(str, somas.tolist()), histograma[somas].tolist()))
+    resposta['media'] = float(np.dot(somas, histograma[somas]) / resposta['sorteios']) if resposta['sorteios'] else None
+    return resposta
+
+
+def consultar_bilhete(indices, parametros):
+    """Melhor acerto de um bilhete no histórico e os concursos em que fez quadra, quina ou sena."""
+    texto = _parametro(parametros, 'dezenas', '')
+    dezenas = [int(d) for d in re.findall(r'\d+', texto)]
+    if len(set(dezenas)) != DEZENAS_POR_JOGO or len(dezenas) != DEZENAS_POR_JOGO \
+            or not all(1 <= d <= TOTAL_DEZENAS for d in dezenas):
+        raise ErroConsulta(f"Esperadas 6 dezenas distintas de 1 a 60, encontrado '{texto}'.")
+
+    mascara = para_mascaras(np.array(dezenas))[0]
+    acertos = contar_bits(indices['mascaras'] & mascara)
+    resposta = {'dezenas': sorted(dezenas), 'maior_acerto': int(acertos.max()) if len(acertos) else 0}
+    for nome, k in (('quadras', 4), ('quinas', 5), ('senas', 6)):
+        posicoes = np.flatnonzero(acertos == k)
+        resposta[nome] = [{'concurso': int(indices['concursos'][p]), 'data': str(indices['datas'][p])} for p in posicoes]
+    return resposta
+
+
+def consultar_simulacao(indices, parametros):
+    """Frequência das dezenas e histograma das somas nos primeiros N jogos simulados."""
+    simulacao = indices['simulacao']
+    if simulacao is None:
+        raise ErroConsulta("Nenhuma simulação carregada (inicie o serviço com --simulados).")
+    limites = simulacao['limites_blocos']
+    texto = _parametro(parametros, 'quantidade', str(int(limites[-1])))
+    if not texto.isdigit():
+        raise ErroConsulta(f"Quantidade inválida: '{texto}'.")
+    # Arredonda para o limite de bloco abaixo, como o slider do painel
+    bloco = int(np.searchsorted(limites, int(texto), side='right') - 1)
+    somas = simulacao['somas_acumuladas'][bloco]
+    return {
+        'jogos': int(limites[bloco]),
+        'ocorrencias': simulacao['contagens_acumuladas'][bloco].tolist(),
+        'histograma': dict(zip(map(str, np.flatnonzero(somas).tolist()), somas[somas > 0].tolist())),
+    }
+
+
+def consultar_status(indices, parametros):
+    """Tamanho do histórico carregado e quando foi carregado."""
+    return {
+        'sorteios': len(indices['datas']),
+        'ultimo_concurso': int(indices['concursos'][-1]) if len(indices['concursos']) else None,
+        'carregado_em': indices['carregado_em'],
+        'simulacao': int(indices['simulacao']['limites_blocos'][-1]) if indices['simulacao'] else None,
+    }
+
+
+ROTAS = {
+    '/frequencia': consultar_frequencia,
+    '/atraso': consultar_atraso,
+    '/somas': consultar_somas,
+    '/bilhete': consultar_bilhete,
+    '/simulacao': consultar_simulacao,
+    '/status': consultar_status,
+}
+
+
+def responder(indices, alvo):
+    """Resolve uma URL ('/rota?parametros') sobre os índices e retorna (status, corpo JSON)."""
+    url = urlsplit(alvo)
+    consulta = ROTAS.get(url.path.rstrip('/') or '/')
+    if consulta is None:
+        return 404, {'erro': f"Rota desconhecida: {url.path}", 'rotas': sorted(ROTAS)}
+    try:
+        return 200, consulta(indices, parse_qs(url.query))
+    except ErroConsulta as e:
+        return 400, {'erro': str(e)}
+
+
+async def _atender(estado, leitor, escritor):
+    """Atende uma conexão HTTP/1.1 (keep-alive): uma requisição GET por vez até o cliente fechar."""
+    try:
+        while True:
+            try:
+                cabecalho = await leitor.readuntil(b'\r\n\r\n')
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                break
+            linhas = cabecalho.decode('latin-1').split('\r\n')
+            partes = linhas[0].split()
+            campos = {k.strip().lower(): v.strip() for k, _, v in (linha.partition(':') for linha in linhas[1:] if linha)}
+
+            if len(partes) != 3:
+                status, corpo = 400, {'erro': "Requisição inválida."}
+            elif partes[0] != 'GET':
+                status, corpo = 405, {'erro': "Apenas GET é suportado."}
+            else:
+                try:
+                    status, corpo = responder(estado['indices'], partes[1])
+                except Exception as e:
+                    status, corpo = 500, {'erro': str(e)}
+
+            dados = json.dumps(corpo, ensure_ascii=False).encode('utf-8')
+            fechar = campos.get('connection', '').lower() == 'close' or (len(partes) == 3 and partes[2] == 'HTTP/1.0')
+            escritor.write(
+                f"HTTP/1.1 {status} {MENSAGENS_HTTP[status]}\r\n"
+                f"Content-Type: application/json; charset=utf-8\r\n"
+                f"Content-Length: {len(dados)}\r\n"
+                f"Connection: {'close' if fechar else 'keep-alive'}\r\n\r\n".encode('latin-1') + dados)
+            await escritor.drain()
+            if fechar:
+                break
+    finally:
+        escritor.close()
+
+
+async def _vigiar_csv(estado, caminho_csv, arquivo_simulacao, intervalo):
+    """
+    Refaz os índices em uma thread quando o CSV muda; as consultas seguem usando os antigos
+    até a troca. Uma versão do CSV que falhou ao carregar só é tentada de novo quando o
+    arquivo mudar outra vez, e nenhum erro encerra a vigia.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        await asyncio.sleep(intervalo)
+        try:
+            assinatura = _assinatura(caminho_csv)
+        except OSError:
+            # Arquivo ausente ou sendo substituído: verifica de novo no próximo intervalo
+            continue
+        if assinatura in (estado['indices']['assinatura'], estado['assinatura_falha']):
+            continue
+        try:
+            indices = await loop.run_in_executor(None, construir_indices, caminho_csv, arquivo_simulacao)
+        except Exception as e:
+            estado['assinatura_falha'] = assinatura
+            print(f"Aviso: Não foi possível recarregar o histórico ({type(e).__name__}: {e}).")
+            continue
+        estado['indices'] = indices
+        estado['assinatura_falha'] = None
+        print(f"Histórico recarregado: {len(indices['datas']):,} sorteios.")
+
+
+async def iniciar_servico(host=HOST, porta=PORTA, caminho_csv=ARQUIVO_HISTORICO, arquivo_simulacao=None,
+                          intervalo_recarga=INTERVALO_RECARGA):
+    """
+    Carrega os índices e começa a escutar em (host, porta); porta 0 escolhe uma porta livre.
+    Retorna (servidor, estado): a porta real está em servidor.sockets[0].getsockname()[1],
+    estado['indices'] são os índices em uso, estado['vigia'] é a tarefa que recarrega o
+    CSV (cancele-a ao fechar o servidor) e estado['assinatura_falha'], a (mtime, tamanho)
+    da última versão do CSV que não pôde ser carregada.
+    """
+    estado = {'indices': construir_indices(caminho_csv, arquivo_simulacao), 'assinatura_falha': None}
+    servidor = await asyncio.start_server(lambda leitor, escritor: _atender(estado, leitor, escritor), host, porta,
+                                          limit=TAMANHO_MAXIMO_CABECALHO)
+    estado['vigia'] = asyncio.create_task(_vigiar_csv(estado, caminho_csv, arquivo_simulacao, intervalo_recarga))
+    return servidor, estado
+
+
+async def _executar(args):
+    servidor, estado = await iniciar_servico(args.host, args.porta, args.csv, args.simulados)
+    porta = servidor.sockets[0].getsockname()[1]
+    print(f"Servindo {len(estado['indices']['datas']):,} sorteios em http://{args.host}:{porta} "
+          f"(rotas: {', '.join(sorted(ROTAS))}).")
+    async with servidor:
+        await servidor.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serviço local HTTP/JSON de consultas ao histórico da Mega-Sena.")
+    parser.add_argument('--host', default=HOST)
+    parser.add_argument('--porta', type=int, default=PORTA)
+    parser.add_argument('--csv', default=ARQUIVO_HISTORICO, help="CSV do histórico (recarregado quando muda)")
+    parser.add_argument('--simulados', help="Armazenamento de jogos simulados com estatísticas (ex.: ./data/jogos_simulados.bin)")
+    args = parser.parse_args()
+    try:
+        asyncio.run(_executar(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,4 @@
-import pandas as pd
-import secrets
+import argparse
 import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.widgets import Slider, RangeSlider, TextBox
@@ -10,284 +9,554 @@ import os
 import matplotlib.ticker as mtick
 import matplotlib.dates as mdates
 from datetime import datetime
+from gerador import gerar_jogos, nova_semente, descrever_gerador, SOMA_MAXIMA, MODO_SEGURO, MODO_RAPIDO
+from combinatoria import probabilidades_somas, momentos_somas
+from historico import carregar_historico as carregar_colunas_historico, tabelas_acumuladas
+from armazenamento import criar_armazenamento, abrir_jogos, ler_dezenas, gravar_dezenas, armazenamento_valido, ler_cabecalho, caminho_estatisticas, marcar_completo
+from coocorrencia import contar_pares, tabela_pares_acumulada
+from densidade import densidade_histograma
+import instrumentacao
+from instrumentacao import fase
 
 # Definição do total de jogos (Total de combinações da Mega-Sena)
 TOTAL_JOGOS = 1_000_000
 # TOTAL_JOGOS = 50_063_860  # Para todas as combinações possíveis (60 choose 6)
 
-# Configuração de exibição: 'both', 'freq' (apenas dezenas), 'soma' (apenas somas)
+# Configuração de exibição: 'both', 'freq' (apenas dezenas), 'soma' (apenas somas),
+# 'pares' (matriz de coocorrência 60x60 dos pares de dezenas)
 SHOW_GRAPHS = 'soma'
 
-def simular_lote_jogos(qtd_jogos):
+# Os workers devolvem apenas histogramas (tamanho fixo, independente de TOTAL_JOGOS).
+# Com GUARDAR_JOGOS = True, os jogos completos são gravados uma única vez em ARQUIVO_JOGOS
+# e as execuções seguintes mapeiam o arquivo em memória em vez de simular de novo.
+GUARDAR_JOGOS = True
+# Relativo ao módulo, não à pasta atual: o painel e exportar_figuras usam o mesmo arquivo de qualquer diretório
+ARQUIVO_JOGOS = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'jogos_simulados.bin')
+# 'dezenas' (6 bytes por jogo) ou 'mascara' (8 bytes por jogo, 60 bits)
+FORMATO_ARMAZENAMENTO = 'dezenas'
+
+# Gerador: MODO_SEGURO (entropia do sistema) ou MODO_RAPIDO (PCG64 semeado, reprodutível).
+# No modo rápido os jogos dependem só da SEMENTE, nunca do número de núcleos;
+# com SEMENTE = None uma semente nova é sorteada e exibida para repetir a execução.
+MODO_RNG = MODO_SEGURO
+SEMENTE = None
+
+# Cada lote é dividido em blocos com histogramas próprios: é a resolução do slider de simulações
+BLOCOS_POR_LOTE = 64
+
+def combinar_momentos(a, b):
     """
-    Função worker que retorna os jogos completos, não apenas as somas.
+    Junta dois estados (n, média, M2) de Welford (fórmula paralela de Chan).
+    M2 é a soma dos quadrados dos desvios: variância = M2 / n.
     """
-    rng = secrets.SystemRandom()
-    
-    jogos_gerados = []
-    range_dezenas = range(1, 61)
-    
-    for _ in range(qtd_jogos):
-        jogo = rng.sample(range_dezenas, 6)
-        jogos_gerados.append(jogo)
-        
-    return jogos_gerados
+    n_a, media_a, m2_a = a
+    n_b, media_b, m2_b = b
+    n = n_a + n_b
+    if n == 0:
+        return (0, 0.0, 0.0)
+    delta = media_b - media_a
+    media = media_a + delta * n_b / n
+    m2 = m2_a + m2_b + delta ** 2 * n_a * n_b / n
+    return (n, media, m2)
+
+def simular_lote_estatisticas(inicio, qtd_jogos, arquivo=None, reutilizar=False, modo=MODO_SEGURO, semente=None):
+    """
+    Função worker do modo agregado: simula qtd_jogos e retorna apenas acumuladores
+    que podem ser somados entre workers, com tamanho O(bins) por lote:
+    - 'tamanhos': jogos em cada bloco do lote
+    - 'contagens': frequência das dezenas 1-60 por bloco
+    - 'somas': histograma das somas por bloco (índice = soma)
+    - 'pares': matriz 60x60 de coocorrência dos pares por bloco
+    - 'momentos': estado (n, média, M2) das somas
+    - 'eventos': fases medidas no worker, quando a instrumentação está ligada
+
+    Com `arquivo`, os jogos do lote ocupam a fatia [inicio, inicio + qtd_jogos) do
+    armazenamento: são gravados nela ou, com reutilizar=True, lidos dela sem simular.
+    `modo` e `semente` escolhem o gerador (ver gerador.gerar_jogos); `inicio` é a
+    posição do lote na sequência, então o modo rápido não depende da divisão em lotes.
+    """
+    # Divide o lote em blocos quase iguais (os primeiros recebem o resto da divisão)
+    tamanho_bloco, resto = divmod(qtd_jogos, BLOCOS_POR_LOTE)
+    tamanhos = np.full(BLOCOS_POR_LOTE, tamanho_bloco, dtype=np.int64)
+    tamanhos[:resto] += 1
+    contagens = np.zeros((BLOCOS_POR_LOTE, 60), dtype=np.int64)
+    somas = np.zeros((BLOCOS_POR_LOTE, SOMA_MAXIMA + 1), dtype=np.int64)
+    pares = np.zeros((BLOCOS_POR_LOTE, 60, 60), dtype=np.int64)
+    momentos = (0, 0.0, 0.0)
+
+    if arquivo:
+        dados, cabecalho = abrir_jogos(arquivo, modo='r' if reutilizar else 'r+')
+
+    posicao = inicio
+    for i, qtd_bloco in enumerate(tamanhos):
+        if qtd_bloco == 0:
+            continue
+        if reutilizar:
+            with fase('ler_jogos', bloco=i):
+                jogos = ler_dezenas(dados, cabecalho, posicao, posicao + qtd_bloco)
+        else:
+            with fase('gerar_jogos', bloco=i):
+                jogos = gerar_jogos(qtd_bloco, modo, semente, posicao)
+            if arquivo:
+                with fase('gravar_jogos', bloco=i):
+                    gravar_dezenas(dados, cabecalho, posicao, jogos)
+        posicao += qtd_bloco
+
+        with fase('estatisticas_bloco', bloco=i):
+            somas_bloco = np.sum(jogos, axis=1, dtype=np.int16)
+            contagens[i] = np.bincount(jogos.ravel(), minlength=61)[1:]
+            somas[i] = np.bincount(somas_bloco, minlength=SOMA_MAXIMA + 1)
+            pares[i] = contar_pares(jogos)
+            media_bloco = somas_bloco.mean()
+            momentos = combinar_momentos(momentos, (int(qtd_bloco), media_bloco, float(np.sum((somas_bloco - media_bloco) ** 2))))
+
+    if arquivo and not reutilizar:
+        with fase('flush'):
+            dados.flush()
+
+    return {'tamanhos': tamanhos, 'contagens': contagens, 'somas': somas, 'pares': pares, 'momentos': momentos,
+            'eventos': instrumentacao.coletar_eventos()}
+
+# Tabelas acumuladas por bloco guardadas no .npz de estatísticas
+TABELAS_ESTATISTICAS = ('limites_blocos', 'contagens_acumuladas', 'somas_acumuladas', 'pares_acumulados')
+
+def salvar_estatisticas(arquivo, estatisticas, cabecalho):
+    np.savez(caminho_estatisticas(arquivo), criado_em=cabecalho['criado_em'],
+             momentos=np.array(estatisticas['momentos']), **{k: estatisticas[k] for k in TABELAS_ESTATISTICAS})
+
+def carregar_estatisticas(arquivo, total_jogos):
+    """
+    Carrega as tabelas agregadas salvas para `arquivo`, se foram calculadas para
+    exatamente total_jogos jogos desse mesmo armazenamento (e têm todas as tabelas
+    atuais). Caso contrário, retorna None.
+    """
+    caminho = caminho_estatisticas(arquivo)
+    if not os.path.exists(caminho):
+        return None
+    with np.load(caminho) as salvo:
+        _, cabecalho = abrir_jogos(arquivo)
+        if any(k not in salvo for k in TABELAS_ESTATISTICAS):
+            return None
+        if str(salvo['criado_em']) != cabecalho['criado_em'] or salvo['limites_blocos'][-1] != total_jogos:
+            return None
+        n, media, m2 = salvo['momentos']
+        estatisticas = {k: salvo[k] for k in TABELAS_ESTATISTICAS}
+        estatisticas['momentos'] = (int(n), float(media), float(m2))
+        return estatisticas
+
+def armazenamento_compativel(arquivo, total_jogos, modo, semente):
+    """
+    True se o armazenamento tem jogos suficientes e foi gerado pelo mesmo backend
+    (e, se `semente` foi fixada, com a mesma semente).
+    """
+    if not armazenamento_valido(arquivo, total_jogos):
+        return False
+    cabecalho = ler_cabecalho(arquivo)
+    if cabecalho.get('gerador') != descrever_gerador(modo)[0]:
+        return False
+    return semente is None or cabecalho.get('semente') == semente
 
 def carregar_historico():
+    """Histórico em colunas NumPy (ver historico.carregar_historico), ou None se não houver."""
     try:
-        # Lê o CSV com separador ponto e vírgula
-        arquivo = './data/megasena_full_history.csv'
-        if not os.path.exists(arquivo):
-            arquivo = '../data/megasena_full_history.csv'
-            
-        df = pd.read_csv(arquivo, sep=';')
-        
-        # Renomeia coluna para padrão interno se necessário
-        if 'Data do Sorteio' in df.columns:
-            df.rename(columns={'Data do Sorteio': 'Data Sorteio'}, inplace=True)
-            
-        # Converte a coluna de data e remove linhas com datas inválidas
-        df['Data Sorteio'] = pd.to_datetime(df['Data Sorteio'], dayfirst=True, errors='coerce')
-        df.dropna(subset=["Data Sorteio"], inplace=True)
-        return df
+        return carregar_colunas_historico()
     except Exception as e:
         print(f"Aviso: Não foi possível carregar o histórico ({e}).")
-        return pd.DataFrame()
+        return None
 
-def main():
-    print(f"Iniciando simulação conjunta de {TOTAL_JOGOS:,} jogos...")
+def preparar_estatisticas(total_jogos=TOTAL_JOGOS):
+    """
+    Tabelas acumuladas por bloco das primeiras total_jogos simulações (ver
+    simular_lote_estatisticas): reaproveitadas do armazenamento quando possível,
+    simuladas em paralelo caso contrário.
+    """
+    print(f"Iniciando simulação conjunta de {total_jogos:,} jogos...")
     
     # Detecta o número de CPUs lógicas disponíveis
     num_processos = os.cpu_count() or 4
     print(f"Utilizando {num_processos} núcleos de processamento.")
     
     # Divide o trabalho em fatias para cada núcleo
-    tamanho_lote = TOTAL_JOGOS // num_processos
+    tamanho_lote = total_jogos // num_processos
     lotes = [tamanho_lote] * num_processos
     
     # Adiciona o resto da divisão ao último lote para garantir o total exato
-    lotes[-1] += TOTAL_JOGOS % num_processos
+    lotes[-1] += total_jogos % num_processos
     
-    inicio = time.time()
+    # Posição do primeiro jogo de cada lote no armazenamento
+    inicios_lotes = [sum(lotes[:i]) for i in range(num_processos)]
     
-    # Lista para agregar todos os jogos na ordem correta
-    todos_jogos_lista = []
+    inicio = time.time()
     
-    # Inicia o multiprocessamento
-    with ProcessPoolExecutor(max_workers=num_processos) as executor:
-        # Mapeia a execução e recupera os resultados
-        # O map garante que os resultados venham na ordem dos lotes
-        resultados = executor.map(simular_lote_jogos, lotes)
+    arquivo = ARQUIVO_JOGOS if GUARDAR_JOGOS else None
+    # Reaproveita os jogos gravados por uma execução anterior, se houver jogos suficientes
+    reutilizar = bool(arquivo) and armazenamento_compativel(arquivo, total_jogos, MODO_RNG, SEMENTE)
+    with fase('carregar_estatisticas'):
+        estatisticas = carregar_estatisticas(arquivo, total_jogos) if reutilizar else None
+
+    if estatisticas is not None:
+        print(f"Reutilizando {total_jogos:,} jogos já simulados em {arquivo}.")
+    else:
+        semente = SEMENTE
+        if MODO_RNG == MODO_RAPIDO and semente is None and not reutilizar:
+            semente = nova_semente()
+            print(f"Semente sorteada (use SEMENTE = {semente} para repetir esta simulação).")
+
+        if reutilizar:
+            print(f"Lendo jogos já simulados de {arquivo}...")
+        elif arquivo:
+            gerador, semente_registrada = descrever_gerador(MODO_RNG, semente)
+            with fase('criar_armazenamento'):
+                criar_armazenamento(arquivo, total_jogos, FORMATO_ARMAZENAMENTO, gerador=gerador, semente=semente_registrada)
+
+        # Acumuladores por bloco, na ordem dos lotes
+        tamanhos_blocos = []
+        contagens_blocos = []
+        somas_blocos = []
+        pares_blocos = []
+        momentos = (0, 0.0, 0.0)
         
-        # Agrega os resultados conforme eles ficam prontos
-        for i, resultado_parcial in enumerate(resultados):
-            todos_jogos_lista.extend(resultado_parcial)
-            print(f"Lote {i+1}/{num_processos} processado.")
-
-    # Converte para array numpy para alta performance e economia de memória
-    # int16 é suficiente (números até 60)
-    arr_jogos = np.array(todos_jogos_lista, dtype=np.int16)
-    arr_somas = np.sum(arr_jogos, axis=1)
-    
+        # Inicia o multiprocessamento
+        # A fase inclui criar o pool, simular e receber (deserializar) os acumuladores
+        with fase('workers', processos=num_processos, reutilizar=reutilizar):
+            with ProcessPoolExecutor(max_workers=num_processos) as executor:
+                # Mapeia a execução e recupera os resultados
+                # O map garante que os resultados venham na ordem dos lotes
+                resultados = executor.map(simular_lote_estatisticas, inicios_lotes, lotes,
+                                          [arquivo] * num_processos, [reutilizar] * num_processos,
+                                          [MODO_RNG] * num_processos, [semente] * num_processos)
+            
+                # Agrega os resultados conforme eles ficam prontos (apenas histogramas trafegam entre processos)
+                for i, resultado_parcial in enumerate(resultados):
+                    tamanhos_blocos.append(resultado_parcial['tamanhos'])
+                    contagens_blocos.append(resultado_parcial['contagens'])
+                    somas_blocos.append(resultado_parcial['somas'])
+                    pares_blocos.append(resultado_parcial['pares'])
+                    momentos = combinar_momentos(momentos, resultado_parcial['momentos'])
+                    # Fases medidas dentro do worker (cada worker aparece como um processo no trace)
+                    instrumentacao.registrar_eventos(resultado_parcial['eventos'])
+                    print(f"Lote {i+1}/{num_processos} processado.")
+
+        # Tabelas acumuladas por bloco: a linha k soma os k primeiros blocos (a linha 0 é zero).
+        # Qualquer quantidade de simulações que caia em um limite de bloco sai de uma subtração O(bins).
+        with fase('tabelas_simulacao'):
+            estatisticas = {
+                'limites_blocos': np.concatenate(([0], np.cumsum(np.concatenate(tamanhos_blocos)))),
+                'contagens_acumuladas': np.vstack((np.zeros((1, 60), dtype=np.int64), np.cumsum(np.vstack(contagens_blocos), axis=0))),
+                'somas_acumuladas': np.vstack((np.zeros((1, SOMA_MAXIMA + 1), dtype=np.int64), np.cumsum(np.vstack(somas_blocos), axis=0))),
+                'pares_acumulados': np.concatenate((np.zeros((1, 60, 60), dtype=np.int64), np.cumsum(np.concatenate(pares_blocos), axis=0))),
+                'momentos': momentos,
+            }
+        if arquivo:
+            # Só agora, com todos os lotes gravados, o arquivo passa a valer para reaproveitamento
+            cabecalho = ler_cabecalho(arquivo) if reutilizar else marcar_completo(arquivo)
+            with fase('salvar_estatisticas'):
+                salvar_estatisticas(arquivo, estatisticas, cabecalho)
+
     tempo_total = time.time() - inicio
     print(f"\nSimulação concluída em {tempo_total:.2f} segundos.")
+    return estatisticas
 
-    # --- Carrega e Prepara Dados Históricos ---
-    df_historico = carregar_historico()
+def preparar_historico():
+    """
+    Histórico em ordem cronológica com as tabelas acumuladas usadas pelas janelas de datas:
+    'datas', 'bolas', 'contagens_acumuladas', 'somas_acumuladas', 'pares_acumulados',
+    'data_min' e 'data_max' (datetime).
+    """
+    with fase('historico'):
+        historico = carregar_historico()
     
-    # Arrays completos que serão filtrados dinamicamente
+    # Arrays completos, em ordem cronológica
     dados_historico_full = np.empty((0, 6), dtype=int)
-    somas_historico_full = np.array([], dtype=int)
-    datas_historico_full = np.array([], dtype='datetime64[ns]')
-
-    if not df_historico.empty:
-        cols_bolas = [f'Bola{i}' for i in range(1, 7)]
-        dados_historico_full = df_historico[cols_bolas].values.astype(int)
-        somas_historico_full = np.sum(dados_historico_full, axis=1)
-        datas_historico_full = df_historico['Data Sorteio'].values
+    datas_historico_full = np.array([], dtype='datetime64[D]')
+
+    if historico is not None and len(historico['data']) > 0:
+        ordem = np.argsort(historico['data'], kind='stable')
+        dados_historico_full = historico['bolas'][ordem].astype(int)
+        datas_historico_full = historico['data'][ordem]
         
-        data_min_hist = df_historico['Data Sorteio'].min().to_pydatetime()
-        data_max_hist = df_historico['Data Sorteio'].max().to_pydatetime()
+        data_min_hist = datas_historico_full[0].astype('datetime64[s]').item()
+        data_max_hist = datas_historico_full[-1].astype('datetime64[s]').item()
     else:
         # Define um padrão caso o histórico não seja carregado
         print("AVISO: Histórico não carregado. Usando intervalo de datas padrão.")
         data_max_hist = datetime.now()
         data_min_hist = datetime(1996, 3, 11) # Data do primeiro concurso
 
-    # --- Cálculos Estatísticos Globais ---
-    
-    media = np.mean(arr_somas)
-    desvio_padrao = np.std(arr_somas)
-
-    print("-" * 30)
-    print(f"RESULTADOS ESTATÍSTICOS DA SOMA:")
-    print(f"Total de Jogos: {len(arr_somas):,}")
-    print(f"Média das Somas: {media:.4f} (Teórica: 183.0)")
-    print(f"Desvio Padrão: {desvio_padrao:.4f}")
-    print("-" * 30)
-
-    # --- Plotagem do Gráfico ---
-    print("Gerando gráfico interativo...")
-
-    if SHOW_GRAPHS == 'freq':
+    # Tabelas acumuladas do histórico: a linha i soma os i primeiros sorteios (a linha 0 é zero).
+    # Uma janela de datas vira dois searchsorted nas datas e uma subtração O(bins).
+    with fase('tabelas_historico'):
+        contagens_historico_acumuladas, somas_historico_acumuladas = tabelas_acumuladas(dados_historico_full)
+        # O mesmo para os pares: cada janela custa O(60²), sem revarrer os sorteios
+        pares_historico_acumulados = tabela_pares_acumulada(dados_historico_full)
+
+    return {
+        'datas': datas_historico_full,
+        'bolas': dados_historico_full,
+        'contagens_acumuladas': contagens_historico_acumuladas,
+        'somas_acumuladas': somas_historico_acumuladas,
+        'pares_acumulados': pares_historico_acumulados,
+        'data_min': data_min_hist,
+        'data_max': data_max_hist,
+    }
+
+def montar_painel(estatisticas, dados_historico, graficos=SHOW_GRAPHS, interativo=True):
+    """
+    Monta a figura do painel (ver SHOW_GRAPHS) e retorna (fig, update_plot), em que
+    update_plot(data_inicio, data_fim, num_simulacoes) redesenha a figura para uma
+    janela do histórico e uma quantidade de simulações. Com interativo=True também
+    cria os sliders, as caixas de texto e o tooltip, e já desenha a visão completa.
+    """
+    limites_blocos = estatisticas['limites_blocos']
+    contagens_acumuladas = estatisticas['contagens_acumuladas']
+    somas_acumuladas = estatisticas['somas_acumuladas']
+    pares_acumulados = estatisticas['pares_acumulados']
+    datas_historico_full = dados_historico['datas']
+    contagens_historico_acumuladas = dados_historico['contagens_acumuladas']
+    somas_historico_acumuladas = dados_historico['somas_acumuladas']
+    pares_historico_acumulados = dados_historico['pares_acumulados']
+    data_min_hist, data_max_hist = dados_historico['data_min'], dados_historico['data_max']
+    media_teorica, _ = momentos_somas()
+    prob_somas = probabilidades_somas()
+
+    ax1 = ax2 = ax3 = None
+    if graficos == 'freq':
         fig, ax1 = plt.subplots(1, 1, figsize=(12, 7))
-        ax2 = None
-    elif SHOW_GRAPHS == 'soma':
+    elif graficos == 'soma':
         fig, ax2 = plt.subplots(1, 1, figsize=(12, 7))
-        ax1 = None
+    elif graficos == 'pares':
+        fig, ax3 = plt.subplots(1, 1, figsize=(10, 9))
     else:
         fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(16, 7))
         
-    plt.subplots_adjust(bottom=0.3) # Espaço para os widgets
+    plt.subplots_adjust(bottom=0.3 if interativo else 0.1) # Espaço para os widgets
     
     # Referências para interatividade
-    plot_refs = {'bars1': None, 'bars2': None, 'annot1': None, 'annot2': None}
+    # 'hover' guarda o último bin sob o mouse para só redesenhar quando ele muda
+    plot_refs = {'annot1': None, 'annot2': None, 'annot3': None, 'hover': None}
     current_stats = {'total_jogos': 0}
 
+    # Os artistas são criados uma única vez; cada atualização só altera alturas e posições.
+    # Recriar centenas de barras a cada movimento do slider é o que deixava o arraste lento.
+    x_dezenas = np.arange(1, 61)
+    eixo_somas = np.nonzero(prob_somas)[0]  # Somas possíveis: 21 a 345
+    zeros_dezenas = np.zeros(len(x_dezenas))
+    zeros_somas = np.zeros(len(eixo_somas))
+
+    def criar_aviso(ax):
+        aviso = ax.text(0.5, 0.5, "Nenhum jogo selecionado", ha='center', transform=ax.transAxes)
+        aviso.set_visible(False)
+        return aviso
+
+    def criar_tooltip(ax):
+        # Configura o tooltip (invisível inicialmente)
+        annot = ax.annotate("", xy=(0,0), xytext=(0,10), textcoords="offset points",
+                            bbox=dict(boxstyle="round", fc="white", ec="gray", alpha=0.9),
+                            ha='center')
+        annot.set_visible(False)
+        return annot
+
+    # --- GRÁFICO 1: Frequência das Dezenas ---
+    if ax1:
+        bars1_hist = ax1.bar(x_dezenas, zeros_dezenas, color='steelblue', alpha=0.7, label='Histórico')
+        bars1_sim = ax1.bar(x_dezenas, zeros_dezenas, bottom=zeros_dezenas, color='purple', alpha=0.7, label='Simulação')
+        ax1.set_title(f'Frequência das Dezenas (Histórico + Simulação)')
+        ax1.set_xlabel('Dezena (1-60)')
+        ax1.set_ylabel('Frequência Absoluta')
+        ax1.set_xticks(range(0, 61, 5))
+        ax1.grid(axis='y', alpha=0.3)
+        # Média de frequência (a altura é ajustada a cada atualização)
+        linha_media1 = ax1.axhline(0, color='red', linestyle='--', linewidth=1.5)
+        # Posição fixa: com loc='best' a legenda varre todas as barras a cada redesenho
+        ax1.legend(loc='upper right')
+        aviso1 = criar_aviso(ax1)
+        plot_refs['annot1'] = criar_tooltip(ax1)
+
+    # --- GRÁFICO 2: Distribuição das Somas ---
+    if ax2:
+        bars2_hist = ax2.bar(eixo_somas, zeros_somas, color='steelblue', alpha=0.7, label='Histórico')
+        bars2_sim = ax2.bar(eixo_somas, zeros_somas, bottom=zeros_somas, color='purple', alpha=0.7, label='Simulação')
+        # Curva exata esperada para a quantidade de jogos exibida
+        linha_exata, = ax2.plot(eixo_somas, zeros_somas, color='black', linestyle=':', linewidth=1.5, label='Distribuição Exata')
+        # Densidade suavizada (KDE por FFT sobre o histograma) de histórico + simulação
+        linha_densidade, = ax2.plot(eixo_somas, zeros_somas, color='darkorange', linewidth=2, label='Densidade (KDE por histograma)')
+        ax2.set_title(f'Distribuição da Soma (Histórico + Simulação)')
+        ax2.set_xlabel('Soma das 6 Dezenas')
+        ax2.set_ylabel('Frequência')
+        ax2.grid(axis='y', linestyle='--', alpha=0.5)
+        # Média da soma para o conjunto de dados filtrado
+        linha_media2 = ax2.axvline(media_teorica, color='red', linestyle='dashed', linewidth=1.5, label='Média')
+        legenda2 = ax2.legend(loc='upper right')
+        texto_media2 = next(texto for texto in legenda2.get_texts() if texto.get_text() == 'Média')
+        aviso2 = criar_aviso(ax2)
+        plot_refs['annot2'] = criar_tooltip(ax2)
+
+    # --- GRÁFICO 3: Coocorrência dos Pares ---
+    if ax3:
+        # A diagonal (dezena com ela mesma) não é um par: fica mascarada
+        diagonal = np.eye(60, dtype=bool)
+        imagem_pares = ax3.imshow(np.ma.masked_array(np.zeros((60, 60)), diagonal), cmap='viridis',
+                                  origin='lower', extent=(0.5, 60.5, 0.5, 60.5), interpolation='nearest')
+        fig.colorbar(imagem_pares, ax=ax3, label='Jogos com o par')
+        ax3.set_title('Coocorrência dos Pares (Histórico + Simulação)')
+        ax3.set_xlabel('Dezena')
+        ax3.set_ylabel('Dezena')
+        ax3.set_xticks(range(0, 61, 5))
+        ax3.set_yticks(range(0, 61, 5))
+        aviso3 = criar_aviso(ax3)
+        plot_refs['annot3'] = criar_tooltip(ax3)
+
+    def atualizar_barras(barras_hist, barras_sim, valores_hist, valores_sim):
+        for bar_hist, bar_sim, altura_hist, altura_sim in zip(barras_hist, barras_sim, valores_hist.tolist(), valores_sim.tolist()):
+            bar_hist.set_height(altura_hist)
+            bar_sim.set_y(altura_hist)
+            bar_sim.set_height(altura_sim)
+
     def update_plot(start_date, end_date, num_simulacoes):
-        num_simulacoes = int(num_simulacoes)
-        # Filtra dados históricos pelo range de data
-        mask_hist = (datas_historico_full >= np.datetime64(start_date)) & (datas_historico_full <= np.datetime64(end_date))
-        dados_historico_filtrado = dados_historico_full[mask_hist]
-        somas_historico_filtrado = somas_historico_full[mask_hist]
-
-        if dados_historico_filtrado.size > 0:
-            numeros_historico_filtrado = dados_historico_filtrado.flatten()
-            contagem_historico = np.bincount(numeros_historico_filtrado, minlength=61)[1:]
-            total_historico = len(dados_historico_filtrado)
-            contagem_somas_historico = np.bincount(somas_historico_filtrado, minlength=350)
-        else:
-            contagem_historico = np.zeros(60, dtype=int)
-            total_historico = 0
-            contagem_somas_historico = np.zeros(350, dtype=int)
+        # Arredonda para o limite de bloco mais próximo abaixo (resolução das tabelas acumuladas)
+        bloco = np.searchsorted(limites_blocos, int(num_simulacoes), side='right') - 1
+        num_simulacoes = int(limites_blocos[bloco])
+
+        # Posição da janela de datas no histórico ordenado: o intervalo é [i_inicio, i_fim)
+        i_inicio = np.searchsorted(datas_historico_full, np.datetime64(start_date), side='left')
+        i_fim = np.searchsorted(datas_historico_full, np.datetime64(end_date), side='right')
+        total_historico = int(max(i_fim - i_inicio, 0))
+        i_fim = max(i_fim, i_inicio)
+        contagem_historico = contagens_historico_acumuladas[i_fim] - contagens_historico_acumuladas[i_inicio]
+        contagem_somas_historico = somas_historico_acumuladas[i_fim] - somas_historico_acumuladas[i_inicio]
 
         fig.suptitle(f"Histórico ({total_historico:,} jogos de {start_date.strftime('%d/%m/%y')} a {end_date.strftime('%d/%m/%y')}) + {num_simulacoes:,} Simulações", fontsize=12)
-        if ax1:
-            ax1.clear()
-        if ax2:
-            ax2.clear()
 
-        # Filtra os arrays pelo intervalo de IDs dos jogos
-        subset_jogos = arr_jogos[:num_simulacoes]
-        subset_somas = arr_somas[:num_simulacoes]
-        current_stats['total_jogos'] = len(subset_jogos) + total_historico
-        
-        if current_stats['total_jogos'] == 0:
-            if ax1:
-                ax1.text(0.5, 0.5, "Nenhum jogo selecionado", ha='center')
-            if ax2:
-                ax2.text(0.5, 0.5, "Nenhum jogo selecionado", ha='center')
-            plot_refs['bars1'] = None
-            plot_refs['bars2'] = None
-            return
+        # Contagens das primeiras num_simulacoes simulações: uma linha das tabelas acumuladas
+        contagem_simulacao = contagens_acumuladas[bloco]
+        contagem_somas_simulacao = somas_acumuladas[bloco]
+        current_stats['total_jogos'] = num_simulacoes + total_historico
+        sem_jogos = current_stats['total_jogos'] == 0
+
+        # Os valores mudaram: o próximo movimento do mouse recalcula o tooltip
+        plot_refs['hover'] = None
+        for chave in ('annot1', 'annot2', 'annot3'):
+            if plot_refs[chave]:
+                plot_refs[chave].set_visible(False)
 
-        # --- GRÁFICO 1: Frequência das Dezenas ---
-        # Flatten para contar todas as dezenas sorteadas no lote
         if ax1:
-            contagem_simulacao = np.bincount(subset_jogos.flatten(), minlength=61)[1:]
+            current_stats['contagem_historico'] = contagem_historico
             current_stats['contagem_dezenas_total'] = contagem_historico + contagem_simulacao
-            x_dezenas = np.arange(1, 61)
-            
-            bars1 = ax1.bar(x_dezenas, contagem_historico, color='steelblue', alpha=0.7, label='Histórico')
-            bars2 = ax1.bar(x_dezenas, contagem_simulacao, bottom=contagem_historico, color='purple', alpha=0.7, label='Simulação')
-            plot_refs['bars1'] = list(bars1) + list(bars2)
-            ax1.set_title(f'Frequência das Dezenas (Histórico + Simulação)')
-            ax1.set_xlabel('Dezena (1-60)')
-            ax1.set_ylabel('Frequência Absoluta')
-            ax1.set_xticks(range(0, 61, 5))
-            ax1.grid(axis='y', alpha=0.3)
-
-            # Calcula e plota a média de frequência
-            total_ocorrencias = contagem_historico.sum() + contagem_simulacao.sum()
-            media_freq_abs = total_ocorrencias / 60
-            ax1.axhline(media_freq_abs, color='red', linestyle='--', linewidth=1.5)
-            ax1.legend()
-
-        # --- GRÁFICO 2: Distribuição das Somas ---
-        if ax2:
-            contagem_somas_simulacao = np.bincount(subset_somas, minlength=len(contagem_somas_historico))
-            
-            # Garante que os arrays tenham o mesmo tamanho
-            if len(contagem_somas_simulacao) > len(contagem_somas_historico):
-                 contagem_somas_historico_plot = np.pad(contagem_somas_historico, (0, len(contagem_somas_simulacao) - len(contagem_somas_historico)))
-                 contagem_somas_simulacao_plot = contagem_somas_simulacao
-            else:
-                 contagem_somas_historico_plot = contagem_somas_historico
-                 contagem_somas_simulacao_plot = np.pad(contagem_somas_simulacao, (0, len(contagem_somas_historico) - len(contagem_somas_simulacao)))
+            atualizar_barras(bars1_hist, bars1_sim, contagem_historico, contagem_simulacao)
 
-            # Filtra apenas índices com dados para plotagem mais limpa
-            total_counts = contagem_somas_historico_plot + contagem_somas_simulacao_plot
-            valid_indices = np.nonzero(total_counts)[0]
-            
-            bars2_hist = ax2.bar(valid_indices, contagem_somas_historico_plot[valid_indices], color='steelblue', alpha=0.7, label='Histórico')
-            bars2_sim = ax2.bar(valid_indices, contagem_somas_simulacao_plot[valid_indices], bottom=contagem_somas_historico_plot[valid_indices], color='purple', alpha=0.7, label='Simulação')
-            plot_refs['bars2'] = list(bars2_hist) + list(bars2_sim)
-            
-            ax2.set_title(f'Distribuição da Soma (Histórico + Simulação)')
-            ax2.set_xlabel('Soma das 6 Dezenas')
-            ax2.set_ylabel('Frequência')
-            ax2.grid(axis='y', linestyle='--', alpha=0.5)
-
-            # Calcula e plota a média da soma para o conjunto de dados filtrado
-            somas_combinadas = np.concatenate((somas_historico_filtrado, subset_somas))
-            if somas_combinadas.size > 0:
-                media_atual_somas = np.mean(somas_combinadas)
-                ax2.axvline(media_atual_somas, color='red', linestyle='dashed', linewidth=1.5, label=f'Média: {media_atual_somas:.2f}')
-            ax2.legend()
+            # Calcula e posiciona a média de frequência
+            media_freq_abs = current_stats['contagem_dezenas_total'].sum() / 60
+            linha_media1.set_ydata([media_freq_abs, media_freq_abs])
+            ax1.set_ylim(0, max(current_stats['contagem_dezenas_total'].max(), 1) * 1.05)
+            aviso1.set_visible(sem_jogos)
 
-        # Configura o tooltip (invisível inicialmente)
-        if ax1:
-            annot1 = ax1.annotate("", xy=(0,0), xytext=(0,10), textcoords="offset points",
-                                bbox=dict(boxstyle="round", fc="white", ec="gray", alpha=0.9),
-                                ha='center')
-            annot1.set_visible(False)
-            plot_refs['annot1'] = annot1
-        
         if ax2:
-            annot2 = ax2.annotate("", xy=(0,0), xytext=(0,10), textcoords="offset points",
-                                bbox=dict(boxstyle="round", fc="white", ec="gray", alpha=0.9),
-                                ha='center')
-            annot2.set_visible(False)
-            plot_refs['annot2'] = annot2
+            total_counts = contagem_somas_historico + contagem_somas_simulacao
+            current_stats['contagem_somas_historico'] = contagem_somas_historico
+            current_stats['contagem_somas_total'] = total_counts
+            atualizar_barras(bars2_hist, bars2_sim, contagem_somas_historico[eixo_somas], contagem_somas_simulacao[eixo_somas])
+            curva_exata = current_stats['total_jogos'] * prob_somas[eixo_somas]
+            linha_exata.set_ydata(curva_exata)
+            curva_densidade = total_counts.sum() * densidade_histograma(total_counts)[eixo_somas]
+            linha_densidade.set_ydata(curva_densidade)
+
+            # Média da soma direto do histograma
+            if not sem_jogos:
+                media_atual_somas = np.dot(np.arange(len(total_counts)), total_counts) / total_counts.sum()
+                linha_media2.set_xdata([media_atual_somas, media_atual_somas])
+                texto_media2.set_text(f'Média: {media_atual_somas:.2f}')
+            linha_media2.set_visible(not sem_jogos)
+            ax2.set_ylim(0, max(total_counts.max(), curva_exata.max(), curva_densidade.max(), 1) * 1.05)
+            aviso2.set_visible(sem_jogos)
+
+        if ax3:
+            pares_historico = pares_historico_acumulados[i_fim].astype(np.int64) - pares_historico_acumulados[i_inicio]
+            pares_total = pares_historico + pares_acumulados[bloco]
+            current_stats['pares_historico'] = pares_historico
+            current_stats['pares_total'] = pares_total
+            imagem_pares.set_data(np.ma.masked_array(pares_total, diagonal))
+            fora_diagonal = pares_total[~diagonal]
+            imagem_pares.set_clim(fora_diagonal.min(), max(fora_diagonal.max(), fora_diagonal.min() + 1))
+            aviso3.set_visible(sem_jogos)
+
+    # Meia largura das barras (padrão do ax.bar): o mouse precisa estar sobre a barra
+    meia_largura = 0.4
+
+    def localizar_barra(event):
+        """
+        Converte a posição do mouse direto no bin sob o cursor (sem testar barra por barra).
+        Retorna (eixo, valor do bin, segmento) ou None se o mouse não está sobre uma barra.
+        """
+        if event.xdata is None or event.ydata is None:
+            return None
+
+        if ax3 and event.inaxes == ax3 and 'pares_total' in current_stats:
+            # Cada célula da matriz ocupa [d - 0.5, d + 0.5] nos dois eixos
+            linha, coluna = int(round(event.ydata)), int(round(event.xdata))
+            if not (1 <= linha <= 60 and 1 <= coluna <= 60) or linha == coluna:
+                return None
+            # O "segmento" guarda a célula sob o mouse: (a, b) e (b, a) são o mesmo par
+            return ('Par', (min(linha, coluna), max(linha, coluna)), (coluna, linha))
+
+        valor = int(round(event.xdata))
+        if abs(event.xdata - valor) > meia_largura or event.ydata < 0:
+            return None
+
+        if ax1 and event.inaxes == ax1 and 'contagem_dezenas_total' in current_stats:
+            if not 1 <= valor <= 60 or event.ydata > current_stats['contagem_dezenas_total'][valor - 1]:
+                return None
+            return ('Dezena', valor, None)
+
+        if ax2 and event.inaxes == ax2 and 'contagem_somas_total' in current_stats:
+            if not eixo_somas[0] <= valor <= eixo_somas[-1] or event.ydata > current_stats['contagem_somas_total'][valor]:
+                return None
+            # Segmento de baixo (histórico) ou de cima (simulação) da barra empilhada
+            segmento = 'hist' if event.ydata <= current_stats['contagem_somas_historico'][valor] else 'sim'
+            return ('Soma', valor, segmento)
+
+        return None
 
     def hover(event):
-        # Verifica em qual eixo o mouse está
-        if ax1 and event.inaxes == ax1 and plot_refs['bars1']:
-            annot = plot_refs['annot1']
-            bars = plot_refs['bars1']
-            label_prefix = "Dezena"
-        elif ax2 and event.inaxes == ax2 and plot_refs['bars2']:
-            annot = plot_refs['annot2']
-            bars = plot_refs['bars2']
-            label_prefix = "Soma"
-        else:
+        barra = localizar_barra(event)
+        if barra == plot_refs['hover']:
             return
-            
-        if annot:
-            vis = annot.get_visible()
-            for bar in bars:
-                if bar.contains(event)[0]:
-                    x_pos = bar.get_x() + bar.get_width() / 2
-                    y_pos = bar.get_y() + bar.get_height()
-                    segment_height = bar.get_height()
-                    annot.xy = (x_pos, y_pos)
-                    
-                    if label_prefix == "Dezena":
-                        dezena = int(round(x_pos))
-                        idx = dezena - 1
-                        if 'contagem_dezenas_total' in current_stats and 0 <= idx < 60:
-                            total = current_stats['contagem_dezenas_total'][idx]
-                            freq_rel = (total / current_stats['total_jogos']) * 100 if current_stats['total_jogos'] > 0 else 0
-                            annot.set_text(f"{label_prefix}: {dezena}\nTotal: {int(total)}\nRel: {freq_rel:.2f}%")
-                    else:
-                        annot.set_text(f"{label_prefix}: {int(x_pos)}\nFreq: {int(segment_height)}")
-
-                    annot.set_visible(True)
-                    fig.canvas.draw_idle()
-                    return
-            if vis:
-                annot.set_visible(False)
-                fig.canvas.draw_idle()
+
+        # Esconde o tooltip anterior antes de mostrar o novo
+        for chave in ('annot1', 'annot2', 'annot3'):
+            if plot_refs[chave]:
+                plot_refs[chave].set_visible(False)
+        plot_refs['hover'] = barra
+
+        if barra is not None:
+            label_prefix, valor, segmento = barra
+            if label_prefix == "Dezena":
+                annot = plot_refs['annot1']
+                total = current_stats['contagem_dezenas_total'][valor - 1]
+                freq_rel = (total / current_stats['total_jogos']) * 100 if current_stats['total_jogos'] > 0 else 0
+                annot.xy = (valor, total)
+                annot.set_text(f"{label_prefix}: {valor}\nTotal: {int(total)}\nRel: {freq_rel:.2f}%")
+            elif label_prefix == "Par":
+                annot = plot_refs['annot3']
+                a, b = valor
+                total = current_stats['pares_total'][a - 1, b - 1]
+                # Cada par aparece em C(58, 4) / C(60, 6) = 1/118 dos jogos
+                esperado = current_stats['total_jogos'] / 118
+                annot.xy = segmento
+                annot.set_text(f"{label_prefix}: {a:02d}-{b:02d}\nTotal: {int(total)}\n"
+                               f"Histórico: {int(current_stats['pares_historico'][a - 1, b - 1])}\nEsperado: {esperado:.1f}")
+            else:
+                annot = plot_refs['annot2']
+                base = current_stats['contagem_somas_historico'][valor]
+                total = current_stats['contagem_somas_total'][valor]
+                altura = base if segmento == 'hist' else total - base
+                annot.xy = (valor, base if segmento == 'hist' else total)
+                annot.set_text(f"{label_prefix}: {valor}\nFreq: {int(altura)}")
+            annot.set_visible(True)
+
+        fig.canvas.draw_idle()
+
+    if not interativo:
+        return fig, update_plot
 
     fig.canvas.mpl_connect("motion_notify_event", hover)
     
@@ -298,9 +567,9 @@ def main():
         ax=ax_slider_sim,
         label="Número de Simulações",
         valmin=0,
-        valmax=TOTAL_JOGOS,
-        valinit=TOTAL_JOGOS,
-        valstep=1
+        valmax=limites_blocos[-1],
+        valinit=limites_blocos[-1],
+        valstep=limites_blocos
     )
 
     # Slider para o Período Histórico
@@ -315,19 +584,29 @@ def main():
     ax_box_end = plt.axes([0.60, 0.02, 0.15, 0.04])
     text_box_end = TextBox(ax_box_end, 'Fim:', initial=data_max_hist.strftime('%d/%m/%Y'))
 
+    # Evita que a sincronização das caixas de texto dispare novas atualizações em cascata
+    sincronizando = {'ativo': False}
+
     def update_all(event=None):
         num_sim = slider_sim.val
         date_range = slider_date.val
         start_date = mdates.num2date(date_range[0]).replace(tzinfo=None)
         end_date = mdates.num2date(date_range[1]).replace(tzinfo=None)
         
-        text_box_start.set_val(start_date.strftime('%d/%m/%Y'))
-        text_box_end.set_val(end_date.strftime('%d/%m/%Y'))
+        sincronizando['ativo'] = True
+        try:
+            text_box_start.set_val(start_date.strftime('%d/%m/%Y'))
+            text_box_end.set_val(end_date.strftime('%d/%m/%Y'))
+        finally:
+            sincronizando['ativo'] = False
 
-        update_plot(start_date, end_date, num_sim)
+        with fase('update_plot', simulacoes=int(num_sim)):
+            update_plot(start_date, end_date, num_sim)
         fig.canvas.draw_idle()
 
     def submit_text(text):
+        if sincronizando['ativo']:
+            return
         try:
             start_dt = datetime.strptime(text_box_start.text, '%d/%m/%Y')
             end_dt = datetime.strptime(text_box_end.text, '%d/%m/%Y')
@@ -345,6 +624,43 @@ def main():
     # Plot inicial com todos os dados
     update_all()
 
+    return fig, update_plot
+
+def main():
+    estatisticas = preparar_estatisticas(TOTAL_JOGOS)
+    dados_historico = preparar_historico()
+
+    # --- Cálculos Estatísticos Globais ---
+    
+    total_simulado, media, m2 = estatisticas['momentos']
+    desvio_padrao = np.sqrt(m2 / total_simulado) if total_simulado else 0.0
+    media_teorica, desvio_teorico = momentos_somas()
+
+    print("-" * 30)
+    print(f"RESULTADOS ESTATÍSTICOS DA SOMA:")
+    print(f"Total de Jogos: {total_simulado:,}")
+    print(f"Média das Somas: {media:.4f} (Teórica: {media_teorica:.1f})")
+    print(f"Desvio Padrão: {desvio_padrao:.4f} (Teórico: {desvio_teorico:.4f})")
+    print("-" * 30)
+
+    # --- Plotagem do Gráfico ---
+    print("Gerando gráfico interativo...")
+    fig, _ = montar_painel(estatisticas, dados_historico, SHOW_GRAPHS)
+
+    if instrumentacao.ativo():
+        # Grava já o pipeline até aqui; ao fechar a janela, regrava com as interações
+        fig.canvas.mpl_connect('close_event', lambda event: instrumentacao.salvar())
+        print(f"Perfil gravado em {instrumentacao.salvar()}.")
+        instrumentacao.imprimir_resumo()
+
     plt.show()
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Simulação da Mega-Sena com o histórico real.")
+    parser.add_argument('--perfil', nargs='?', const='', metavar='ARQUIVO',
+                        help="Mede as fases do pipeline e grava um Chrome trace (JSON). Também: MEGASENA_PERFIL=arquivo.json")
+    parser.add_argument('--cprofile', action='store_true', help="Com --perfil, grava também um .prof do cProfile")
+    parser.add_argument('--tracemalloc', action='store_true', help="Com --perfil, mede o pico do heap Python por fase")
+    args = parser.parse_args()
+    if args.perfil is not None:
+        instrumentacao.ativar(args.perfil or None, cprofile=args.cprofile, memoria_python=args.tracemalloc)
     main()
\ No newline at end of file
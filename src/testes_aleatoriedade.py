@@ -0,0 +1,283 @@
+import argparse
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from gerador import DEZENAS_POR_JOGO, TOTAL_DEZENAS
+from combinatoria import probabilidades_somas, para_mascaras
+from backtest import contar_bits
+
+# Embaralhamentos por tarefa do pool (cada tarefa devolve só contadores)
+PERMUTACOES_POR_TAREFA = 8192
+# Embaralhamentos avaliados de uma vez dentro da tarefa: a matriz (lote, sorteios) de índices cabe no cache
+LOTE_PERMUTACOES = 256
+
+# Classes (aproximadamente equiprováveis pela distribuição exata) do teste de aderência das somas
+CLASSES_SOMAS = 20
+# Frequência esperada mínima por classe: janelas pequenas usam menos classes
+ESPERADO_MINIMO = 5
+
+# Probabilidade de uma dezena sair em um sorteio
+P_DEZENA = DEZENAS_POR_JOGO / TOTAL_DEZENAS
+
+# Testes seriais (ordem dos concursos), na ordem das colunas dos contadores
+TESTES_SERIAIS = ('repeticoes', 'autocorrelacao', 'sequencias')
+
+
+def _gama_superior(a, x):
+    """Função gama incompleta superior regularizada Q(a, x) (série ou fração contínua de Lentz)."""
+    if x <= 0:
+        return 1.0
+    log_prefixo = a * math.log(x) - x - math.lgamma(a)
+    if x < a + 1:
+        termo = soma = 1.0 / a
+        for n in range(1, 1000):
+            termo *= x / (a + n)
+            soma += termo
+            if abs(termo) < abs(soma) * 1e-15:
+                break
+        return max(0.0, 1.0 - soma * math.exp(log_prefixo))
+    minimo = 1e-300
+    b = x + 1 - a
+    c = 1 / minimo
+    d = 1 / b
+    h = d
+    for i in range(1, 1000):
+        an = -i * (i - a)
+        b += 2
+        d = an * d + b
+        d = minimo if abs(d) < minimo else d
+        c = b + an / c
+        c = minimo if abs(c) < minimo else c
+        d = 1 / d
+        delta = d * c
+        h *= delta
+        if abs(delta - 1) < 1e-15:
+            break
+    return math.exp(log_prefixo) * h
+
+
+def p_valor_qui_quadrado(estatistica, graus_liberdade):
+    """P(X >= estatistica) para X ~ qui-quadrado com `graus_liberdade` graus de liberdade."""
+    return _gama_superior(graus_liberdade / 2, estatistica / 2)
+
+
+def teste_uniformidade(bolas):
+    """
+    Qui-quadrado da frequência das 60 dezenas contra a equiprobabilidade.
+
+    Cada sorteio tira 6 dezenas sem reposição, então as contagens são negativamente
+    correlacionadas: sob H0, Σ(o - e)²/e se comporta como (54/59)·χ²₅₉, e a estatística
+    é corrigida por 59/54 antes do p-valor. Também retorna o resíduo padronizado
+    (o - e)/σ de cada dezena.
+    """
+    n = len(bolas)
+    contagens = np.bincount(np.asarray(bolas, dtype=np.int64).ravel(), minlength=TOTAL_DEZENAS + 1)[1:]
+    esperado = n * P_DEZENA
+    if n == 0:
+        return {'estatistica': 0.0, 'graus_liberdade': TOTAL_DEZENAS - 1, 'p_valor': 1.0,
+                'residuos': np.zeros(TOTAL_DEZENAS)}
+    qui = float(np.sum((contagens - esperado) ** 2) / esperado)
+    fator = (TOTAL_DEZENAS - 1) / (TOTAL_DEZENAS - DEZENAS_POR_JOGO)
+    residuos = (contagens - esperado) / math.sqrt(n * P_DEZENA * (1 - P_DEZENA))
+    return {
+        'estatistica': qui * fator,
+        'graus_liberdade': TOTAL_DEZENAS - 1,
+        'p_valor': p_valor_qui_quadrado(qui * fator, TOTAL_DEZENAS - 1),
+        'residuos': residuos,
+    }
+
+
+def classes_somas(n, classes=CLASSES_SOMAS):
+    """
+    Divide as somas possíveis em classes de probabilidade exata quase igual, com pelo
+    menos ESPERADO_MINIMO sorteios esperados por classe. Retorna (classe de cada soma, probabilidade de cada classe).
+    """
+    prob = probabilidades_somas()
+    k = int(min(classes, max(2, n // ESPERADO_MINIMO)))
+    cortes = np.unique(np.searchsorted(np.cumsum(prob), np.arange(1, k) / k))
+    classe = np.searchsorted(cortes, np.arange(len(prob)), side='left')
+    return classe, np.bincount(classe, weights=prob)
+
+
+def teste_somas(bolas):
+    """Aderência das somas dos sorteios à distribuição exata (qui-quadrado por classes)."""
+    n = len(bolas)
+    classe, prob_classes = classes_somas(n)
+    somas = np.asarray(bolas, dtype=np.int64).sum(axis=1)
+    observado = np.bincount(classe[somas], minlength=len(prob_classes))
+    esperado = n * prob_classes
+    qui = float(np.sum((observado - esperado) ** 2 / esperado)) if n else 0.0
+    return {
+        'estatistica': qui,
+        'graus_liberdade': len(prob_classes) - 1,
+        'p_valor': p_valor_qui_quadrado(qui, len(prob_classes) - 1) if n else 1.0,
+    }
+
+
+def preparar_serial(bolas):
+    """
+    Dados dos testes seriais de uma sequência de sorteios:
+    - 'repeticoes': matriz (n, n) de dezenas em comum entre cada par de sorteios
+    - 'centrado': somas menos a média (autocorrelação de ordem 1)
+    - 'acima': soma acima da mediana (teste de sequências de Wald-Wolfowitz)
+    """
+    bolas = np.asarray(bolas, dtype=np.int64)
+    mascaras = para_mascaras(bolas)
+    somas = bolas.sum(axis=1).astype(np.float64)
+    return {
+        'repeticoes': contar_bits(mascaras[:, None] & mascaras[None, :]),
+        'centrado': somas - somas.mean(),
+        'acima': somas > np.median(somas) if len(somas) else np.zeros(0, dtype=bool),
+    }
+
+
+def estatisticas_seriais(dados, ordens):
+    """
+    Estatísticas seriais para um lote de ordens dos sorteios (lote, n), de uma vez:
+    média de dezenas repetidas entre concursos consecutivos, autocorrelação de
+    ordem 1 das somas e número de sequências acima/abaixo da mediana. Retorna (lote, 3).
+    """
+    anteriores, seguintes = ordens[:, :-1], ordens[:, 1:]
+    repeticoes = dados['repeticoes'][anteriores, seguintes].mean(axis=1, dtype=np.float64)
+    centrado = dados['centrado']
+    variancia = np.dot(centrado, centrado)
+    autocorrelacao = (centrado[anteriores] * centrado[seguintes]).sum(axis=1) / variancia if variancia else np.zeros(len(ordens))
+    acima = dados['acima']
+    sequencias = 1 + np.count_nonzero(acima[anteriores] != acima[seguintes], axis=1)
+    return np.column_stack((repeticoes, autocorrelacao, sequencias))
+
+
+def esperancas_seriais(dados):
+    """
+    Média exata de cada estatística serial sobre todas as ordens possíveis dos sorteios:
+    o centro dos p-valores bilaterais, conhecido antes de embaralhar.
+    """
+    repeticoes = dados['repeticoes']
+    n = len(repeticoes)
+    n_acima = int(np.count_nonzero(dados['acima']))
+    return np.array([
+        (repeticoes.sum(dtype=np.int64) - np.trace(repeticoes, dtype=np.int64)) / (n * (n - 1)),
+        # n - 1 pares consecutivos, cada um com E[c_a c_b] = -sum(c²) / (n(n - 1))
+        -1 / n,
+        1 + 2 * n_acima * (n - n_acima) / n,
+    ])
+
+
+def permutar_serial(bolas, qtd_permutacoes, semente):
+    """
+    Função worker: embaralha a ordem dos sorteios qtd_permutacoes vezes, em lotes
+    vetorizados, e conta para cada teste serial quantos embaralhamentos ficam tão ou
+    mais longe da esperança quanto a ordem real. Retorna os contadores (3,).
+    """
+    dados = preparar_serial(bolas)
+    n = len(bolas)
+    centro = esperancas_seriais(dados)
+    distancia_real = np.abs(estatisticas_seriais(dados, np.arange(n)[None, :])[0] - centro)
+    # Tolerância relativa: empates exatos não podem ser perdidos por arredondamento
+    distancia_real *= 1 - 1e-12
+
+    rng = np.random.default_rng(semente)
+    extremos = np.zeros(len(TESTES_SERIAIS), dtype=np.int64)
+    # Buffer reaproveitado: reembaralhar uma ordem já embaralhada continua uniforme
+    ordens = np.tile(np.arange(n, dtype=np.intp), (min(LOTE_PERMUTACOES, qtd_permutacoes), 1))
+    for inicio in range(0, qtd_permutacoes, LOTE_PERMUTACOES):
+        lote = min(LOTE_PERMUTACOES, qtd_permutacoes - inicio)
+        if lote < len(ordens):
+            ordens = ordens[:lote]
+        # Fisher-Yates por linha em C: O(n) por embaralhamento, sem ordenar chaves aleatórias
+        rng.permuted(ordens, axis=1, out=ordens)
+        distancia = np.abs(estatisticas_seriais(dados, ordens) - centro)
+        extremos += np.count_nonzero(distancia >= distancia_real, axis=0)
+    return extremos
+
+
+def janelas(num_sorteios, tamanho=None, passo=None):
+    """
+    Intervalos [inicio, fim) das janelas móveis, em ordem cronológica; sem `tamanho`,
+    só o histórico completo. As janelas são ancoradas no fim: a última sempre termina
+    no sorteio mais recente, e o resto que não completa uma janela fica no início.
+    """
+    if not tamanho or tamanho >= num_sorteios:
+        return [(0, num_sorteios)]
+    passo = passo or tamanho
+    return [(fim - tamanho, fim) for fim in range(num_sorteios, tamanho - 1, -passo)][::-1]
+
+
+def executar_bateria(bolas, intervalos, permutacoes=100_000, semente=None, num_processos=None):
+    """
+    Roda a bateria em cada intervalo [inicio, fim) dos sorteios (em ordem cronológica).
+    Uniformidade e aderência das somas são assintóticas; os testes seriais usam
+    p-valores de permutação, com os embaralhamentos de todas as janelas divididos em
+    tarefas de PERMUTACOES_POR_TAREFA espalhadas pelo pool de processos.
+    Retorna uma lista de dicionários, um por intervalo.
+    """
+    bolas = np.asarray(bolas, dtype=np.int64)
+    num_processos = num_processos or os.cpu_count() or 4
+    tarefas = [(j, min(PERMUTACOES_POR_TAREFA, permutacoes - k))
+               for j in range(len(intervalos)) for k in range(0, permutacoes, PERMUTACOES_POR_TAREFA)]
+    sementes = np.random.SeedSequence(semente).spawn(len(tarefas))
+
+    resultados = []
+    for inicio, fim in intervalos:
+        janela = bolas[inicio:fim]
+        dados = preparar_serial(janela)
+        resultados.append({
+            'inicio': inicio,
+            'fim': fim,
+            'uniformidade': teste_uniformidade(janela),
+            'somas': teste_somas(janela),
+            'serial': dict(zip(TESTES_SERIAIS, estatisticas_seriais(dados, np.arange(fim - inicio)[None, :])[0].tolist())),
+            'esperado': dict(zip(TESTES_SERIAIS, esperancas_seriais(dados).tolist())),
+        })
+
+    extremos = np.zeros((len(intervalos), len(TESTES_SERIAIS)), dtype=np.int64)
+    with ProcessPoolExecutor(max_workers=num_processos) as executor:
+        futuros = [executor.submit(permutar_serial, bolas[intervalos[j][0]:intervalos[j][1]], qtd, s)
+                   for (j, qtd), s in zip(tarefas, sementes)]
+        for (j, _), futuro in zip(tarefas, futuros):
+            extremos[j] += futuro.result()
+
+    for resultado, contagem in zip(resultados, extremos):
+        # (1 + extremos) / (1 + permutações): nunca zero, válido com qualquer número de embaralhamentos
+        resultado['p_serial'] = dict(zip(TESTES_SERIAIS, ((1 + contagem) / (1 + permutacoes)).tolist()))
+    return resultados
+
+
+def main():
+    from historico import carregar_historico
+
+    parser = argparse.ArgumentParser(description="Bateria de testes de aleatoriedade sobre o histórico da Mega-Sena.")
+    parser.add_argument('--janela', type=int, help="Tamanho das janelas móveis (concursos); sem ela, só o histórico completo")
+    parser.add_argument('--passo', type=int, help="Deslocamento entre janelas (padrão: o tamanho da janela)")
+    parser.add_argument('--permutacoes', type=int, default=100_000)
+    parser.add_argument('--semente', type=int, default=None)
+    parser.add_argument('--processos', type=int, default=None)
+    args = parser.parse_args()
+
+    historico = carregar_historico()
+    ordem = np.argsort(historico['data'], kind='stable')
+    bolas = np.asarray(historico['bolas'])[ordem]
+    datas = historico['data'][ordem]
+
+    intervalos = janelas(len(bolas), args.janela, args.passo)
+    if args.janela and (0, len(bolas)) not in intervalos:
+        intervalos.insert(0, (0, len(bolas)))
+
+    print(f"Testando {len(intervalos)} janela(s) com {args.permutacoes:,} permutações cada...")
+    inicio = time.time()
+    resultados = executar_bateria(bolas, intervalos, args.permutacoes, args.semente, args.processos)
+
+    print(f"{'Janela':<25}{'Uniform. p':>11}{'Somas p':>10}{'Repet.':>9}{'p':>9}{'Autocor.':>10}{'p':>9}{'Seq.':>7}{'p':>9}")
+    for r in resultados:
+        rotulo = f"{datas[r['inicio']]} a {datas[r['fim'] - 1]}"
+        serial, p = r['serial'], r['p_serial']
+        print(f"{rotulo:<25}{r['uniformidade']['p_valor']:>11.4f}{r['somas']['p_valor']:>10.4f}"
+              f"{serial['repeticoes']:>9.4f}{p['repeticoes']:>9.4f}{serial['autocorrelacao']:>10.4f}{p['autocorrelacao']:>9.4f}"
+              f"{serial['sequencias']:>7.0f}{p['sequencias']:>9.4f}")
+    print(f"Concluído em {time.time() - inicio:.2f} segundos.")
+
+
+if __name__ == "__main__":
+    main()
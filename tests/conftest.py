@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Os módulos de src/ se importam pelo nome (from gerador import ...), como quando executados como scripts
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
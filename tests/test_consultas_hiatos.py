@@ -0,0 +1,22 @@
+import numpy as np
+from historico import carregar_historico
+from indice_dezenas import construir_indice
+from consultas_hiatos import preparar_consultas, hiatos, percentis_hiatos
+
+
+def test_hiatos_batem_com_indice_dezenas():
+    historico = carregar_historico(usar_cache=False)
+    indice = construir_indice(historico)
+    motor = preparar_consultas(historico)
+    resultado = hiatos(motor)
+    _, percentis = percentis_hiatos(motor, (50, 90, 99))
+
+    for d in range(60):
+        mesmos = resultado['coluna'] == d
+        concursos = resultado['concursos'][mesmos]
+        histograma = indice['histograma_hiatos'][d]
+        np.testing.assert_array_equal(np.bincount(concursos, minlength=len(histograma)), histograma)
+        assert concursos.max() == indice['maior_hiato_concursos'][d]
+        assert resultado['dias'][mesmos].max() == indice['maior_hiato_dias'][d]
+        esperados = np.percentile(np.repeat(np.arange(len(histograma)), histograma), (50, 90, 99))
+        np.testing.assert_allclose(percentis[d], esperados)
@@ -0,0 +1,17 @@
+import numpy as np
+from indice_dezenas import construir_indice, mais_atrasada, nunca_sorteadas, EPOCA
+
+
+def test_mais_atrasada_ignora_dezenas_que_nunca_sairam():
+    historico = {
+        'concurso': np.array([1, 2]),
+        'data': np.array(['1996-03-11', '1996-03-18'], dtype='datetime64[D]'),
+        'bolas': np.array([[4, 5, 30, 33, 41, 52], [9, 37, 39, 41, 43, 49]]),
+    }
+    indice = construir_indice(historico)
+
+    assert len(nunca_sorteadas(indice)) == 60 - 11
+    dezena, ultimo_dia, dias = mais_atrasada(indice)
+    assert dezena == 4
+    assert ultimo_dia == int((np.datetime64('1996-03-11') - EPOCA).astype(np.int64))
+    assert dias == 7
@@ -0,0 +1,172 @@
+import asyncio
+import json
+import shutil
+import numpy as np
+import pytest
+from armazenamento import salvar_jogos, caminho_estatisticas
+from historico import ARQUIVO_HISTORICO, tabelas_acumuladas
+from servico_consultas import iniciar_servico
+
+# Intervalo curto de recarga para os testes não esperarem o padrão de 2 s
+INTERVALO = 0.05
+# Tempo máximo de espera por uma recarga
+ESPERA_MAXIMA = 10.0
+
+NOVO_SORTEIO = '9999;"01/01/2030";1;2;3;4;5;6\n'
+
+
+@pytest.fixture
+def csv(tmp_path):
+    destino = tmp_path / 'historico.csv'
+    shutil.copyfile(ARQUIVO_HISTORICO, destino)
+    return destino
+
+
+@pytest.fixture
+def simulados(tmp_path):
+    """Armazenamento pequeno com as tabelas acumuladas gravadas ao lado, como faz a simulação."""
+    jogos = np.array([[1, 2, 3, 4, 5, 6], [10, 20, 30, 40, 50, 60], [1, 11, 21, 31, 41, 51], [5, 6, 7, 8, 9, 10]], dtype=np.uint8)
+    arquivo = tmp_path / 'jogos.bin'
+    cabecalho = salvar_jogos(str(arquivo), jogos)
+    contagens, somas = tabelas_acumuladas(jogos)
+    np.savez(caminho_estatisticas(str(arquivo)), criado_em=cabecalho['criado_em'],
+             limites_blocos=np.arange(len(jogos) + 1), contagens_acumuladas=contagens, somas_acumuladas=somas)
+    return arquivo
+
+
+def _executar(csv, teste, simulados=None):
+    """Sobe o serviço em uma porta livre, roda teste(porta, estado) e encerra tudo."""
+    async def principal():
+        servidor, estado = await iniciar_servico('127.0.0.1', 0, str(csv), str(simulados) if simulados else None,
+                                                 intervalo_recarga=INTERVALO)
+        try:
+            return await teste(servidor.sockets[0].getsockname()[1], estado)
+        finally:
+            estado['vigia'].cancel()
+            servidor.close()
+            await servidor.wait_closed()
+    return asyncio.run(principal())
+
+
+async def _requisitar(leitor, escritor, alvo, metodo='GET', cabecalhos=''):
+    escritor.write(f"{metodo} {alvo} HTTP/1.1\r\nHost: localhost\r\n{cabecalhos}\r\n".encode('latin-1'))
+    await escritor.drain()
+    linhas = (await leitor.readuntil(b'\r\n\r\n')).decode('latin-1').split('\r\n')
+    campos = {k.strip().lower(): v.strip() for k, _, v in (linha.partition(':') for linha in linhas[1:] if linha)}
+    corpo = json.loads(await leitor.readexactly(int(campos['content-length'])))
+    return int(linhas[0].split()[1]), campos, corpo
+
+
+async def _get(porta, alvo, metodo='GET'):
+    """Uma requisição em uma conexão nova, fechada em seguida."""
+    leitor, escritor = await asyncio.open_connection('127.0.0.1', porta)
+    try:
+        status, _, corpo = await _requisitar(leitor, escritor, alvo, metodo, 'Connection: close\r\n')
+        return status, corpo
+    finally:
+        escritor.close()
+
+
+async def _esperar(condicao):
+    prazo = asyncio.get_running_loop().time() + ESPERA_MAXIMA
+    while not condicao():
+        assert asyncio.get_running_loop().time() < prazo, "A recarga não aconteceu a tempo."
+        await asyncio.sleep(INTERVALO)
+
+
+def test_rotas(csv, simulados):
+    async def teste(porta, estado):
+        total = len(estado['indices']['datas'])
+
+        status, corpo = await _get(porta, '/status')
+        assert status == 200
+        assert corpo['sorteios'] == total and corpo['simulacao'] == 4
+
+        status, corpo = await _get(porta, '/frequencia?dezena=10')
+        assert status == 200
+        assert corpo['sorteios'] == total and corpo['dezena'] == 10
+        assert corpo['ocorrencias'] == int(estado['indices']['contagens_acumuladas'][-1][9])
+        status, corpo = await _get(porta, '/frequencia?inicio=1996-03-11&fim=1996-03-11')
+        assert status == 200
+        assert corpo['sorteios'] == 1 and sum(corpo['ocorrencias']) == 6
+
+        status, corpo = await _get(porta, '/atraso?dezena=4')
+        assert status == 200
+        assert corpo['dezena'] == 4 and corpo['atraso'] >= 0
+        status, corpo = await _get(porta, '/atraso')
+        assert status == 200
+        assert len(corpo['atrasos']) == 60
+
+        status, corpo = await _get(porta, '/somas?inicio=1996-03-11&fim=1996-03-18')
+        assert status == 200
+        assert corpo['histograma'] == {'165': 1, '218': 1} and corpo['media'] == 191.5
+
+        # Concurso 1: 04 05 30 33 41 52
+        status, corpo = await _get(porta, '/bilhete?dezenas=4,5,30,33,41,52')
+        assert status == 200
+        assert corpo['maior_acerto'] == 6 and corpo['senas'][0]['concurso'] == 1
+
+        status, corpo = await _get(porta, '/simulacao?quantidade=2')
+        assert status == 200
+        assert corpo['jogos'] == 2 and sum(corpo['ocorrencias']) == 12 and corpo['histograma'] == {'21': 1, '210': 1}
+
+    _executar(csv, teste, simulados)
+
+
+def test_erros(csv):
+    async def teste(porta, estado):
+        for alvo in ('/frequencia?dezena=61', '/somas?inicio=ontem', '/bilhete?dezenas=1,2,3', '/simulacao'):
+            status, corpo = await _get(porta, alvo)
+            assert status == 400, alvo
+            assert 'erro' in corpo
+
+        status, corpo = await _get(porta, '/inexistente')
+        assert status == 404
+        assert '/status' in corpo['rotas']
+
+        status, _ = await _get(porta, '/status', metodo='POST')
+        assert status == 405
+
+    _executar(csv, teste)
+
+
+def test_keep_alive(csv):
+    async def teste(porta, estado):
+        leitor, escritor = await asyncio.open_connection('127.0.0.1', porta)
+        try:
+            status, campos, primeiro = await _requisitar(leitor, escritor, '/status')
+            assert status == 200 and campos['connection'] == 'keep-alive'
+            status, campos, segundo = await _requisitar(leitor, escritor, '/atraso?dezena=10')
+            assert status == 200 and segundo['dezena'] == 10
+            status, campos, _ = await _requisitar(leitor, escritor, '/status', cabecalhos='Connection: close\r\n')
+            assert status == 200 and campos['connection'] == 'close'
+            assert await leitor.read() == b''
+        finally:
+            escritor.close()
+
+    _executar(csv, teste)
+
+
+def test_recarga_quando_o_csv_muda(csv):
+    original = csv.read_text(encoding='utf-8')
+
+    async def teste(porta, estado):
+        total = len(estado['indices']['datas'])
+
+        # Uma versão quebrada do CSV é rejeitada uma vez e os índices antigos continuam valendo
+        csv.write_text('"Concurso";"Data do Sorteio"\n1;"11/03/1996"\n', encoding='utf-8')
+        await _esperar(lambda: estado['assinatura_falha'] is not None)
+        status, corpo = await _get(porta, '/status')
+        assert status == 200 and corpo['sorteios'] == total
+
+        csv.write_text(original.rstrip('\n') + '\n' + NOVO_SORTEIO, encoding='utf-8')
+        await _esperar(lambda: len(estado['indices']['datas']) == total + 1)
+        assert estado['assinatura_falha'] is None
+
+        status, corpo = await _get(porta, '/status')
+        assert status == 200
+        assert corpo['sorteios'] == total + 1 and corpo['ultimo_concurso'] == 9999
+        status, corpo = await _get(porta, '/atraso?dezena=1')
+        assert corpo['atraso'] == 0 and corpo['ultimo_concurso'] == 9999
+
+    _executar(csv, teste)
@@ -0,0 +1,22 @@
+from itertools import permutations
+import numpy as np
+from testes_aleatoriedade import preparar_serial, estatisticas_seriais, esperancas_seriais, janelas
+
+
+def test_esperancas_seriais_batem_com_todas_as_permutacoes():
+    # Com n pequeno, a média sobre todas as n! ordens é a esperança exata
+    rng = np.random.default_rng(7)
+    bolas = np.array([np.sort(rng.choice(60, 6, replace=False)) + 1 for _ in range(7)])
+    dados = preparar_serial(bolas)
+    ordens = np.array(list(permutations(range(len(bolas)))))
+
+    media = estatisticas_seriais(dados, ordens).mean(axis=0)
+
+    np.testing.assert_allclose(media, esperancas_seriais(dados), rtol=1e-12, atol=1e-12)
+
+
+def test_janelas_terminam_no_sorteio_mais_recente():
+    assert janelas(10) == [(0, 10)]
+    assert janelas(10, 4) == [(2, 6), (6, 10)]
+    assert janelas(10, 4, 3) == [(0, 4), (3, 7), (6, 10)]
+    assert janelas(11, 4, 3) == [(1, 5), (4, 8), (7, 11)]